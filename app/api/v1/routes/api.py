@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from app.api.v1.routes.endpoints.admin import router as admin_router
 from app.api.v1.routes.endpoints.auth import router as auth_router
 from app.api.v1.routes.endpoints.category import router as category_router
 from app.api.v1.routes.endpoints.user import router as user_router
@@ -10,4 +11,5 @@ api_router.include_router(auth_router)
 api_router.include_router(user_router)
 api_router.include_router(category_router)
 api_router.include_router(product_router)
-api_router.include_router(order_router)
\ No newline at end of file
+api_router.include_router(order_router)
+api_router.include_router(admin_router)
\ No newline at end of file
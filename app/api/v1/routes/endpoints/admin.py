@@ -0,0 +1,73 @@
+# app/api/v1/endpoints/admin.py
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.utils.auth import auth_utils
+from app.utils.loop_monitor import loop_monitor
+from app.utils.profiling import profile_store
+from app.utils.server_timing import TimedRoute
+
+router = APIRouter(
+    route_class=TimedRoute,
+    prefix="/admin",
+    tags=["admin"],
+    responses={404: {"description": "Not found"}},
+    dependencies=[Depends(auth_utils.require_roles(["admin"]))]
+)
+
+@router.get(
+    "/profiles",
+    description="Recent request profiles, newest first"
+)
+async def list_profiles() -> List[Dict[str, Any]]:
+    return profile_store.list()
+
+@router.get(
+    "/profiles/routes",
+    description="Routes with aggregated profiles, with their request and sample counts"
+)
+async def list_profiled_routes() -> Dict[str, Dict[str, int]]:
+    return profile_store.routes()
+
+@router.get(
+    "/profiles/aggregate",
+    response_class=PlainTextResponse,
+    description="Stacks of every profile of a route, in collapsed stack format (flamegraph.pl, speedscope)"
+)
+async def get_route_profile(
+    route: str = Query(..., description="Route template, e.g. /api/v1/products/{product_id}")
+) -> str:
+    collapsed = profile_store.aggregate(route)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="No profiles for this route")
+    return collapsed
+
+@router.get(
+    "/profiles/{profile_id}",
+    description="One profile: JSON summary and stacks, or collapsed stack format with format=collapsed"
+)
+async def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|collapsed)$")
+):
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    return {**profile.summary(), "stacks": dict(profile.stacks.most_common())}
+
+@router.delete(
+    "/profiles",
+    status_code=204,
+    description="Drop all stored profiles"
+)
+async def clear_profiles() -> None:
+    profile_store.clear()
+
+@router.get(
+    "/event-loop",
+    description="Event loop lag percentiles and the stacks that recently blocked the loop"
+)
+async def get_event_loop_stats() -> Dict[str, Any]:
+    return {**loop_monitor.stats(), "recent_blocks": loop_monitor.recent_blocks()}
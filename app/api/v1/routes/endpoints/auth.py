@@ -1,12 +1,15 @@
 # app/api/v1/endpoints/categories.py
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
 from app.services.auth_service import AuthService
-from app.schemas.auth import TokenPayload, TokenResponse, LoginBody
+from app.schemas.auth import RefreshTokenBody, TokenResponse, LoginBody
+from app.utils.server_timing import TimedRoute
 
 router = APIRouter(
+    route_class=TimedRoute,
     prefix="/auth",
     tags=["authentications"],
     responses={404: {"description": "Not found"}}
@@ -32,7 +35,7 @@ async def login(
     description="Access token refresh"
 )
 async def refresh(
-    payload: TokenPayload,
+    payload: RefreshTokenBody,
     service: AuthService = Depends(get_auth_service)
 ) -> TokenResponse:
     return await service.refresh(payload.refresh_token)
@@ -43,7 +46,8 @@ async def refresh(
     description="User logout"
 )
 async def logout(
-    payload: TokenPayload,
+    payload: RefreshTokenBody,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
     service: AuthService = Depends(get_auth_service)
 ):
-    return await service.logout(payload.refresh_token)
+    return await service.logout(payload.refresh_token, credentials.credentials if credentials else None)
@@ -3,14 +3,16 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
-from app.models.model import User
+from app.utils.principal import Principal
 from app.schemas.base import PaginatedResponse
 from app.services.order.order_service import OrderService
 from app.schemas.order import OrderCreate, OrderAdminUpdate, OrderResponse
 from app.utils.helpers import paginate
 from app.utils.auth import auth_utils
+from app.utils.server_timing import TimedRoute
 
 router = APIRouter(
+    route_class=TimedRoute,
     prefix="/orders",
     tags=["orders"],
     responses={404: {"description": "Not found"}}
@@ -27,10 +29,9 @@ async def get_order_service(db: Session = Depends(get_db)) -> OrderService:
 )
 async def create_order(
     order: OrderCreate,
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
     service: OrderService = Depends(get_order_service)
 ) -> OrderResponse:
-    print("order-router", order)
     return await service.create_order(order, current_user.id)
 
 
@@ -43,7 +44,7 @@ async def get_orders(
     skip: int = Query(0, ge=0, description="Skip N items"),
     limit: int = Query(100, ge=1, le=100, description="Limit the results"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
     service: OrderService = Depends(get_order_service)
 ) -> PaginatedResponse[OrderResponse]:
     filters = {"is_active": is_active} if is_active is not None else None
@@ -57,7 +58,7 @@ async def get_orders(
 )
 async def get_order(
     order_id: int,
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
     service: OrderService = Depends(get_order_service)
 ) -> OrderResponse:
     return await service.get_order(order_id)
@@ -70,7 +71,7 @@ async def get_order(
 async def update_order(
     order_id: int,
     order: OrderAdminUpdate,
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
     service: OrderService = Depends(get_order_service)
 ) -> OrderResponse:
     return await service.update_order(order_id, order)
@@ -82,7 +83,7 @@ async def update_order(
 )
 async def delete_order(
     order_id: int,
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
     service: OrderService = Depends(get_order_service)
 ) -> None:
     await service.delete_order(order_id)
@@ -94,7 +95,7 @@ async def delete_order(
 )
 async def search_orders(
     search_term: str,
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
     service: OrderService = Depends(get_order_service)
 ) -> List[OrderResponse]:
     return await service.search_orders(search_term)
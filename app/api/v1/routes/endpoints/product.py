@@ -3,14 +3,16 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
-from app.models.model import User
+from app.utils.principal import Principal
 from app.schemas.base import PaginatedResponse
 from app.services.product_service import ProductService
 from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
 from app.utils.helpers import paginate
 from app.utils.auth import auth_utils
+from app.utils.server_timing import TimedRoute
 
 router = APIRouter(
+    route_class=TimedRoute,
     prefix="/products",
     tags=["products"],
     responses={404: {"description": "Not found"}}
@@ -27,7 +29,7 @@ async def get_product_service(db: Session = Depends(get_db)) -> ProductService:
 )
 async def create_product(
     product: ProductCreate,
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
     service: ProductService = Depends(get_product_service)
 ) -> ProductResponse:
     return await service.create_product(product)
@@ -42,13 +44,26 @@ async def get_products(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(100, ge=1, le=100, description="Page size"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
     service: ProductService = Depends(get_product_service)
 ) -> PaginatedResponse[ProductResponse]:
     filters = {"is_active": is_active} if is_active is not None else None
     products, total = await service.get_products(page, size, filters)
     return paginate(products, ProductResponse, total, page, size)
 
+@router.get(
+    "/search",
+    response_model=List[ProductResponse],
+    description="Search products"
+)
+async def search_products(
+    search_term: str,
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
+    service: ProductService = Depends(get_product_service)
+) -> List[ProductResponse]:
+    return await service.search_products(search_term)
+
+# After /search, which would otherwise match as a product id
 @router.get(
     "/{product_id}",
     response_model=ProductResponse,
@@ -69,7 +84,7 @@ async def get_product(
 async def update_product(
     product_id: int,
     product: ProductUpdate,
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
     service: ProductService = Depends(get_product_service)
 ) -> ProductResponse:
     return await service.update_product(product_id, product)
@@ -81,19 +96,7 @@ async def update_product(
 )
 async def delete_product(
     product_id: int,
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
+    current_user: Principal = Depends(auth_utils.require_roles(["admin"])),
     service: ProductService = Depends(get_product_service)
 ) -> None:
     await service.delete_product(product_id)
-
-@router.get(
-    "/search",
-    response_model=List[ProductResponse],
-    description="Search products"
-)
-async def search_products(
-    search_term: str,
-    current_user: User = Depends(auth_utils.require_roles(["admin"])),
-    service: ProductService = Depends(get_product_service)
-) -> List[ProductResponse]:
-    return await service.search_products(search_term)
\ No newline at end of file
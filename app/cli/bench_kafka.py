@@ -0,0 +1,299 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.utils.benchmark import summarize_latencies
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Measure producer throughput and end-to-end latency of the order event pipeline"
+    )
+    parser.add_argument("--transport", choices=["memory", "aiokafka"], default=settings.KAFKA_TRANSPORT,
+                        help="memory runs against the in-process broker, aiokafka against KAFKA_BOOTSTRAP_SERVERS")
+    parser.add_argument("--count", type=int, default=100000, help="Messages to send")
+    parser.add_argument("--message-size", type=int, default=1024, help="Approximate message size in bytes")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent producer tasks")
+    parser.add_argument("--batch-size", type=int, default=500, help="Messages per produce_batch call")
+    parser.add_argument("--compression", default=settings.KAFKA_COMPRESSION_TYPE,
+                        help="Producer compression: none, gzip, snappy, lz4, zstd or auto")
+    parser.add_argument("--orders", type=int, default=10000, help="Distinct order ids 1..N to spread messages over")
+    parser.add_argument("--workers", type=int, default=settings.KAFKA_CONSUMER_WORKERS, help="Consumer workers")
+    parser.add_argument("--consumer-batch-size", type=int, default=settings.KAFKA_CONSUMER_BATCH_SIZE,
+                        help="> 1 enables batched handling in the consumer")
+    parser.add_argument("--handler", choices=["noop", "order"], default="noop",
+                        help="noop measures the pipeline only; order also runs process_order against DATABASE_URL, "
+                             "marking orders 1..--orders paid and reserving their stock")
+    parser.add_argument("--write-database", action="store_true",
+                        help="Required with --handler order, to confirm DATABASE_URL may be modified")
+    parser.add_argument("--topic", default=None, help="Topic to use (default: a fresh bench topic)")
+    parser.add_argument("--timeout", type=float, default=300, help="Give up waiting for the consumer after N seconds")
+    parser.add_argument("--lag-interval", type=float, default=0.5, help="Consumer lag sampling interval in seconds")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout")
+    compression = parser.add_argument_group("compression comparison")
+    compression.add_argument("--compare-compression", action="store_true",
+                             help="Only compare codecs (CPU time and wire size) on sample events, without a broker")
+    compression.add_argument("--sample-file", default=None, help="JSON lines file of events to sample")
+    compression.add_argument("--sample-orders", type=int, default=0,
+                             help="Sample this many of the latest orders from the database as order events")
+    compression.add_argument("--compression-batch-bytes", type=int, default=16384,
+                             help="Group encoded events into batches of up to this many bytes, like the producer")
+    return parser
+
+
+def make_message(order_id: int, seq: int, message_size: int) -> Dict[str, Any]:
+    message = {
+        "order_id": order_id,
+        "status": "paid",
+        "customer_id": order_id % 1000 + 1,
+        "seq": seq,
+        "sent_at_ns": 0,
+    }
+    padding = message_size - len(json.dumps(message)) - len(', "padding": ""')
+    message["padding"] = "x" * max(0, padding)
+    return message
+
+
+class PipelineBenchmark:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.topic = args.topic or f"bench-orders-{uuid.uuid4().hex[:8]}"
+        self.group_id = f"bench-{uuid.uuid4().hex[:8]}"
+        self.latencies_ms: List[float] = []
+        self.lag_samples: List[int] = []
+        self.sent = 0
+        self.send_errors = 0
+        self.done = asyncio.Event()
+
+    async def handle(self, value: Dict[str, Any]) -> None:
+        if self.args.handler == "order":
+            from app.services.order.order_event_handler import process_order
+            await process_order(value)
+        self._record(value)
+
+    async def handle_batch(self, values: List[Dict[str, Any]]) -> None:
+        if self.args.handler == "order":
+            from app.services.order.order_event_handler import process_order_batch
+            await process_order_batch(values)
+        for value in values:
+            self._record(value)
+
+    def _record(self, value: Dict[str, Any]) -> None:
+        self.latencies_ms.append((time.time_ns() - value["sent_at_ns"]) / 1e6)
+        if len(self.latencies_ms) >= self.args.count:
+            self.done.set()
+
+    async def produce(self, producer, seq: int, count: int) -> None:
+        args = self.args
+        for start in range(0, count, args.batch_size):
+            messages, keys = [], []
+            for i in range(start, min(start + args.batch_size, count)):
+                order_id = (seq + i) % args.orders + 1
+                message = make_message(order_id, seq + i, args.message_size)
+                message["sent_at_ns"] = time.time_ns()
+                messages.append(message)
+                keys.append(str(order_id).encode())
+            try:
+                await producer.produce_batch(self.topic, messages, keys=keys)
+                self.sent += len(messages)
+            except Exception as e:
+                self.send_errors += len(messages)
+                print(f"Send failed: {e!r}", file=sys.stderr)
+
+    @staticmethod
+    async def current_lag(consumer) -> int:
+        """Records on the assigned partitions not yet committed by the group."""
+        lag = 0
+        for tp in consumer.assignment():
+            committed = await consumer.committed(tp) or 0
+            lag += max(0, (consumer.highwater(tp) or 0) - committed)
+        return lag
+
+    async def sample_lag(self, consumer) -> None:
+        while not self.done.is_set():
+            self.lag_samples.append(await self.current_lag(consumer))
+            try:
+                await asyncio.wait_for(self.done.wait(), self.args.lag_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self) -> Dict[str, Any]:
+        from app.kafka.consumer.engine import ConsumerEngine, order_key
+        from app.kafka.producer import KafkaProducer
+        from app.kafka.serialization import event_codec
+        from app.kafka.transport import create_consumer
+
+        args = self.args
+        producer = KafkaProducer(compression_type=args.compression)
+        consumer = create_consumer(
+            self.topic,
+            group_id=self.group_id,
+            enable_auto_commit=False,
+            auto_offset_reset="earliest",
+            value_deserializer=event_codec.decode
+        )
+        await consumer.start()
+        engine = ConsumerEngine(
+            consumer,
+            handler=self.handle,
+            key_func=order_key,
+            workers=args.workers,
+            max_records=settings.KAFKA_CONSUMER_MAX_RECORDS,
+            fetch_timeout_ms=settings.KAFKA_CONSUMER_FETCH_TIMEOUT_MS,
+            queue_size=settings.KAFKA_CONSUMER_QUEUE_SIZE,
+            commit_interval_ms=settings.KAFKA_CONSUMER_COMMIT_INTERVAL_MS,
+            batch_handler=self.handle_batch if args.consumer_batch_size > 1 else None,
+            batch_size=args.consumer_batch_size,
+            batch_timeout_ms=settings.KAFKA_CONSUMER_BATCH_TIMEOUT_MS
+        )
+        engine_task = asyncio.create_task(engine.run())
+        lag_task = asyncio.create_task(self.sample_lag(consumer))
+
+        per_worker = args.count // args.concurrency
+        counts = [per_worker + (1 if i < args.count % args.concurrency else 0) for i in range(args.concurrency)]
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self.produce(producer, sum(counts[:i]), n) for i, n in enumerate(counts)
+        ))
+        produced_s = time.perf_counter() - started
+
+        if self.sent < args.count:
+            # Only what was actually sent can arrive
+            args.count = self.sent
+            if len(self.latencies_ms) >= args.count:
+                self.done.set()
+        timed_out = False
+        try:
+            await asyncio.wait_for(self.done.wait(), args.timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+        consumed_s = time.perf_counter() - started
+
+        self.done.set()
+        engine.stop()
+        await engine_task
+        await lag_task
+        final_lag = await self.current_lag(consumer)
+        await consumer.stop()
+        await producer.close()
+
+        received = len(self.latencies_ms)
+        return {
+            "config": {
+                "transport": args.transport,
+                "topic": self.topic,
+                "message_size": args.message_size,
+                "concurrency": args.concurrency,
+                "batch_size": args.batch_size,
+                "compression": args.compression,
+                "workers": args.workers,
+                "consumer_batch_size": args.consumer_batch_size,
+                "handler": args.handler,
+            },
+            "producer": {
+                "sent": self.sent,
+                "errors": self.send_errors,
+                "elapsed_s": round(produced_s, 3),
+                "throughput_msg_s": round(self.sent / produced_s, 1) if produced_s else 0,
+                "throughput_mb_s": round(self.sent * args.message_size / produced_s / 1e6, 3) if produced_s else 0,
+            },
+            "consumer": {
+                "received": received,
+                "timed_out": timed_out,
+                "elapsed_s": round(consumed_s, 3),
+                "throughput_msg_s": round(received / consumed_s, 1) if consumed_s else 0,
+                "engine": engine.stats.as_dict(),
+            },
+            "latency": summarize_latencies(self.latencies_ms),
+            "consumer_lag": {
+                "max": max(self.lag_samples, default=0),
+                "final": final_lag,
+                "samples": len(self.lag_samples),
+            },
+        }
+
+
+async def load_sample_events(args: argparse.Namespace) -> Tuple[str, List[Dict[str, Any]]]:
+    if args.sample_file:
+        with open(args.sample_file) as f:
+            return args.sample_file, [json.loads(line) for line in f if line.strip()]
+    if args.sample_orders:
+        from sqlalchemy import select
+        from app.database.connection import AsyncSessionLocal
+        from app.models.model import Order
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Order.id, Order.status, Order.user_id)
+                .order_by(Order.id.desc())
+                .limit(args.sample_orders)
+            )
+            return "database", [
+                {"order_id": order_id, "status": status, "customer_id": user_id}
+                for order_id, status, user_id in result.all()
+            ]
+    return "synthetic", [make_message(i % args.orders + 1, i, args.message_size) for i in range(args.count)]
+
+
+async def compare_compression(args: argparse.Namespace) -> Dict[str, Any]:
+    from app.kafka.compression import available_codecs, compare_codecs
+    from app.kafka.serialization import event_codec
+
+    source, events = await load_sample_events(args)
+    batches: List[List[bytes]] = [[]]
+    batch_bytes = 0
+    for event in events:
+        record = event_codec.encode(event)
+        if batches[-1] and batch_bytes + len(record) > args.compression_batch_bytes:
+            batches.append([])
+            batch_bytes = 0
+        batches[-1].append(record)
+        batch_bytes += len(record)
+    results = compare_codecs(batches) if events else []
+    return {
+        "config": {
+            "source": source,
+            "events": len(events),
+            "serializer": event_codec.serializer.name,
+            "batch_bytes": args.compression_batch_bytes,
+            "available_codecs": available_codecs(),
+        },
+        "results": results,
+        "smallest": min(results, key=lambda r: r["wire_bytes"])["codec"] if results else None,
+        "cheapest_compressed": min(
+            (r for r in results if r["codec"] != "none"),
+            key=lambda r: r["compress_cpu_us_per_record"],
+            default={"codec": None}
+        )["codec"],
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.compare_compression:
+        return await compare_compression(args)
+    settings.KAFKA_TRANSPORT = args.transport
+    return await PipelineBenchmark(args).run()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.handler == "order" and not args.write_database:
+        parser.error(
+            "--handler order updates orders and product stock in DATABASE_URL; point DATABASE_URL "
+            "at a bench database (e.g. one seeded with app/cli/seed.py --bulk) and pass --write-database"
+        )
+    report = asyncio.run(run_benchmark(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
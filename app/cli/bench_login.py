@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from app.core.config import settings
+from app.utils.benchmark import summarize_latencies
+from app.utils.hashing import PasswordHasher, get_context
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Measure password verification throughput per core and its impact on the event loop"
+    )
+    parser.add_argument("--logins", type=int, default=200, help="Password verifications to run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent login attempts")
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS, help="bcrypt cost")
+    parser.add_argument("--executor", choices=["thread", "process", "inline"], default=settings.PASSWORD_HASH_EXECUTOR,
+                        help="inline runs bcrypt on the event loop, as login did before")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS, help="Pool size, 0 = one per core")
+    parser.add_argument("--max-pending", type=int, default=settings.PASSWORD_HASH_MAX_PENDING,
+                        help="Queue depth before shedding with 429")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout")
+    return parser
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float, lags_ms: List[float]) -> None:
+    """How late a periodic timer fires: what every other request on the worker waits."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags_ms.append(max(0.0, loop.time() - expected) * 1000)
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    password = "correct horse battery staple"
+    password_hash = get_context(args.rounds).hash(password)
+    hasher = PasswordHasher(
+        rounds=args.rounds,
+        executor="thread" if args.executor == "inline" else args.executor,
+        workers=args.workers,
+        max_pending=args.max_pending
+    )
+    latencies_ms: List[float] = []
+    rejected = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(args.logins):
+        queue.put_nowait(None)
+
+    async def login() -> None:
+        nonlocal rejected
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                if args.executor == "inline":
+                    valid = get_context(args.rounds).verify(password, password_hash)
+                    await asyncio.sleep(0)
+                else:
+                    valid = await hasher.verify(password, password_hash)
+            except HTTPException:
+                rejected += 1
+                continue
+            assert valid
+            latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    if args.executor != "inline":
+        # Start the pool outside the measurement
+        await hasher.verify(password, password_hash)
+
+    lags_ms: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop, 0.01, lags_ms))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await lag_task
+    hasher.shutdown()
+
+    workers = 1 if args.executor == "inline" else hasher.workers
+    completed = len(latencies_ms)
+    return {
+        "config": {
+            "rounds": args.rounds,
+            "executor": args.executor,
+            "workers": workers,
+            "concurrency": args.concurrency,
+            "max_pending": args.max_pending,
+        },
+        "logins": completed,
+        "rejected": rejected,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(completed / elapsed, 2) if elapsed else 0,
+        "throughput_per_core_per_s": round(completed / elapsed / workers, 2) if elapsed else 0,
+        "latency": summarize_latencies(latencies_ms),
+        "event_loop_lag": summarize_latencies(lags_ms),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
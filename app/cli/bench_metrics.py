@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+from app.middleware.metrics import MetricsMiddleware
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Measure the per-request overhead of the metrics middleware"
+    )
+    parser.add_argument("--requests", type=int, default=200000, help="Requests per run")
+    parser.add_argument("--routes", type=int, default=20, help="Distinct route templates")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant, the fastest is reported")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout")
+    return parser
+
+
+class _Route:
+    def __init__(self, path: str):
+        self.path = path
+
+
+async def _endpoint(scope, receive, send) -> None:
+    # What the router does: leave the matched route in the scope, then respond
+    scope["route"] = scope["_route"]
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _run(app, scopes: List[Dict[str, Any]]) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for scope in scopes:
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - started
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    routes = [_Route(f"/api/v1/resource{i}/{{item_id}}") for i in range(args.routes)]
+    scopes = [
+        {"type": "http", "method": "GET", "path": f"/api/v1/resource{n % args.routes}/{n}", "_route": routes[n % args.routes]}
+        for n in range(args.requests)
+    ]
+    variants = {"baseline": _endpoint, "metrics": MetricsMiddleware(_endpoint)}
+    best = {}
+    for name, app in variants.items():
+        best[name] = min([await _run(app, scopes) for _ in range(args.repeat)])
+    overhead_us = (best["metrics"] - best["baseline"]) / args.requests * 1e6
+    return {
+        "config": {"requests": args.requests, "routes": args.routes, "repeat": args.repeat},
+        "baseline_us_per_request": round(best["baseline"] / args.requests * 1e6, 3),
+        "metrics_us_per_request": round(best["metrics"] / args.requests * 1e6, 3),
+        "overhead_us_per_request": round(overhead_us, 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
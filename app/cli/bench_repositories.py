@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import asdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database.base import Base
+from app.database.instrumentation import QueryStats, instrument_engine, query_stats
+from app.database.seeds.dataset import SCALES, DatasetScale, generate_dataset, seed_dataset
+from app.repositories.product_repository import ProductRepository
+from app.schemas.order import OrderCreate
+from app.schemas.order_item import OrderItemBase
+from app.services.category_service import CategoryService
+from app.services.order.order_service import OrderService
+from app.utils.benchmark import summarize_latencies
+
+# Latency statistics compared against the baseline
+COMPARED = ("p50_ms", "p95_ms")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Time repository and service operations on a deterministic dataset, optionally against a baseline"
+    )
+    parser.add_argument("--database-url", default=settings.BENCH_DATABASE_URL,
+                        help="Database to run in; its tables are dropped and recreated")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Dataset size preset")
+    for name in ("users", "categories", "products", "orders", "items-per-order"):
+        parser.add_argument(f"--{name}", type=int, default=None, help=f"Override the preset's {name.replace('-', ' ')}")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset and workload random seed")
+    parser.add_argument("--iterations", type=int, default=200, help="Runs of each operation")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed runs of each operation first")
+    parser.add_argument("--operations", default="", help="Comma separated subset of operations to run")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the data already in the database")
+    parser.add_argument("--baseline", default=None, help="Compare against this earlier report")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against the baseline before failing, 0.2 = 20%%")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout")
+    return parser
+
+
+def build_scale(args: argparse.Namespace) -> DatasetScale:
+    scale = {**SCALES[args.scale]}
+    for name in scale:
+        value = getattr(args, name)
+        if value is not None:
+            scale[name] = value
+    return DatasetScale(**scale)
+
+
+def build_operations(scale: DatasetScale, rng: random.Random) -> Dict[str, Callable[[AsyncSession], Awaitable[Any]]]:
+    """Operation name -> coroutine running it once on a fresh session."""
+    sku_counter = iter(range(10 ** 9))
+    # Created rows must not collide with those of earlier runs on the same data
+    run_id = f"{time.time_ns():x}"
+    words = ("laptop", "chair", "coffee", "nova", "prime", "urban")
+
+    async def product_get_all(db):
+        skip = rng.randrange(max(1, scale.products - 100))
+        return await ProductRepository(db).get_all(filters={"is_active": True}, sort_by="price", skip=skip, limit=100)
+
+    async def product_count(db):
+        return await ProductRepository(db).count(filters={"is_active": True})
+
+    async def product_search(db):
+        return await ProductRepository(db).search(rng.choice(words), ["name", "description"], limit=20)
+
+    async def product_create(db):
+        n = next(sku_counter)
+        return await ProductRepository(db).create({
+            "name": f"Bench product {n}",
+            "description": "Created by the benchmark",
+            "price": 9.99,
+            "stock": 10,
+            "sku": f"BENCH-{run_id}-{n}",
+            "category_id": rng.randint(1, scale.categories) if scale.categories else None,
+        })
+
+    async def order_create(db):
+        items = [
+            OrderItemBase(product_id=rng.randint(1, scale.products), quantity=rng.randint(1, 3), price=10.0)
+            for _ in range(scale.items_per_order)
+        ]
+        order = OrderCreate(total=sum(item.price * item.quantity for item in items), items=items)
+        return await OrderService(db).create_order(order, rng.randint(1, scale.users))
+
+    async def category_tree(db):
+        return await CategoryService(db).get_category_tree()
+
+    return {
+        "product_get_all": product_get_all,
+        "product_count": product_count,
+        "product_search": product_search,
+        "product_create": product_create,
+        "order_create": order_create,
+        "category_tree": category_tree,
+    }
+
+
+async def time_operation(session_factory, operation, iterations: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        async with session_factory() as db:
+            await operation(db)
+    latencies_ms: List[float] = []
+    queries = 0
+    for _ in range(iterations):
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        try:
+            async with session_factory() as db:
+                started = time.perf_counter()
+                await operation(db)
+                latencies_ms.append((time.perf_counter() - started) * 1000)
+        finally:
+            query_stats.reset(token)
+        queries += stats.count
+    return {**summarize_latencies(latencies_ms), "queries_per_op": round(queries / iterations, 2) if iterations else 0}
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """Ratio of each compared statistic to the baseline; ratios above 1 + tolerance are regressions."""
+    comparison, regressions = {}, []
+    for name, result in report["operations"].items():
+        previous = baseline.get("operations", {}).get(name)
+        if not previous:
+            continue
+        ratios = {}
+        for stat in COMPARED:
+            if previous.get(stat):
+                ratios[stat] = round(result[stat] / previous[stat], 3)
+                if ratios[stat] > 1 + tolerance:
+                    regressions.append(f"{name} {stat}: {previous[stat]}ms -> {result[stat]}ms")
+        if previous.get("queries_per_op") is not None and result["queries_per_op"] > previous["queries_per_op"]:
+            regressions.append(f"{name} queries per op: {previous['queries_per_op']} -> {result['queries_per_op']}")
+        comparison[name] = ratios
+    summary = {"tolerance": tolerance, "ratios": comparison, "regressions": regressions}
+    if baseline.get("dataset") != report["dataset"]:
+        summary["warning"] = "baseline was taken on a different dataset"
+    return summary
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    scale = build_scale(args)
+    engine = create_async_engine(args.database_url, pool_size=2)
+    instrument_engine(engine)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    try:
+        if not args.skip_seed:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+                await conn.run_sync(ENUM("admin", "customer", "staff", name="userrole").create, checkfirst=True)
+                await conn.run_sync(Base.metadata.create_all)
+            started = time.perf_counter()
+            async with session_factory() as db:
+                await seed_dataset(db, generate_dataset(scale, seed=args.seed))
+            seed_s = time.perf_counter() - started
+        else:
+            seed_s = 0.0
+
+        rng = random.Random(args.seed)
+        operations = build_operations(scale, rng)
+        selected = [name.strip() for name in args.operations.split(",") if name.strip()] or list(operations)
+        results = {}
+        for name in selected:
+            results[name] = await time_operation(session_factory, operations[name], args.iterations, args.warmup)
+    finally:
+        await engine.dispose()
+
+    return {
+        "config": {"iterations": args.iterations, "warmup": args.warmup, "seed": args.seed},
+        "dataset": asdict(scale),
+        "seed_s": round(seed_s, 3),
+        "operations": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["baseline"] = compare(report, json.load(f), args.tolerance)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    if report.get("baseline", {}).get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.utils.logger import logger
+
+STAT_FIELDS = ("fetched", "processed", "failed", "retried", "dead_lettered", "commits", "rebalances")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Run the order event consumer in several processes of one consumer group"
+    )
+    parser.add_argument("--processes", type=int, default=settings.KAFKA_CONSUMER_PROCESSES,
+                        help="Consumer processes, 0 = one per core, capped at the topic's partition count")
+    parser.add_argument("--workers", type=int, default=settings.KAFKA_CONSUMER_WORKERS,
+                        help="Concurrent handlers per process")
+    parser.add_argument("--db-pool-size", type=int, default=settings.KAFKA_CONSUMER_DB_POOL_SIZE,
+                        help="Database connections per process, 0 = one per worker")
+    parser.add_argument("--stats-interval", type=float, default=10, help="Seconds between stats reports")
+    parser.add_argument("--max-restarts", type=int, default=10,
+                        help="Give up when a process crashed this many times within --restart-window")
+    parser.add_argument("--restart-window", type=float, default=300, help="Seconds")
+    parser.add_argument("--shutdown-timeout", type=float, default=settings.KAFKA_SHUTDOWN_TIMEOUT_S + 5,
+                        help="Seconds to wait for processes to drain and commit on shutdown")
+    return parser
+
+
+async def topic_partitions(topic: str) -> int:
+    from app.kafka.transport import create_producer
+    producer = create_producer()
+    await producer.start()
+    try:
+        return len(await producer.partitions_for(topic) or ())
+    finally:
+        await producer.stop()
+
+
+def run_worker(slot: int, stats_queue, workers: int, db_pool_size: int, stats_interval: float) -> None:
+    """Entry point of a consumer process."""
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [consumer-{slot}] %(levelname)s %(message)s")
+    # Settings are read at import time, so size the DB pool before the app modules load
+    settings.KAFKA_CONSUMER_WORKERS = workers
+    settings.DB_POOL_SIZE = db_pool_size or workers
+    settings.DB_MAX_OVERFLOW = 0
+    asyncio.run(consume(slot, stats_queue, stats_interval))
+
+
+async def consume(slot: int, stats_queue, stats_interval: float) -> None:
+    from app.database.connection import engine
+    from app.kafka.consumer.order_consumer import kafka_consumer
+    from app.kafka.producer import kafka_producer
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, kafka_consumer.stop)
+
+    def report() -> None:
+        if kafka_consumer.engine is not None:
+            stats_queue.put((slot, os.getpid(), kafka_consumer.engine.stats.as_dict()))
+
+    # The producer publishes to the DLQ
+    await kafka_producer.start([settings.KAFKA_ORDER_DLQ_TOPIC])
+    task = asyncio.create_task(kafka_consumer.consume_orders())
+    try:
+        while not task.done():
+            await asyncio.wait([task], timeout=stats_interval)
+            report()
+        task.result()
+    finally:
+        report()
+        await kafka_producer.close(timeout=settings.KAFKA_SHUTDOWN_TIMEOUT_S)
+        await engine.dispose()
+
+
+class ConsumerSupervisor:
+    """
+    Keeps N consumer processes running and aggregates their stats.
+
+    Processes are spawned, not forked, so each one gets a fresh event loop,
+    Kafka client and DB pool. A process that exits unexpectedly is restarted
+    with a growing delay; the group rebalances its partitions meanwhile. On
+    SIGINT/SIGTERM every process is asked to drain and commit before exiting.
+    """
+
+    def __init__(self, args: argparse.Namespace, processes: int):
+        self.args = args
+        self.processes = processes
+        self.context = multiprocessing.get_context("spawn")
+        self.stats_queue = self.context.Queue()
+        self.slots: List[Optional[multiprocessing.Process]] = [None] * processes
+        self.restarts: List[List[float]] = [[] for _ in range(processes)]
+        self.restart_at: List[float] = [0.0] * processes
+        # Latest report of every process, restarted ones included; each report is cumulative
+        self.reports: Dict[int, Dict[str, Any]] = {}
+        self.stopping = False
+
+    def start_slot(self, slot: int) -> None:
+        process = self.context.Process(
+            target=run_worker,
+            args=(slot, self.stats_queue, self.args.workers, self.args.db_pool_size, self.args.stats_interval),
+            name=f"order-consumer-{slot}",
+        )
+        process.start()
+        self.slots[slot] = process
+        logger.info(f"Started consumer process {slot} (pid {process.pid})")
+
+    def collect_stats(self) -> None:
+        while True:
+            try:
+                slot, pid, stats = self.stats_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.reports[pid] = stats
+
+    def totals(self) -> Dict[str, Any]:
+        totals: Dict[str, Any] = dict.fromkeys(STAT_FIELDS, 0)
+        for stats in self.reports.values():
+            for name in STAT_FIELDS:
+                totals[name] += stats[name]
+        totals["processes"] = sum(1 for process in self.slots if process is not None and process.is_alive())
+        return totals
+
+    def check_processes(self) -> None:
+        now = time.monotonic()
+        for slot, process in enumerate(self.slots):
+            if process is None:
+                if now >= self.restart_at[slot]:
+                    self.start_slot(slot)
+                continue
+            if process.is_alive():
+                continue
+            process.join()
+            self.slots[slot] = None
+            logger.error(f"Consumer process {slot} (pid {process.pid}) exited with code {process.exitcode}")
+            window = [t for t in self.restarts[slot] if now - t < self.args.restart_window]
+            window.append(now)
+            self.restarts[slot] = window
+            if len(window) > self.args.max_restarts:
+                raise RuntimeError(f"Consumer process {slot} crashed {len(window)} times, giving up")
+            self.restart_at[slot] = now + min(30.0, 2 ** (len(window) - 1))
+
+    def request_stop(self) -> None:
+        self.stopping = True
+
+    def shutdown(self) -> None:
+        for process in self.slots:
+            if process is not None and process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.args.shutdown_timeout
+        running = [process for process in self.slots if process is not None]
+        # Keep reading stats while waiting: a process exits only once its queued reports are flushed
+        while any(process.is_alive() for process in running) and time.monotonic() < deadline:
+            self.collect_stats()
+            time.sleep(0.1)
+        for process in running:
+            if process.is_alive():
+                logger.warning(f"Consumer process {process.name} did not stop in time, killing it")
+                process.kill()
+            process.join()
+        self.collect_stats()
+
+    def run(self) -> Dict[str, Any]:
+        signal.signal(signal.SIGINT, lambda *_: self.request_stop())
+        signal.signal(signal.SIGTERM, lambda *_: self.request_stop())
+        started = time.monotonic()
+        last_report, last_processed = started, 0
+        try:
+            for slot in range(self.processes):
+                self.start_slot(slot)
+            while not self.stopping:
+                time.sleep(0.5)
+                self.collect_stats()
+                self.check_processes()
+                now = time.monotonic()
+                if now - last_report >= self.args.stats_interval:
+                    totals = self.totals()
+                    rate = (totals["processed"] - last_processed) / (now - last_report)
+                    logger.info(f"Order consumers: {totals}, {rate:.1f} records/s")
+                    last_report, last_processed = now, totals["processed"]
+        finally:
+            self.shutdown()
+        totals = self.totals()
+        elapsed = time.monotonic() - started
+        totals["elapsed_s"] = round(elapsed, 3)
+        totals["throughput"] = round(totals["processed"] / elapsed, 2) if elapsed else 0
+        return totals
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [supervisor] %(levelname)s %(message)s")
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if settings.KAFKA_TRANSPORT == "memory":
+        parser.error("the in-memory transport cannot be shared between processes, use KAFKA_TRANSPORT=aiokafka")
+    processes = args.processes
+    partitions = asyncio.run(topic_partitions(settings.KAFKA_ORDER_TOPIC))
+    if processes <= 0:
+        processes = os.cpu_count() or 1
+    if partitions and processes > partitions:
+        # Members beyond the partition count would sit idle in the group
+        logger.warning(f"{settings.KAFKA_ORDER_TOPIC} has {partitions} partitions, running {partitions} processes")
+        processes = partitions
+    totals = ConsumerSupervisor(args, processes).run()
+    logger.info(f"Order consumers stopped: {totals}")
+
+
+if __name__ == "__main__":
+    main()
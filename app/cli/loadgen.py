@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.database.seeds.dataset import DATASET_PASSWORD
+from app.utils.benchmark import summarize_latencies
+
+API = settings.API_V1_STR
+SEARCH_TERMS = ("laptop", "chair", "coffee", "nova", "prime", "urban", "watch", "lamp")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Drive scripted user journeys against the API and report throughput and latency per endpoint"
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default=None,
+                        help="Server to load over TCP, e.g. http://127.0.0.1:8000; default runs app.main:app in-process")
+    target.add_argument("--uds", default=None, help="Unix socket of a server started with uvicorn --uds")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which the users are started")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run after the first user starts")
+    parser.add_argument("--think-time", type=float, default=0.5,
+                        help="Mean pause between steps in seconds, exponentially distributed; 0 for none")
+    parser.add_argument("--mix", default="browse=3,purchase=1", help="Journey weights, name=weight,...")
+    parser.add_argument("--email", default="user1@example.com",
+                        help="Login of the virtual users; the product and order endpoints need an admin")
+    parser.add_argument("--password", default=DATASET_PASSWORD)
+    parser.add_argument("--keep-rate-limit", action="store_true",
+                        help="In-process only: keep rate limiting on, all virtual users share one client address")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for journey choice and think times")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout")
+    return parser
+
+
+class LoadStats:
+    """Latencies and outcomes per endpoint, keyed by method and route template."""
+
+    def __init__(self):
+        self.latencies_ms: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.journeys: Counter = Counter()
+        self.failed_journeys: Counter = Counter()
+
+    def record(self, endpoint: str, status: str, ms: float) -> None:
+        self.latencies_ms[endpoint].append(ms)
+        self.statuses[endpoint][status] += 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint in sorted(self.latencies_ms):
+            statuses = self.statuses[endpoint]
+            errors = sum(n for status, n in statuses.items() if not status.startswith(("2", "3")))
+            endpoints[endpoint] = {
+                "throughput_per_s": round(len(self.latencies_ms[endpoint]) / elapsed, 2) if elapsed else 0,
+                "errors": errors,
+                "statuses": dict(statuses),
+                "latency": summarize_latencies(self.latencies_ms[endpoint]),
+            }
+        everything = [ms for values in self.latencies_ms.values() for ms in values]
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": len(everything),
+            "throughput_per_s": round(len(everything) / elapsed, 2) if elapsed else 0,
+            "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+            "latency": summarize_latencies(everything),
+            "journeys": dict(self.journeys),
+            "failed_journeys": dict(self.failed_journeys),
+            "endpoints": endpoints,
+        }
+
+
+class JourneyFailed(Exception):
+    pass
+
+
+class VirtualUser:
+    """One simulated client, walking journeys step by step with think time in between."""
+
+    def __init__(self, client: httpx.AsyncClient, stats: LoadStats, args: argparse.Namespace, rng: random.Random):
+        self.client = client
+        self.stats = stats
+        self.args = args
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> Any:
+        """Send one request, recorded under `endpoint`; a failed step ends the journey."""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.record(endpoint, type(e).__name__, (time.perf_counter() - started) * 1000)
+            raise JourneyFailed(endpoint) from e
+        self.stats.record(endpoint, str(response.status_code), (time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise JourneyFailed(endpoint)
+        return response.json()
+
+    async def think(self) -> None:
+        if self.args.think_time > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think_time))
+
+    async def login(self) -> None:
+        self.headers = {}
+        tokens = await self.request(
+            "POST /auth/login", "POST", f"{API}/auth/login",
+            json={"email": self.args.email, "password": self.args.password}
+        )
+        self.headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    async def browse_products(self) -> List[Dict[str, Any]]:
+        page = await self.request(
+            "GET /products", "GET", f"{API}/products/",
+            params={"page": self.rng.randint(1, 5), "size": 20, "is_active": True}
+        )
+        return page["items"]
+
+    async def search(self) -> List[Dict[str, Any]]:
+        return await self.request(
+            "GET /products/search", "GET", f"{API}/products/search",
+            params={"search_term": self.rng.choice(SEARCH_TERMS)}
+        )
+
+    async def view_product(self, products: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if not products:
+            raise JourneyFailed("no products to view")
+        product_id = self.rng.choice(products)["id"]
+        return await self.request("GET /products/{product_id}", "GET", f"{API}/products/{product_id}")
+
+    async def create_order(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        quantity = self.rng.randint(1, 3)
+        return await self.request(
+            "POST /orders", "POST", f"{API}/orders/",
+            json={
+                "total": round(product["price"] * quantity, 2),
+                "items": [{"product_id": product["id"], "quantity": quantity, "price": product["price"]}],
+            }
+        )
+
+    async def browse(self) -> None:
+        await self.login()
+        await self.think()
+        products = await self.browse_products()
+        await self.think()
+        products = await self.search() or products
+        await self.think()
+        await self.view_product(products)
+
+    async def purchase(self) -> None:
+        await self.login()
+        await self.think()
+        products = await self.browse_products()
+        await self.think()
+        product = await self.view_product(products)
+        await self.think()
+        await self.create_order(product)
+
+    async def run(self, journeys: List[Tuple[str, int]], deadline: float) -> None:
+        names, weights = zip(*journeys)
+        while time.monotonic() < deadline:
+            name = self.rng.choices(names, weights)[0]
+            try:
+                await getattr(self, name)()
+            except JourneyFailed:
+                self.stats.failed_journeys[name] += 1
+            else:
+                self.stats.journeys[name] += 1
+            await self.think()
+
+
+def parse_mix(mix: str) -> List[Tuple[str, int]]:
+    journeys = []
+    for part in mix.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in ("browse", "purchase"):
+            raise SystemExit(f"Unknown journey {name!r}, expected browse or purchase")
+        journeys.append((name, int(weight or 1)))
+    return journeys
+
+
+async def open_client(stack: AsyncExitStack, args: argparse.Namespace) -> httpx.AsyncClient:
+    """Client for the target, starting the app in-process when no server is given."""
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    if args.base_url:
+        return await stack.enter_async_context(
+            httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout)
+        )
+    if args.uds:
+        transport = httpx.AsyncHTTPTransport(uds=args.uds, limits=limits)
+        return await stack.enter_async_context(
+            httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=args.timeout)
+        )
+    if not args.keep_rate_limit:
+        # Middleware is added when app.main is imported, so this has to come first
+        settings.RATE_LIMIT_ENABLED = False
+    from app.main import app
+    # ASGITransport does not run the lifespan: start the pools, producer and logging here
+    await stack.enter_async_context(app.router.lifespan_context(app))
+    return await stack.enter_async_context(
+        httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver", timeout=args.timeout)
+    )
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    journeys = parse_mix(args.mix)
+    stats = LoadStats()
+    rng = random.Random(args.seed)
+
+    async with AsyncExitStack() as stack:
+        client = await open_client(stack, args)
+        started = time.monotonic()
+        deadline = started + args.duration
+
+        async def start_user(i: int) -> None:
+            await asyncio.sleep(args.ramp_up * i / args.users)
+            user = VirtualUser(client, stats, args, random.Random(rng.random()))
+            await user.run(journeys, deadline)
+
+        await asyncio.gather(*(start_user(i) for i in range(args.users)))
+        elapsed = time.monotonic() - started
+
+    return {
+        "config": {
+            "target": args.base_url or (f"unix:{args.uds}" if args.uds else "in-process"),
+            "users": args.users,
+            "ramp_up_s": args.ramp_up,
+            "duration_s": args.duration,
+            "think_time_s": args.think_time,
+            "mix": dict(journeys),
+        },
+        **stats.report(elapsed),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(run_load(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
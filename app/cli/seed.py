@@ -1,5 +1,11 @@
+import argparse
 import asyncio
+import json
+from dataclasses import asdict
+from app.core.config import settings
 from app.database.connection import get_db
+from app.database.seeds.bulk import BulkDataset, bulk_seed
+from app.database.seeds.dataset import SCALES, DatasetScale
 from app.database.seeds.seeder import Seeder
 
 async def run_seeder():
@@ -20,5 +26,37 @@ async def run_seeder():
         # Cleanup if needed
         pass
 
+
+async def run_bulk_seeder(args: argparse.Namespace):
+    scale = {**SCALES[args.scale]}
+    for name in scale:
+        value = getattr(args, name)
+        if value is not None:
+            scale[name] = value
+    dataset = BulkDataset(DatasetScale(**scale), seed=args.seed, zipf=args.zipf)
+    print(f"🌱 Bulk seeding {json.dumps(asdict(dataset.scale))}")
+    timings = await bulk_seed(
+        args.database_url, dataset, truncate=args.truncate, maintenance_work_mem=args.maintenance_work_mem,
+        log=print
+    )
+    print(f"✅ Seeding completed {json.dumps(timings)}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Seed the database with sample data")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Load a generated production-scale dataset with COPY instead of the sample rows")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL, help="Bulk only: database to load")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="xlarge", help="Bulk only: dataset size preset")
+    for name in ("users", "categories", "products", "orders", "items-per-order"):
+        parser.add_argument(f"--{name}", type=int, default=None, help=f"Bulk only: override the preset's {name.replace('-', ' ')}")
+    parser.add_argument("--seed", type=int, default=42, help="Bulk only: dataset random seed")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Bulk only: skew of product popularity in orders")
+    parser.add_argument("--truncate", action="store_true", help="Bulk only: empty the tables first, reviews and revoked_tokens included")
+    parser.add_argument("--maintenance-work-mem", default="512MB", help="Bulk only: memory for the index rebuilds")
+    return parser
+
+
 if __name__ == "__main__":
-    asyncio.run(run_seeder())
\ No newline at end of file
+    args = build_parser().parse_args()
+    asyncio.run(run_bulk_seeder(args) if args.bulk else run_seeder())
@@ -2,6 +2,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.database.instrumentation import instrument_engine
 from sqlalchemy.ext.declarative import declarative_base
 from app.models import *
 
@@ -9,9 +10,14 @@ from app.models import *
 engine = create_async_engine(
     settings.DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://'),
     echo=settings.DEBUG,
-    future=True
+    future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW
 )
 
+if settings.DB_QUERY_STATS_ENABLED:
+    instrument_engine(engine)
+
 Base = declarative_base()
 
 # Create async session factory
@@ -0,0 +1,105 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from sqlalchemy import event
+from app.core.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import registry
+
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Duration of SQL statements",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+db_slow_queries = registry.counter("db_slow_queries_total", "SQL statements slower than DB_SLOW_QUERY_MS")
+
+# Bind parameter placeholders, and lists of them as rendered for IN (...)
+_PLACEHOLDERS = re.compile(r"(?:\$\d+|%\(\w+\)s|\?|:\w+)(?:\s*,\s*(?:\$\d+|%\(\w+\)s|\?|:\w+))*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with placeholders and IN lists collapsed, so repeats of one query compare equal."""
+    return _WHITESPACE.sub(" ", _PLACEHOLDERS.sub("?", statement)).strip()
+
+
+def redact(parameters: Any) -> Any:
+    """Parameter types instead of values, so logs never carry user data or password hashes."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany
+            return [redact(parameters[0]), f"... {len(parameters)} rows"]
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+@dataclass
+class QueryStats:
+    """SQL statements run on behalf of one request."""
+    count: int = 0
+    total_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_statement: Optional[str] = None
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int):
+        """Statement shapes run more than `threshold` times: likely N+1 queries."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+# Stats of the request being handled, set by QueryStatsMiddleware. SQLAlchemy
+# runs the async driver in a greenlet that shares the task's context, so the
+# cursor events below see the request that issued the statement.
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    elapsed_ms = elapsed * 1000
+    db_query_duration.observe((), elapsed)
+    stats = query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    if elapsed_ms >= settings.DB_SLOW_QUERY_MS:
+        db_slow_queries.inc()
+        logger.warning(
+            "Slow query %.1fms: %s params=%s",
+            elapsed_ms,
+            _WHITESPACE.sub(" ", statement),
+            redact(parameters),
+            extra={"duration_ms": round(elapsed_ms, 2)},
+        )
+
+
+def _handle_error(exception_context):
+    # The statement failed, after_cursor_execute will not run for it
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement of `engine` (sync or async) and attribute it to the current request."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
@@ -0,0 +1,252 @@
+import math
+import random
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Tuple
+import asyncpg
+from sqlalchemy.engine import make_url
+from app.database.seeds.dataset import DATASET_PASSWORD, NOUNS, WORDS, DatasetScale
+from app.utils.hashing import get_context
+from app.utils.logger import logger
+
+# Columns written per table, in the order the generators yield them
+COLUMNS = {
+    "users": ("id", "email", "password_hash", "first_name", "last_name", "role",
+              "is_active", "is_verified", "created_at", "updated_at"),
+    "categories": ("id", "name", "slug", "description", "parent_id", "is_active", "created_at", "updated_at"),
+    "products": ("id", "name", "description", "price", "stock", "sku", "is_active", "category_id",
+                 "created_at", "updated_at"),
+    "order_items": ("id", "order_id", "product_id", "quantity", "price", "created_at", "updated_at"),
+    "orders": ("id", "user_id", "total", "status", "is_paid", "is_shipped", "created_at", "updated_at"),
+}
+# Foreign keys are dropped for the load, so order_items can come before the
+# orders whose totals they produce
+LOAD_ORDER = ("users", "categories", "products", "order_items", "orders")
+# Not loaded, but they reference the loaded tables, so --truncate empties them too
+DEPENDENT_TABLES = ("reviews", "revoked_tokens")
+
+# Order status mix of a shop with mostly completed orders
+STATUS_WEIGHTS = (("created", 10), ("paid", 10), ("shipped", 15), ("delivered", 55), ("cancelled", 10))
+
+
+def zipf_cum_weights(n: int, exponent: float) -> List[float]:
+    """Cumulative weights of ranks 1..n with P(rank) proportional to 1 / rank ** exponent."""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+
+
+class BulkDataset:
+    """
+    Streams a production-shaped dataset table by table as COPY records.
+
+    Categories form three levels (departments, sections, leaves) and products
+    are filed under the leaves. Product popularity follows a Zipf law over a
+    shuffled ranking, so a few products appear in most orders, as in a real
+    catalog; the order items per order vary around `items_per_order`. Rows are
+    produced lazily, only per-product prices and popularity and per-order
+    totals are held in memory. Apart from the password salt, output is
+    identical for the same scale and seed.
+    """
+
+    def __init__(self, scale: DatasetScale, seed: int = 42, zipf: float = 1.1, bcrypt_rounds: int = 4):
+        self.scale = scale
+        self.seed = seed
+        self.zipf = zipf
+        # One hash for every user, bcrypt per row would take hours at this size
+        self.password_hash = get_context(bcrypt_rounds).hash(DATASET_PASSWORD)
+        self.epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.order_totals = array("d", bytes(8 * scale.orders))
+        self._prices = array("d")
+
+    def _rng(self, table: str) -> random.Random:
+        # A generator per table, so each table's rows do not depend on the others being generated
+        return random.Random(f"{self.seed}:{table}")
+
+    def rows(self, table: str) -> Iterator[Tuple[Any, ...]]:
+        return getattr(self, f"_{table}")()
+
+    def _users(self) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("users")
+        for i in range(1, self.scale.users + 1):
+            created_at = self.epoch + timedelta(seconds=i)
+            role = "admin" if i == 1 else "staff" if i % 500 == 0 else "customer"
+            yield (i, f"user{i}@example.com", self.password_hash, rng.choice(WORDS).title(),
+                   rng.choice(NOUNS).title(), role, i % 97 != 0, True, created_at, created_at)
+
+    def _levels(self) -> Tuple[int, int]:
+        """Last id of the departments and of the sections; the ids after them are leaves."""
+        departments = max(1, self.scale.categories // 20)
+        return departments, departments + self.scale.categories // 4
+
+    def _leaves(self) -> range:
+        _, sections = self._levels()
+        if sections >= self.scale.categories:
+            return range(1, self.scale.categories + 1)
+        return range(sections + 1, self.scale.categories + 1)
+
+    def _categories(self) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("categories")
+        departments, sections = self._levels()
+        for i in range(1, self.scale.categories + 1):
+            if i <= departments:
+                parent_id = None
+            elif i <= sections:
+                parent_id = rng.randint(1, departments)
+            else:
+                parent_id = rng.randint(departments + 1, sections)
+            yield (i, f"{rng.choice(WORDS).title()} {rng.choice(NOUNS).title()} {i}", f"category-{i}",
+                   f"Category {i}", parent_id, True, self.epoch, self.epoch)
+
+    def _products(self) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("products")
+        leaves = self._leaves()
+        self._prices = array("d")
+        for i in range(1, self.scale.products + 1):
+            # Log-normal prices: mostly under 100, a long tail up to a few thousand
+            price = round(min(5000.0, max(0.5, math.exp(rng.gauss(3.3, 1.1)))), 2)
+            self._prices.append(price)
+            created_at = self.epoch + timedelta(seconds=i)
+            yield (i, f"{rng.choice(WORDS).title()} {rng.choice(NOUNS)} {i}",
+                   " ".join(rng.choice(WORDS) for _ in range(12)), price, rng.randint(0, 500),
+                   f"SKU-{i:08d}", i % 20 != 0, rng.choice(leaves) if leaves else None, created_at, created_at)
+
+    def _order_items(self) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("order_items")
+        if not self._prices:
+            # Products were not generated in this run, replay them for their prices
+            for _ in self._products():
+                pass
+        product_ids = list(range(1, self.scale.products + 1))
+        rng.shuffle(product_ids)
+        cum_weights = zipf_cum_weights(len(product_ids), self.zipf)
+        most = 2 * self.scale.items_per_order - 1
+        item_id = 0
+        for order_id in range(1, self.scale.orders + 1):
+            created_at = self.order_created_at(order_id)
+            total = 0.0
+            for product_id in rng.choices(product_ids, cum_weights=cum_weights, k=rng.randint(1, most)):
+                item_id += 1
+                quantity = rng.choices((1, 2, 3, 4, 5), (60, 20, 10, 6, 4))[0]
+                price = self._prices[product_id - 1]
+                total += price * quantity
+                yield (item_id, order_id, product_id, quantity, price, created_at, created_at)
+            self.order_totals[order_id - 1] = round(total, 2)
+
+    def _orders(self) -> Iterator[Tuple[Any, ...]]:
+        rng = self._rng("orders")
+        statuses, weights = zip(*STATUS_WEIGHTS)
+        for i in range(1, self.scale.orders + 1):
+            status = rng.choices(statuses, weights)[0]
+            created_at = self.order_created_at(i)
+            # orders.created_at is a naive DateTime column, unlike the other timestamps
+            yield (i, rng.randint(1, self.scale.users), self.order_totals[i - 1], status,
+                   status in ("paid", "shipped", "delivered"), status in ("shipped", "delivered"),
+                   created_at.replace(tzinfo=None), created_at)
+
+    def order_created_at(self, order_id: int) -> datetime:
+        # Spread over a year
+        return self.epoch + timedelta(seconds=order_id * 365 * 86400 // max(1, self.scale.orders))
+
+
+async def _drop_indexes_and_foreign_keys(conn: asyncpg.Connection, tables: List[str]) -> List[str]:
+    """Drop secondary indexes and foreign keys of `tables`; returns the statements recreating them."""
+    indexes = await conn.fetch(
+        """
+        SELECT i.indexrelid::regclass::text AS name, pg_get_indexdef(i.indexrelid) AS definition
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE t.relname = ANY($1::text[]) AND t.relnamespace = current_schema()::regnamespace
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        """,
+        tables
+    )
+    foreign_keys = await conn.fetch(
+        """
+        SELECT c.conrelid::regclass::text AS table_name, c.conname AS name, pg_get_constraintdef(c.oid) AS definition
+        FROM pg_constraint c
+        JOIN pg_class t ON t.oid = c.conrelid
+        WHERE c.contype = 'f' AND t.relname = ANY($1::text[]) AND t.relnamespace = current_schema()::regnamespace
+        """,
+        tables
+    )
+    for fk in foreign_keys:
+        await conn.execute(f'ALTER TABLE {fk["table_name"]} DROP CONSTRAINT "{fk["name"]}"')
+    for index in indexes:
+        await conn.execute(f'DROP INDEX {index["name"]}')
+    # Indexes first, the foreign key checks then use them
+    return [index["definition"] for index in indexes] + [
+        f'ALTER TABLE {fk["table_name"]} ADD CONSTRAINT "{fk["name"]}" {fk["definition"]}' for fk in foreign_keys
+    ]
+
+
+async def bulk_seed(
+    database_url: str,
+    dataset: BulkDataset,
+    truncate: bool = False,
+    maintenance_work_mem: str = "512MB",
+    log=logger.info,
+) -> Dict[str, Any]:
+    """
+    Load a BulkDataset with COPY, in one transaction.
+
+    Secondary indexes and foreign keys are dropped before the load and
+    recreated after it: building an index once over sorted data is much
+    cheaper than maintaining it row by row, and a foreign key is validated in
+    a single join. Primary keys and unique constraints stay. The tables must
+    exist (alembic upgrade head) and be empty, or `truncate` clears them first,
+    together with the DEPENDENT_TABLES that reference them.
+    On any error the transaction rolls back, indexes included.
+    """
+    tables = list(LOAD_ORDER)
+    timings: Dict[str, Any] = {"rows": {}, "copy_s": {}}
+    # asyncpg itself does not know the SQLAlchemy driver suffix
+    dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+    conn = await asyncpg.connect(dsn)
+    try:
+        async with conn.transaction():
+            await conn.execute("SET LOCAL synchronous_commit = off")
+            await conn.execute(f"SET LOCAL maintenance_work_mem = '{maintenance_work_mem}'")
+            if truncate:
+                log(f"Truncating {', '.join(tables + list(DEPENDENT_TABLES))}")
+                # No CASCADE: any other table referencing these fails the load instead of being emptied
+                await conn.execute(f"TRUNCATE {', '.join(tables + list(DEPENDENT_TABLES))} RESTART IDENTITY")
+            else:
+                for table in tables:
+                    if await conn.fetchval(f"SELECT EXISTS (SELECT 1 FROM {table})"):
+                        raise RuntimeError(f"Table {table} is not empty, rerun with --truncate to clear it")
+
+            started = time.perf_counter()
+            recreate = await _drop_indexes_and_foreign_keys(conn, tables)
+
+            for table in tables:
+                log(f"Copying {table}")
+                table_started = time.perf_counter()
+                rows = 0
+
+                def counted(records):
+                    nonlocal rows
+                    for record in records:
+                        rows += 1
+                        yield record
+
+                await conn.copy_records_to_table(table, records=counted(dataset.rows(table)), columns=COLUMNS[table])
+                timings["rows"][table] = rows
+                timings["copy_s"][table] = round(time.perf_counter() - table_started, 3)
+                if rows:
+                    await conn.execute(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), $1)", rows
+                    )
+
+            log(f"Recreating {len(recreate)} indexes and foreign keys")
+            index_started = time.perf_counter()
+            for statement in recreate:
+                await conn.execute(statement)
+            timings["index_s"] = round(time.perf_counter() - index_started, 3)
+        # Fresh statistics, or the planner sees empty tables until autovacuum gets to them
+        log("Analyzing")
+        await conn.execute(f"ANALYZE {', '.join(tables)}")
+        timings["total_s"] = round(time.perf_counter() - started, 3)
+    finally:
+        await conn.close()
+    return timings
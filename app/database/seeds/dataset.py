@@ -0,0 +1,170 @@
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+from app.models.model import Category, Order, OrderItem, OrderStatus, Product, User
+from app.utils.hashing import get_context
+
+# Every seeded user has this password
+DATASET_PASSWORD = "password123"
+
+WORDS = (
+    "alpha", "amber", "arc", "atlas", "aurora", "basic", "bold", "bright", "canyon", "classic",
+    "cobalt", "comet", "compact", "coral", "crystal", "delta", "echo", "elite", "ember", "flex",
+    "forest", "fusion", "glacier", "harbor", "horizon", "indigo", "iron", "jade", "lunar", "maple",
+    "meadow", "metro", "nova", "ocean", "onyx", "orbit", "pixel", "prime", "pulse", "quartz",
+    "river", "sierra", "solar", "sonic", "stellar", "summit", "terra", "urban", "vertex", "vivid",
+)
+NOUNS = (
+    "laptop", "phone", "chair", "desk", "lamp", "jacket", "shirt", "boots", "novel", "guide",
+    "kettle", "blender", "rice", "coffee", "tea", "backpack", "watch", "speaker", "monitor", "keyboard",
+)
+
+SCALES = {
+    "small": dict(users=100, categories=20, products=1000, orders=1000, items_per_order=3),
+    "medium": dict(users=1000, categories=100, products=10000, orders=20000, items_per_order=4),
+    "large": dict(users=10000, categories=500, products=100000, orders=200000, items_per_order=5),
+    # Meant for the COPY loader in bulk.py, about 9 million rows
+    "xlarge": dict(users=200000, categories=2000, products=1000000, orders=2000000, items_per_order=3),
+}
+
+
+@dataclass(frozen=True)
+class DatasetScale:
+    users: int = 100
+    categories: int = 20
+    products: int = 1000
+    orders: int = 1000
+    items_per_order: int = 3
+
+    @classmethod
+    def named(cls, name: str) -> "DatasetScale":
+        return cls(**SCALES[name])
+
+
+def generate_dataset(scale: DatasetScale, seed: int = 42, bcrypt_rounds: int = 4) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Rows for every table, identical for the same scale and seed.
+
+    Ids are assigned here so that rows can reference each other and the
+    dataset can be inserted table by table. The password hash is computed
+    once and shared, bcrypt per user would dominate seeding time; the low
+    default cost is rehashed to BCRYPT_ROUNDS on the user's first login.
+    """
+    rng = random.Random(seed)
+    epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    password_hash = get_context(bcrypt_rounds).hash(DATASET_PASSWORD)
+
+    users = [
+        {
+            "id": i,
+            "email": f"user{i}@example.com",
+            "password_hash": password_hash,
+            "first_name": rng.choice(WORDS).title(),
+            "last_name": rng.choice(NOUNS).title(),
+            "role": "admin" if i == 1 else "staff" if i % 50 == 0 else "customer",
+            "is_active": i % 97 != 0,
+            "is_verified": True,
+            "created_at": epoch,
+            "updated_at": epoch,
+        }
+        for i in range(1, scale.users + 1)
+    ]
+
+    categories = []
+    for i in range(1, scale.categories + 1):
+        # A fifth of the categories are roots, the rest hang under an earlier one
+        parent_id = None if i <= max(1, scale.categories // 5) else rng.randint(1, i - 1)
+        categories.append({
+            "id": i,
+            "name": f"{rng.choice(WORDS).title()} {rng.choice(NOUNS).title()} {i}",
+            "slug": f"category-{i}",
+            "description": f"Category {i}",
+            "parent_id": parent_id,
+            "is_active": True,
+            "created_at": epoch,
+            "updated_at": epoch,
+        })
+
+    products = [
+        {
+            "id": i,
+            "name": f"{rng.choice(WORDS).title()} {rng.choice(NOUNS)} {i}",
+            "description": " ".join(rng.choice(WORDS) for _ in range(12)),
+            "price": round(rng.uniform(1, 2000), 2),
+            "stock": rng.randint(0, 500),
+            "sku": f"SKU-{i:08d}",
+            "is_active": i % 20 != 0,
+            "category_id": rng.randint(1, scale.categories) if scale.categories else None,
+            "created_at": epoch,
+            "updated_at": epoch,
+        }
+        for i in range(1, scale.products + 1)
+    ]
+
+    statuses = [status.value for status in OrderStatus]
+    orders, order_items = [], []
+    for i in range(1, scale.orders + 1):
+        created_at = epoch + timedelta(minutes=i)
+        status = rng.choice(statuses)
+        items = []
+        for _ in range(scale.items_per_order):
+            product = products[rng.randrange(scale.products)]
+            items.append({
+                "id": len(order_items) + len(items) + 1,
+                "order_id": i,
+                "product_id": product["id"],
+                "quantity": rng.randint(1, 5),
+                "price": product["price"],
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+        order_items.extend(items)
+        orders.append({
+            "id": i,
+            "user_id": rng.randint(1, scale.users),
+            "total": round(sum(item["price"] * item["quantity"] for item in items), 2),
+            "status": status,
+            "is_paid": status in ("paid", "shipped", "delivered"),
+            "is_shipped": status in ("shipped", "delivered"),
+            # orders.created_at is a naive DateTime column, asyncpg rejects aware values for it
+            "created_at": created_at.replace(tzinfo=None),
+            "updated_at": created_at,
+        })
+
+    return {
+        "users": users,
+        "categories": categories,
+        "products": products,
+        "orders": orders,
+        "order_items": order_items,
+    }
+
+
+# Insert order, parents first
+TABLES = (
+    ("users", User),
+    ("categories", Category),
+    ("products", Product),
+    ("orders", Order),
+    ("order_items", OrderItem),
+)
+
+
+async def seed_dataset(db: Session, dataset: Dict[str, List[Dict[str, Any]]], chunk_size: int = 5000) -> Dict[str, int]:
+    """Insert a generated dataset with multi-row inserts and move the id sequences past it."""
+    counts = {}
+    for name, model in TABLES:
+        rows = dataset[name]
+        for start in range(0, len(rows), chunk_size):
+            await db.execute(insert(model), rows[start:start + chunk_size])
+        if rows:
+            await db.execute(
+                text(f"SELECT setval(pg_get_serial_sequence('{model.__tablename__}', 'id'), :value)"),
+                {"value": max(row["id"] for row in rows)}
+            )
+        counts[name] = len(rows)
+    await db.commit()
+    return counts
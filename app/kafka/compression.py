@@ -0,0 +1,157 @@
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from aiokafka import codec
+
+# Codec name -> (availability check, encode, decode)
+CODECS: Dict[str, Tuple[Callable[[], bool], Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "gzip": (codec.has_gzip, codec.gzip_encode, codec.gzip_decode),
+    "snappy": (codec.has_snappy, codec.snappy_encode, codec.snappy_decode),
+    "lz4": (codec.has_lz4, codec.lz4_encode, codec.lz4_decode),
+    "zstd": (codec.has_zstd, codec.zstd_encode, codec.zstd_decode),
+}
+# Cheapest CPU per byte first; auto mode picks the first one installed
+AUTO_PREFERENCE = ("lz4", "zstd", "snappy", "gzip")
+
+
+def available_codecs() -> List[str]:
+    """Compression types usable in this environment, "none" included."""
+    return ["none"] + [name for name, (available, _, _) in CODECS.items() if available()]
+
+
+def validate_codec(name: str) -> str:
+    if name in ("none", "auto"):
+        return name
+    if name not in CODECS:
+        raise ValueError(f"Unknown compression type {name!r}, expected none, auto or one of {sorted(CODECS)}")
+    if not CODECS[name][0]():
+        raise ValueError(f"Compression type {name!r} is not installed (install aiokafka[{name}])")
+    return name
+
+
+def parse_topic_codecs(spec: str) -> Dict[str, str]:
+    """Parse "topic=codec,other-topic=auto" into a mapping."""
+    codecs = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        topic, _, name = item.partition("=")
+        codecs[topic.strip()] = validate_codec(name.strip())
+    return codecs
+
+
+class CompressionSelector:
+    """
+    Chooses the compression type for each send.
+
+    Topics use their configured codec, or the default one. In "auto" mode the
+    choice follows the size of the batches the client actually builds, which
+    is what the codec compresses: the bytes sent to a topic within one linger
+    window (capped at the client's max batch size), smoothed with an
+    exponential moving average over windows. Small batches go uncompressed,
+    since codec framing and CPU outweigh the savings, and larger ones use the
+    cheapest installed codec. A hysteresis band keeps a topic from flapping
+    between the two.
+    """
+
+    def __init__(
+        self,
+        default: str = "auto",
+        topics: Optional[Dict[str, str]] = None,
+        auto_min_batch_bytes: int = 4096,
+        smoothing: float = 0.2,
+        window_s: float = 0.1,
+        max_batch_bytes: int = 16384,
+    ):
+        self.default = validate_codec(default)
+        self.topics = topics or {}
+        self.auto_min_batch_bytes = auto_min_batch_bytes
+        self.smoothing = smoothing
+        self.window_s = window_s
+        self.max_batch_bytes = max_batch_bytes
+        self.auto_codec = next(
+            (name for name in AUTO_PREFERENCE if CODECS[name][0]()), "none"
+        )
+        self._average: Dict[str, float] = {}
+        self._current: Dict[str, str] = {}
+        # topic -> [window start, bytes sent in the window]
+        self._windows: Dict[str, List[float]] = {}
+
+    def configured(self, topic: str) -> str:
+        return self.topics.get(topic, self.default)
+
+    def select(self, topic: str, nbytes: int, now: Optional[float] = None) -> str:
+        """Codec for a send of `nbytes` to `topic`."""
+        name = self.configured(topic)
+        if name != "auto":
+            return name
+        now = time.monotonic() if now is None else now
+        window = self._windows.get(topic)
+        if window is None or now - window[0] >= self.window_s:
+            if window is not None:
+                self._observe(topic, min(window[1], self.max_batch_bytes))
+            window = self._windows[topic] = [now, 0]
+        window[1] += nbytes
+        return self._current.get(topic, "none")
+
+    def _observe(self, topic: str, batch_bytes: float) -> None:
+        """Fold the batch size of a finished window into the average and re-pick the codec."""
+        average = self._average.get(topic)
+        average = batch_bytes if average is None else average + self.smoothing * (batch_bytes - average)
+        self._average[topic] = average
+        current = self._current.get(topic)
+        if current is None:
+            current = "none" if average < self.auto_min_batch_bytes else self.auto_codec
+        elif current == "none" and average >= 2 * self.auto_min_batch_bytes:
+            current = self.auto_codec
+        elif current != "none" and average < self.auto_min_batch_bytes / 2:
+            current = "none"
+        self._current[topic] = current
+
+    def observed(self) -> Dict[str, Dict[str, float]]:
+        return {
+            topic: {"avg_batch_bytes": round(average, 1), "codec": self._current.get(topic, "none")}
+            for topic, average in self._average.items()
+        }
+
+
+def compare_codecs(
+    batches: Sequence[Sequence[bytes]],
+    codecs: Optional[Sequence[str]] = None,
+    rounds: int = 3,
+) -> List[Dict[str, float]]:
+    """
+    Compress sample record batches with every codec and report CPU time and wire size.
+
+    Records of a batch are compressed together, as the producer does. CPU time
+    is process time, best of `rounds`, so it excludes time the process was
+    descheduled.
+    """
+    payloads = [b"".join(batch) for batch in batches]
+    raw_bytes = sum(len(payload) for payload in payloads)
+    records = sum(len(batch) for batch in batches)
+    results = []
+    for name in codecs or available_codecs():
+        if name == "none":
+            encode = decode = lambda payload: payload
+        else:
+            _, encode, decode = CODECS[validate_codec(name)]
+        compress_s = decompress_s = float("inf")
+        for _ in range(rounds):
+            started = time.process_time()
+            compressed = [encode(payload) for payload in payloads]
+            compress_s = min(compress_s, time.process_time() - started)
+            started = time.process_time()
+            for payload in compressed:
+                decode(payload)
+            decompress_s = min(decompress_s, time.process_time() - started)
+        wire_bytes = sum(len(payload) for payload in compressed)
+        results.append({
+            "codec": name,
+            "records": records,
+            "batches": len(payloads),
+            "raw_bytes": raw_bytes,
+            "wire_bytes": wire_bytes,
+            "ratio": round(raw_bytes / wire_bytes, 3) if wire_bytes else 0,
+            "compress_cpu_us_per_record": round(compress_s / records * 1e6, 3) if records else 0,
+            "decompress_cpu_us_per_record": round(decompress_s / records * 1e6, 3) if records else 0,
+            "compress_mb_per_cpu_s": round(raw_bytes / compress_s / 1e6, 1) if compress_s else 0,
+        })
+    return results
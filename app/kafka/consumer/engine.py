@@ -0,0 +1,429 @@
+import asyncio
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Set
+from aiokafka import AIOKafkaConsumer, ConsumerRebalanceListener, ConsumerRecord, TopicPartition
+from app.kafka.consumer.retry import DelayedRetryQueue, FailedRecord, RetryPolicy
+from app.utils.logger import logger
+
+Handler = Callable[[Any], Awaitable[None]]
+BatchHandler = Callable[[List[Any]], Awaitable[None]]
+KeyFunc = Callable[[ConsumerRecord], Optional[Hashable]]
+DeadLetterSink = Callable[[FailedRecord, BaseException], Awaitable[None]]
+
+
+def order_key(record: ConsumerRecord) -> Optional[Hashable]:
+    """Ordering key of an order event: its order_id, falling back to the message key."""
+    if isinstance(record.value, dict) and record.value.get("order_id") is not None:
+        return record.value["order_id"]
+    return record.key
+
+
+class PartitionOffsetTracker:
+    """
+    Tracks in-flight offsets of one partition.
+
+    Records finish out of order across workers, so the committable position is
+    the lowest offset that is not yet fully processed: everything below it is done.
+    """
+
+    def __init__(self):
+        self._pending: Deque[int] = deque()
+        self._done: Set[int] = set()
+        self.committable: Optional[int] = None
+        self.committed: Optional[int] = None
+
+    def add(self, offset: int) -> None:
+        self._pending.append(offset)
+
+    def complete(self, offset: int) -> None:
+        self._done.add(offset)
+        while self._pending and self._pending[0] in self._done:
+            head = self._pending.popleft()
+            self._done.discard(head)
+            self.committable = head + 1
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    @property
+    def needs_commit(self) -> bool:
+        return self.committable is not None and self.committable != self.committed
+
+
+@dataclass
+class EngineStats:
+    fetched: int = 0
+    processed: int = 0
+    failed: int = 0
+    retried: int = 0
+    dead_lettered: int = 0
+    commits: int = 0
+    rebalances: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "fetched": self.fetched,
+            "processed": self.processed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "commits": self.commits,
+            "rebalances": self.rebalances,
+            "elapsed_s": round(elapsed, 3),
+            "throughput": round(self.processed / elapsed, 2),
+        }
+
+
+@dataclass
+class _Envelope:
+    tp: TopicPartition
+    offset: int
+    key: Optional[Hashable]
+    value: Any
+    attempt: int = 0
+
+    @property
+    def routing_key(self) -> Hashable:
+        # Keyless records keep partition order by sharing one routing key per partition
+        return self.key if self.key is not None else (self.tp.topic, self.tp.partition)
+
+
+class EngineRebalanceListener(ConsumerRebalanceListener):
+    """Lets the engine finish and commit revoked partitions before they move to another member."""
+
+    def __init__(self, engine: "ConsumerEngine"):
+        self.engine = engine
+
+    async def on_partitions_revoked(self, revoked: Iterable[TopicPartition]) -> None:
+        await self.engine.partitions_revoked(revoked)
+
+    async def on_partitions_assigned(self, assigned: Iterable[TopicPartition]) -> None:
+        self.engine.stats.rebalances += 1
+
+
+class ConsumerEngine:
+    """
+    Concurrent consumer loop with per-key ordering and manual offset commits.
+
+    Records are fetched with `getmany` and routed to a fixed pool of workers by
+    hashing their key, so events of one order are always handled sequentially by
+    the same worker while different orders run in parallel. Worker queues are
+    bounded, which stalls fetching when handlers fall behind. Offsets are
+    committed per partition only up to the lowest fully processed record.
+
+    With a `batch_handler`, each worker collects up to `batch_size` records or
+    waits at most `batch_timeout_ms` and hands them over in one call. Since a key
+    always maps to one worker, a batch holds every pending event of its orders
+    in consumption order. A failed batch is replayed record by record.
+
+    A record failing with a transient error is put on its worker's delayed retry
+    queue, and later records with the same key are parked behind it so the key
+    stays ordered while every other key keeps flowing. Records that run out of
+    retries or fail permanently go to `dead_letter`; without one the engine stops
+    and leaves the record uncommitted. Retries and parked records are not waited
+    for on shutdown; their offsets stay uncommitted and they are redelivered.
+
+    Subscribe with `rebalance_listener()` so that on a rebalance the records of
+    revoked partitions are finished, up to `rebalance_timeout_ms`, and committed
+    before the new owner starts on them. Whatever is still queued afterwards is
+    skipped and redelivered to the new owner.
+    """
+
+    def __init__(
+        self,
+        consumer: AIOKafkaConsumer,
+        handler: Handler,
+        key_func: KeyFunc = order_key,
+        workers: int = 8,
+        max_records: int = 500,
+        fetch_timeout_ms: int = 100,
+        queue_size: int = 1000,
+        commit_interval_ms: int = 1000,
+        batch_handler: Optional[BatchHandler] = None,
+        batch_size: int = 100,
+        batch_timeout_ms: int = 50,
+        retry_policy: Optional[RetryPolicy] = None,
+        dead_letter: Optional[DeadLetterSink] = None,
+        max_deferred: int = 10000,
+        rebalance_timeout_ms: int = 10000,
+    ):
+        self.consumer = consumer
+        self.handler = handler
+        self.key_func = key_func
+        self.workers = max(1, workers)
+        self.max_records = max_records
+        self.fetch_timeout_ms = fetch_timeout_ms
+        self.commit_interval = commit_interval_ms / 1000
+        self.batch_handler = batch_handler
+        self.batch_size = max(1, batch_size)
+        self.batch_timeout = batch_timeout_ms / 1000
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=0)
+        self.dead_letter = dead_letter
+        self.max_deferred = max_deferred
+        self.rebalance_timeout = rebalance_timeout_ms / 1000
+        self.stats = EngineStats()
+        self._queues: List[asyncio.Queue] = [
+            asyncio.Queue(maxsize=queue_size) for _ in range(self.workers)
+        ]
+        self._retries: List[DelayedRetryQueue] = [DelayedRetryQueue() for _ in range(self.workers)]
+        # Keys with a record waiting for retry, and the records parked behind it
+        self._blocked: Dict[Hashable, Deque[_Envelope]] = {}
+        self._deferred = 0
+        self._deferred_by_tp: Counter = Counter()
+        self._paused = False
+        self._trackers: Dict[TopicPartition, PartitionOffsetTracker] = {}
+        self._stopping = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._last_commit = time.monotonic()
+
+    def stop(self) -> None:
+        """Ask the fetch loop to finish; queued records are drained before exit."""
+        self._stopping.set()
+
+    def _fail(self, error: BaseException) -> None:
+        self._error = error
+        self.stop()
+
+    def _complete(self, env: _Envelope) -> None:
+        tracker = self._trackers.get(env.tp)
+        if tracker is not None:
+            tracker.complete(env.offset)
+        self.stats.processed += 1
+
+    def _count_deferred(self, env: _Envelope, delta: int) -> None:
+        self._deferred += delta
+        self._deferred_by_tp[env.tp] += delta
+
+    def rebalance_listener(self) -> EngineRebalanceListener:
+        return EngineRebalanceListener(self)
+
+    async def partitions_revoked(self, revoked: Iterable[TopicPartition]) -> None:
+        """Wait for in-flight records of `revoked` partitions, commit them and forget the partitions."""
+        revoked = [tp for tp in revoked if tp in self._trackers]
+        if not revoked:
+            return
+        deadline = time.monotonic() + self.rebalance_timeout
+        # Records waiting for a retry are not waited for, they can take longer than a rebalance may
+        while self._error is None and time.monotonic() < deadline and any(
+            self._trackers[tp].in_flight > self._deferred_by_tp[tp] for tp in revoked
+        ):
+            await asyncio.sleep(0.01)
+        try:
+            await self.commit()
+        except Exception:
+            logger.exception("Commit on partition revocation failed")
+        for tp in revoked:
+            tracker = self._trackers.pop(tp)
+            if tracker.in_flight:
+                logger.warning(f"{tp} revoked with {tracker.in_flight} records unfinished, the new owner redelivers them")
+
+    async def _next_batch(self, index: int) -> List[_Envelope]:
+        """Next records from the worker queue; empty when a retry became due first."""
+        queue = self._queues[index]
+        wait = self._retries[index].time_until_next()
+        if wait is None:
+            batch = [await queue.get()]
+        else:
+            try:
+                batch = [await asyncio.wait_for(queue.get(), wait)]
+            except asyncio.TimeoutError:
+                return []
+        if self.batch_handler is None:
+            return batch
+        deadline = asyncio.get_running_loop().time() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _attempt(self, index: int, env: _Envelope) -> bool:
+        """Run the handler once. Returns False if the record was deferred for retry."""
+        if env.tp not in self._trackers:
+            # Partition was revoked, the new owner processes the record
+            return True
+        try:
+            await self.handler(env.value)
+        except Exception as e:
+            if self.retry_policy.should_retry(e, env.attempt):
+                env.attempt += 1
+                delay = self.retry_policy.backoff(env.attempt)
+                self._blocked.setdefault(env.routing_key, deque())
+                self._retries[index].schedule(env, delay)
+                self._count_deferred(env, 1)
+                self.stats.retried += 1
+                logger.warning(
+                    f"Retrying {env.tp} offset {env.offset} in {delay:.2f}s "
+                    f"(attempt {env.attempt}): {e!r}"
+                )
+                return False
+            self.stats.failed += 1
+            if self.dead_letter is None:
+                # Leave the offset uncommitted so the record is redelivered after restart
+                logger.exception(f"Handler failed for {env.tp} offset {env.offset}")
+                self._fail(e)
+                return False
+            record = FailedRecord(
+                env.tp.topic, env.tp.partition, env.offset, env.key, env.value, env.attempt + 1
+            )
+            try:
+                await self.dead_letter(record, e)
+            except Exception as dlq_error:
+                logger.exception(f"Failed to dead-letter {env.tp} offset {env.offset}")
+                self._fail(dlq_error)
+                return False
+            self.stats.dead_lettered += 1
+            logger.error(f"Dead-lettered {env.tp} offset {env.offset} after {env.attempt + 1} attempts: {e!r}")
+            if env.tp in self._trackers:
+                self._trackers[env.tp].complete(env.offset)
+            return True
+        self._complete(env)
+        return True
+
+    async def _run(self, index: int, env: _Envelope) -> None:
+        """Process a record, then release records parked behind its key while they succeed."""
+        done = await self._attempt(index, env)
+        key = env.routing_key
+        while done and key in self._blocked:
+            parked = self._blocked[key]
+            if not parked:
+                del self._blocked[key]
+                break
+            env = parked.popleft()
+            self._count_deferred(env, -1)
+            done = await self._attempt(index, env)
+
+    async def _handle(self, index: int, batch: List[_Envelope]) -> None:
+        runnable = []
+        for env in batch:
+            if env.tp not in self._trackers:
+                # Partition was revoked, the new owner processes the record
+                continue
+            parked = self._blocked.get(env.routing_key)
+            if parked is not None:
+                parked.append(env)
+                self._count_deferred(env, 1)
+            else:
+                runnable.append(env)
+
+        if self.batch_handler is not None and len(runnable) > 1:
+            try:
+                await self.batch_handler([env.value for env in runnable])
+            except Exception as e:
+                # Isolate the failing record by replaying the batch one record at a time
+                logger.warning(f"Batch of {len(runnable)} records failed, replaying individually: {e!r}")
+            else:
+                for env in runnable:
+                    self._complete(env)
+                return
+
+        for env in runnable:
+            if self._error is not None:
+                return
+            parked = self._blocked.get(env.routing_key)
+            if parked is not None:
+                parked.append(env)
+                self._count_deferred(env, 1)
+            else:
+                await self._run(index, env)
+
+    async def _worker(self, index: int) -> None:
+        queue = self._queues[index]
+        retries = self._retries[index]
+        while True:
+            env = retries.pop_due()
+            if env is not None:
+                self._count_deferred(env, -1)
+                if self._error is None:
+                    await self._run(index, env)
+                continue
+            batch = await self._next_batch(index)
+            try:
+                if batch and self._error is None:
+                    await self._handle(index, batch)
+            except Exception as e:
+                logger.exception("Consumer worker failed")
+                self._fail(e)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _dispatch(self, records: Dict[TopicPartition, List[ConsumerRecord]]) -> None:
+        for tp, batch in records.items():
+            if tp not in self.consumer.assignment():
+                # Revoked while earlier partitions of this fetch waited for queue space:
+                # a tracker now would resurrect it, the new owner reads these records
+                continue
+            tracker = self._trackers.setdefault(tp, PartitionOffsetTracker())
+            for record in batch:
+                if self._trackers.get(tp) is not tracker:
+                    # Revoked while this partition waited for queue space
+                    break
+                tracker.add(record.offset)
+                env = _Envelope(tp, record.offset, self.key_func(record), record.value)
+                await self._queues[hash(env.routing_key) % self.workers].put(env)
+                self.stats.fetched += 1
+
+    def _apply_backpressure(self) -> None:
+        """Pause fetching while too many records wait for retry, so memory stays bounded."""
+        if not self._paused and self._deferred >= self.max_deferred:
+            self.consumer.pause(*self.consumer.assignment())
+            self._paused = True
+            logger.warning(f"Pausing fetch: {self._deferred} records waiting for retry")
+        elif self._paused and self._deferred < self.max_deferred // 2:
+            self.consumer.resume(*self.consumer.assignment())
+            self._paused = False
+            logger.info("Resuming fetch")
+
+    async def commit(self) -> None:
+        """Commit the committable offset of every assigned partition that advanced."""
+        # Committing a partition that is no longer assigned fails the whole commit
+        assigned = self.consumer.assignment()
+        offsets = {
+            tp: tracker.committable
+            for tp, tracker in self._trackers.items()
+            if tracker.needs_commit and tp in assigned
+        }
+        self._last_commit = time.monotonic()
+        if not offsets:
+            return
+        await self.consumer.commit(offsets)
+        for tp, offset in offsets.items():
+            if tp in self._trackers:
+                self._trackers[tp].committed = offset
+        self.stats.commits += 1
+
+    async def run(self) -> None:
+        """Fetch and dispatch until `stop()` is called or a record cannot be handled."""
+        tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+        try:
+            while not self._stopping.is_set():
+                self._apply_backpressure()
+                records = await self.consumer.getmany(
+                    timeout_ms=self.fetch_timeout_ms,
+                    max_records=self.max_records
+                )
+                if records:
+                    await self._dispatch(records)
+                if time.monotonic() - self._last_commit >= self.commit_interval:
+                    await self.commit()
+            await asyncio.gather(*(queue.join() for queue in self._queues))
+            await self.commit()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._error is not None:
+            raise self._error
@@ -1,34 +1,71 @@
-from aiokafka import AIOKafkaConsumer
-import json
 import asyncio
+from typing import Optional
 from app.core.config import settings
-from app.services.order.order_service import process_order
+from app.kafka.consumer.engine import ConsumerEngine, order_key
+from app.kafka.consumer.retry import DeadLetterPublisher, RetryPolicy
+from app.kafka.producer import kafka_producer
+from app.kafka.serialization import event_codec
+from app.kafka.transport import create_consumer
+from app.services.order.order_event_handler import process_order, process_order_batch
 
 class KafkaConsumer:
     def __init__(self):
         self.consumer = None
+        self.engine: Optional[ConsumerEngine] = None
+        self.stopped = False
     
-    async def get_consumer(self, topic: str, group_id: str):
-        self.consumer = AIOKafkaConsumer(
-            topic,
-            bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+    async def get_consumer(self, topic: str, group_id: str, listener=None):
+        self.consumer = create_consumer(
             group_id=group_id,
-            value_deserializer=lambda x: json.loads(x.decode('utf-8'))
+            # Offsets are committed by the engine once records are processed
+            enable_auto_commit=False,
+            auto_offset_reset="earliest",
+            value_deserializer=event_codec.decode
         )
+        self.consumer.subscribe([topic], listener=listener)
         await self.consumer.start()
         return self.consumer
     
     async def consume_orders(self):
+        # The engine is built first so its rebalance listener is in place before joining the group
+        self.engine = ConsumerEngine(
+            None,
+            handler=process_order,
+            key_func=order_key,
+            workers=settings.KAFKA_CONSUMER_WORKERS,
+            max_records=settings.KAFKA_CONSUMER_MAX_RECORDS,
+            fetch_timeout_ms=settings.KAFKA_CONSUMER_FETCH_TIMEOUT_MS,
+            queue_size=settings.KAFKA_CONSUMER_QUEUE_SIZE,
+            commit_interval_ms=settings.KAFKA_CONSUMER_COMMIT_INTERVAL_MS,
+            batch_handler=process_order_batch if settings.KAFKA_CONSUMER_BATCH_SIZE > 1 else None,
+            batch_size=settings.KAFKA_CONSUMER_BATCH_SIZE,
+            batch_timeout_ms=settings.KAFKA_CONSUMER_BATCH_TIMEOUT_MS,
+            retry_policy=RetryPolicy(
+                max_retries=settings.KAFKA_RETRY_MAX_RETRIES,
+                base_delay_ms=settings.KAFKA_RETRY_BASE_DELAY_MS,
+                max_delay_ms=settings.KAFKA_RETRY_MAX_DELAY_MS
+            ),
+            dead_letter=DeadLetterPublisher(kafka_producer, settings.KAFKA_ORDER_DLQ_TOPIC),
+            max_deferred=settings.KAFKA_CONSUMER_MAX_DEFERRED,
+            rebalance_timeout_ms=settings.KAFKA_CONSUMER_REBALANCE_TIMEOUT_MS
+        )
         consumer = await self.get_consumer(
             settings.KAFKA_ORDER_TOPIC, 
-            settings.KAFKA_GROUP_ID
+            settings.KAFKA_GROUP_ID,
+            listener=self.engine.rebalance_listener()
         )
+        self.engine.consumer = consumer
+        if self.stopped:
+            self.engine.stop()
         
         try:
-            async for message in consumer:
-                order_data = message.value
-                await process_order(order_data)
+            await self.engine.run()
         finally:
             await consumer.stop()
 
-kafka_consumer = KafkaConsumer()
\ No newline at end of file
+    def stop(self):
+        self.stopped = True
+        if self.engine:
+            self.engine.stop()
+
+kafka_consumer = KafkaConsumer()
@@ -0,0 +1,100 @@
+import heapq
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Hashable, List, Optional, Tuple
+from sqlalchemy.exc import DBAPIError, DisconnectionError, OperationalError, TimeoutError as PoolTimeoutError
+
+# Errors that usually clear up on their own (DB failover, pool exhaustion, network blips)
+RETRYABLE_ERRORS = (
+    OperationalError,
+    DisconnectionError,
+    PoolTimeoutError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is transient and the record is worth another attempt."""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with jitter for transient processing errors."""
+    max_retries: int = 5
+    base_delay_ms: int = 200
+    max_delay_ms: int = 30000
+    multiplier: float = 2.0
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        return attempt < self.max_retries and is_retryable(error)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay in seconds before retry number `attempt` (1-based)."""
+        ceiling = min(self.max_delay_ms, self.base_delay_ms * self.multiplier ** (attempt - 1))
+        # Equal jitter: keeps a minimum wait while spreading retries of many records apart
+        return (ceiling / 2 + random.uniform(0, ceiling / 2)) / 1000
+
+
+class DelayedRetryQueue:
+    """In-memory min-heap of records waiting for their next attempt."""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, item: Any, delay: float) -> None:
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), item))
+
+    def pop_due(self) -> Optional[Any]:
+        if self._heap and self._heap[0][0] <= time.monotonic():
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def time_until_next(self) -> Optional[float]:
+        """Seconds until the earliest retry is due, or None when empty."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+
+@dataclass
+class FailedRecord:
+    topic: str
+    partition: int
+    offset: int
+    key: Optional[Hashable]
+    value: Any
+    attempts: int
+
+
+class DeadLetterPublisher:
+    """Publishes records that cannot be processed to a dead-letter topic with failure metadata."""
+
+    def __init__(self, producer, topic: str, max_error_length: int = 1024):
+        self.producer = producer
+        self.topic = topic
+        self.max_error_length = max_error_length
+
+    async def __call__(self, record: FailedRecord, error: BaseException) -> None:
+        headers = [
+            ("x-dlq-source-topic", record.topic.encode()),
+            ("x-dlq-source-partition", str(record.partition).encode()),
+            ("x-dlq-source-offset", str(record.offset).encode()),
+            ("x-dlq-attempts", str(record.attempts).encode()),
+            ("x-dlq-error-type", type(error).__name__.encode()),
+            ("x-dlq-error-message", str(error)[:self.max_error_length].encode()),
+            ("x-dlq-failed-at", datetime.now(timezone.utc).isoformat().encode()),
+        ]
+        key = str(record.key).encode() if record.key is not None else None
+        value = record.value if isinstance(record.value, (bytes, dict)) else str(record.value).encode()
+        await self.producer.produce_message(self.topic, value=value, key=key, headers=headers)
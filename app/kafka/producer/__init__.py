@@ -1,71 +1,396 @@
 import asyncio
-from typing import Union, Optional
-from aiokafka import AIOKafkaProducer
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from aiokafka.errors import KafkaError, KafkaTimeoutError
 from app.core.config import settings
-import json
+from app.kafka.compression import CompressionSelector, parse_topic_codecs
+from app.kafka.consumer.retry import RetryPolicy
+from app.kafka.serialization import event_codec
+from app.kafka.spool import DiskSpool, SpooledRecord
+from app.kafka.transport import create_producer
+from app.utils.logger import logger
+
+# Client batching: records for a partition are grouped for up to LINGER_MS or MAX_BATCH_BYTES
+LINGER_MS = 100
+MAX_BATCH_BYTES = 16384
+
+
+def is_spoolable(error: BaseException) -> bool:
+    """Whether a send failed because the broker is unreachable, rather than because of the record."""
+    if isinstance(error, KafkaError):
+        return error.retriable or isinstance(error, KafkaTimeoutError)
+    return isinstance(error, (ConnectionError, asyncio.TimeoutError))
+
 
 class KafkaProducer:
-    def __init__(self, compression_type: str = 'gzip'):
+    """
+    Kafka producer with per-topic compression.
+
+    A client is started lazily for each compression type in use, since the
+    codec is fixed per client. When a topic switches codec in auto mode, a key
+    with sends still in flight keeps using its current client until they are
+    acknowledged, so records of one key never race each other across clients.
+
+    With a spool, sends that fail because the broker is unreachable are written
+    to local disk instead of raising. While the spool holds records, new sends
+    go straight to it, both to keep their order and so callers don't wait on
+    broker timeouts; a background task replays it once the broker is back.
+    """
+
+    def __init__(
+        self,
+        compression_type: Optional[str] = None,
+        topic_compression: Optional[Dict[str, str]] = None,
+        spool: Optional[DiskSpool] = None
+    ):
         self.producer = None
-        self.compression_type = compression_type
-    
-    async def get_producer(self):
-        if not self.producer:
-            self.producer = AIOKafkaProducer(
-                bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
-                compression_type=self.compression_type,
-                # Batch settings
-                batch_size=16384,  # 16KB batches
-                linger_ms=100,     # Wait up to 100ms for batching
-                # Buffer settings
-                buffer_memory=33554432,  # 32MB buffer
-                max_request_size=1048576 # 1MB max request
+        self.producers: Dict[str, Any] = {}
+        self.compression = CompressionSelector(
+            default=compression_type or settings.KAFKA_COMPRESSION_TYPE,
+            topics=(
+                topic_compression if topic_compression is not None
+                else parse_topic_codecs(settings.KAFKA_TOPIC_COMPRESSION)
+            ),
+            auto_min_batch_bytes=settings.KAFKA_COMPRESSION_AUTO_MIN_BATCH_BYTES,
+            window_s=LINGER_MS / 1000,
+            max_batch_bytes=MAX_BATCH_BYTES
+        )
+        # (topic, key) -> [codec, sends in flight], for keys of auto-compressed topics
+        self._pinned: Dict[Tuple[str, bytes], List[Any]] = {}
+        self._lock = asyncio.Lock()
+        if spool is None and settings.KAFKA_SPOOL_ENABLED:
+            spool = DiskSpool(
+                settings.KAFKA_SPOOL_DIR,
+                segment_bytes=settings.KAFKA_SPOOL_SEGMENT_BYTES,
+                max_bytes=settings.KAFKA_SPOOL_MAX_BYTES,
+                fsync=settings.KAFKA_SPOOL_FSYNC
             )
-            await self.producer.start()
-        return self.producer
+        self.spool = spool
+        self._spool_tasks: List[asyncio.Task] = []
+        self._drainer: Optional[asyncio.Task] = None
+        self._spool_flush: Optional[asyncio.Future] = None
+        self._warmup: Optional[asyncio.Task] = None
+        # Set once clients are connected and topic metadata is cached
+        self.ready = False
+
+    @property
+    def compression_type(self) -> str:
+        return self.compression.default
     
+    async def get_producer(self, compression_type: Optional[str] = None):
+        """Started client for a compression type, the configured default when omitted."""
+        name = compression_type or self.compression.default
+        if name == "auto":
+            name = self.compression.auto_codec
+        producer = self.producers.get(name)
+        if producer is None:
+            async with self._lock:
+                producer = self.producers.get(name)
+                if producer is None:
+                    producer = create_producer(
+                        compression_type=None if name == "none" else name,
+                        # Batch settings
+                        max_batch_size=MAX_BATCH_BYTES,
+                        linger_ms=LINGER_MS,
+                        max_request_size=1048576 # 1MB max request
+                    )
+                    try:
+                        await producer.start()
+                    except BaseException:
+                        await producer.stop()
+                        raise
+                    self.producers[name] = producer
+                    if self.producer is None:
+                        self.producer = producer
+                    # Warm-up may have failed at startup, a client started later makes us ready
+                    self.ready = True
+        return producer
+
+    def _pin(self, topic: str, key: Optional[bytes], nbytes: int) -> str:
+        """
+        Codec for a send, keeping a key on the client its in-flight sends use.
+
+        Must be paired with _unpin once the send is acknowledged or failed.
+        Unkeyed records have no ordering to keep.
+        """
+        codec = self.compression.select(topic, nbytes)
+        if key is None or self.compression.configured(topic) != "auto":
+            return codec
+        pin = self._pinned.get((topic, key))
+        if pin is None:
+            pin = self._pinned[(topic, key)] = [codec, 0]
+        pin[1] += 1
+        return pin[0]
+
+    def _unpin(self, topic: str, key: Optional[bytes]) -> None:
+        pin = self._pinned.get((topic, key)) if key is not None else None
+        if pin is None:
+            return
+        pin[1] -= 1
+        if pin[1] == 0:
+            del self._pinned[(topic, key)]
+
     async def produce_message(
         self, 
         topic: str, 
         value: Union[bytes, dict],
-        key: Optional[bytes] = None
+        key: Optional[bytes] = None,
+        headers: Optional[List[Tuple[str, bytes]]] = None
     ):
-        producer = await self.get_producer()
-        
         # Convert dict to binary if needed
         if isinstance(value, dict):
-            value = json.dumps(value).encode('utf-8')
-        
-        # Send with batching enabled
-        await producer.send_and_wait(
-            topic=topic,
-            value=value,
-            key=key
-        )
+            value = event_codec.encode(value)
+
+        if self._spooling():
+            self._spool_records(topic, [(value, key, headers)])
+            return
+
+        codec = self._pin(topic, key, len(value))
+        try:
+            producer = await self.get_producer(codec)
+
+            # Send with batching enabled
+            await producer.send_and_wait(
+                topic=topic,
+                value=value,
+                key=key,
+                headers=headers
+            )
+        except Exception as e:
+            if self.spool is None or not is_spoolable(e):
+                raise
+            logger.warning(f"Kafka unavailable ({e!r}), spooling sends to {self.spool.directory}")
+            self._spool_records(topic, [(value, key, headers)])
+        finally:
+            self._unpin(topic, key)
     
     async def produce_batch(
         self,
         topic: str,
-        messages: list[Union[bytes, dict]]
+        messages: list[Union[bytes, dict]],
+        keys: Optional[list[Optional[bytes]]] = None
     ):
-        """Batch send multiple messages"""
-        producer = await self.get_producer()
-        
+        """Batch send multiple messages, optionally keyed one-to-one with messages"""
         # Convert messages to binary if needed
         binary_messages = [
-            json.dumps(msg).encode('utf-8') if isinstance(msg, dict) else msg
+            event_codec.encode(msg) if isinstance(msg, dict) else msg
             for msg in messages
         ]
-        
-        # Send all messages in batch
-        await asyncio.gather(*[
-            producer.send_and_wait(topic, msg)
-            for msg in binary_messages
-        ])
-    
-    async def close(self):
-        if self.producer:
-            await self.producer.stop()
+        keys = keys or [None] * len(binary_messages)
+        if self._spooling():
+            self._spool_records(topic, [(msg, key, None) for msg, key in zip(binary_messages, keys)])
+            return
+
+        codecs = [self._pin(topic, key, len(msg)) for msg, key in zip(binary_messages, keys)]
+        try:
+            try:
+                producers = {codec: await self.get_producer(codec) for codec in set(codecs)}
+            except Exception as e:
+                if self.spool is None or not is_spoolable(e):
+                    raise
+                logger.warning(f"Kafka unavailable ({e!r}), spooling sends to {self.spool.directory}")
+                self._spool_records(topic, [(msg, key, None) for msg, key in zip(binary_messages, keys)])
+                return
+
+            # Send all messages in batch
+            results = await asyncio.gather(*[
+                producers[codec].send_and_wait(topic, msg, key=key)
+                for msg, key, codec in zip(binary_messages, keys, codecs)
+            ], return_exceptions=self.spool is not None)
+        finally:
+            for key in keys:
+                self._unpin(topic, key)
+        if self.spool is None:
+            return
+
+        # Spool everything from the first send the broker did not take, also the
+        # later ones that went through: a later send of the same key may have
+        # succeeded, and replaying only the failed ones would reorder the key
+        first = next(
+            (i for i, result in enumerate(results) if isinstance(result, Exception) and is_spoolable(result)),
+            None
+        )
+        if first is not None:
+            tail = [
+                (msg, key, None)
+                for msg, key, result in zip(binary_messages[first:], keys[first:], results[first:])
+                if not isinstance(result, Exception) or is_spoolable(result)
+            ]
+            logger.warning(f"Kafka unavailable, spooling {len(tail)} sends to {self.spool.directory}")
+            self._spool_records(topic, tail)
+        # Records the broker rejected are not spooled, replaying them cannot succeed
+        for result in results:
+            if isinstance(result, BaseException) and not is_spoolable(result):
+                raise result
+
+    async def start(self, topics: Iterable[str] = ()) -> None:
+        """
+        Connect ahead of the first send and cache metadata for `topics`.
+
+        Starts the clients for the default and per-topic codecs, so the first
+        request does not pay for connection setup and metadata fetch. If the
+        broker is unreachable the producer is still ready when a spool can take
+        the sends; otherwise clients are started again lazily on first use, and
+        the producer becomes ready once one of them connects.
+        """
+        self.open_spool()
+        topics = list(topics)
+        try:
+            for topic in topics:
+                name = self.compression.configured(topic)
+                # Auto mode switches between an uncompressed and a compressed client
+                for codec in ({"none", self.compression.auto_codec} if name == "auto" else {name}):
+                    producer = await self.get_producer(codec)
+                    await producer.partitions_for(topic)
+            if not topics:
+                await self.get_producer()
+            self.ready = True
+        except Exception as e:
+            if not is_spoolable(e):
+                raise
+            self.ready = self.spool is not None
+            logger.warning(f"Kafka producer warm-up failed: {e!r}")
+
+    def retry_start(self, topics: Iterable[str] = ()) -> None:
+        """Run start() again in the background after a failed warm-up, e.g. from a readiness probe."""
+        if self.ready or (self._warmup is not None and not self._warmup.done()):
+            return
+        self._warmup = asyncio.create_task(self._retry_start(list(topics)))
+
+    async def _retry_start(self, topics: List[str]) -> None:
+        try:
+            await self.start(topics)
+        except Exception as e:
+            logger.warning(f"Kafka producer warm-up failed again: {e!r}")
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for buffered records to be sent; False when `timeout` ran out first."""
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(producer.flush() for producer in self.producers.values())),
+                timeout
+            )
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _spooling(self) -> bool:
+        """Whether sends must go to the spool because earlier ones are still waiting in it."""
+        if self.spool is None:
+            return False
+        self.open_spool()
+        return self.spool.pending > 0
+
+    def open_spool(self) -> None:
+        """Recover the spool and start replaying what a previous run left in it."""
+        if self.spool is None or self._spool_tasks:
+            return
+        self.spool.open()
+        if self.spool.fsync == "interval":
+            self._spool_tasks.append(asyncio.create_task(self._flush_spool()))
+        if self.spool.pending:
+            self._start_drainer()
+
+    def _spool_records(self, topic: str, records: List[Tuple[bytes, Optional[bytes], Any]]) -> None:
+        for value, key, headers in records:
+            self.spool.append(topic, value, key, headers)
+        self._start_drainer()
+
+    def _start_drainer(self) -> None:
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain_spool())
+
+    async def _flush_spool(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(settings.KAFKA_SPOOL_FSYNC_INTERVAL_MS / 1000)
+            # msync can block on a busy disk, keep it off the event loop. Shielded,
+            # so cancelling this task leaves the flush for close() to wait on.
+            self._spool_flush = loop.run_in_executor(None, self.spool.flush)
+            await asyncio.shield(self._spool_flush)
+
+    async def _send_spooled(self, records: List[SpooledRecord]) -> Optional[BaseException]:
+        """Send records in order and acknowledge the delivered prefix; returns the error that stopped it."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        pinned = []
+        error = None
+        try:
+            for record in records:
+                codec = self._pin(record.topic, record.key, len(record.value))
+                pinned.append(record)
+                producer = await self.get_producer(codec)
+                try:
+                    future = await producer.send(
+                        record.topic, record.value, key=record.key, headers=record.headers or None
+                    )
+                except Exception as e:
+                    if is_spoolable(e):
+                        raise
+                    # Rejected before sending, e.g. larger than max_request_size: handled
+                    # below like a failed delivery, so it is dropped rather than replayed forever
+                    future = loop.create_future()
+                    future.set_exception(e)
+                futures.append(future)
+        except Exception as e:
+            error = e
+        try:
+            results = await asyncio.gather(*futures, return_exceptions=True)
+        finally:
+            for record in pinned:
+                self._unpin(record.topic, record.key)
+        delivered = None
+        for record, result in zip(records, results):
+            if isinstance(result, Exception):
+                if is_spoolable(result):
+                    error = result
+                    break
+                # Replaying a record the broker rejects would block the spool forever
+                logger.error(f"Dropping spooled record for {record.topic}: {result!r}")
+            delivered = record
+        if delivered is not None:
+            self.spool.ack(delivered)
+        return error
+
+    async def _drain_spool(self) -> None:
+        backoff = RetryPolicy(base_delay_ms=500, max_delay_ms=30000)
+        attempt = 0
+        while self.spool.pending:
+            error = await self._send_spooled(self.spool.read(settings.KAFKA_SPOOL_DRAIN_BATCH))
+            if error is None:
+                attempt = 0
+                continue
+            if not is_spoolable(error):
+                logger.error(f"Kafka spool replay failed: {error!r}")
+            attempt += 1
+            await asyncio.sleep(backoff.backoff(min(attempt, 10)))
+        logger.info("Kafka spool drained")
+
+    async def close(self, timeout: Optional[float] = None):
+        """Flush, bounded by `timeout`, and stop the clients."""
+        self.ready = False
+        if self.producers and not await self.flush(timeout):
+            logger.warning(f"Kafka producer flush did not finish within {timeout}s")
+        for task in self._spool_tasks + [self._drainer, self._warmup]:
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._spool_tasks.clear()
+        self._drainer = None
+        self._warmup = None
+        if self._spool_flush is not None:
+            # Still running in the executor, wait for it before unmapping the segments
+            await asyncio.gather(self._spool_flush, return_exceptions=True)
+            self._spool_flush = None
+        if self.spool is not None:
+            # Whatever is left is replayed on the next start
+            self.spool.close()
+        for producer in self.producers.values():
+            await producer.stop()
+        self.producers.clear()
+        self.producer = None
 
-# Global instance with gzip compression
-kafka_producer = KafkaProducer(compression_type='gzip')
\ No newline at end of file
+# Global instance, compression from KAFKA_COMPRESSION_TYPE / KAFKA_TOPIC_COMPRESSION
+kafka_producer = KafkaProducer()
\ No newline at end of file
@@ -0,0 +1,115 @@
+import json
+import struct
+from typing import Any, Callable, Dict, Optional, Protocol, Tuple
+from app.core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is in requirements.txt
+    msgpack = None
+
+# Wire header: magic byte, serializer id, schema version
+HEADER = struct.Struct(">BBH")
+MAGIC = 0xEC
+
+
+class Serializer(Protocol):
+    id: int
+    name: str
+
+    def dumps(self, value: Any) -> bytes: ...
+
+    def loads(self, data: bytes) -> Any: ...
+
+
+class JsonSerializer:
+    id = 1
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class MsgpackSerializer:
+    id = 2
+    name = "msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("KAFKA_SERIALIZER=msgpack requires the msgpack package")
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+SERIALIZERS: Dict[str, Callable[[], Serializer]] = {
+    JsonSerializer.name: JsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+}
+
+
+class EventCodec:
+    """
+    Encodes event payloads with a 4-byte header: magic, serializer id, schema version.
+
+    Decoding picks the serializer from the header, so producers can switch
+    formats without coordinating with consumers. Messages without the header are
+    treated as legacy plain JSON. Payloads written with an older schema version
+    are passed through the registered upcasters until they match the current one.
+    """
+
+    def __init__(self, serializer: Serializer, schema_version: int = 1):
+        self.serializer = serializer
+        self.schema_version = schema_version
+        self._decoders: Dict[int, Serializer] = {serializer.id: serializer}
+        self._upcasters: Dict[int, Callable[[Any], Any]] = {}
+
+    def register_upcaster(self, from_version: int, upcast: Callable[[Any], Any]) -> None:
+        """Register a function turning a `from_version` payload into `from_version + 1`."""
+        self._upcasters[from_version] = upcast
+
+    def _decoder(self, serializer_id: int) -> Serializer:
+        decoder = self._decoders.get(serializer_id)
+        if decoder is None:
+            for factory in SERIALIZERS.values():
+                candidate = factory()
+                if candidate.id == serializer_id:
+                    decoder = self._decoders[serializer_id] = candidate
+                    break
+            else:
+                raise ValueError(f"Unknown serializer id {serializer_id}")
+        return decoder
+
+    def encode(self, value: Any, schema_version: Optional[int] = None) -> bytes:
+        version = self.schema_version if schema_version is None else schema_version
+        return HEADER.pack(MAGIC, self.serializer.id, version) + self.serializer.dumps(value)
+
+    def decode_with_version(self, data: bytes) -> Tuple[int, Any]:
+        if len(data) < HEADER.size or data[0] != MAGIC:
+            # Legacy messages are plain JSON in the first schema version
+            return 1, json.loads(data)
+        _, serializer_id, version = HEADER.unpack_from(data)
+        return version, self._decoder(serializer_id).loads(data[HEADER.size:])
+
+    def decode(self, data: bytes) -> Any:
+        version, value = self.decode_with_version(data)
+        while version < self.schema_version and version in self._upcasters:
+            value = self._upcasters[version](value)
+            version += 1
+        return value
+
+
+def create_codec(name: str, schema_version: int = 1) -> EventCodec:
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer {name!r}, expected one of {sorted(SERIALIZERS)}")
+    return EventCodec(SERIALIZERS[name](), schema_version)
+
+
+# Global codec used by the producer and consumers
+event_codec = create_codec(settings.KAFKA_SERIALIZER)
@@ -0,0 +1,317 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Frame header: body length, crc32 of the body. A zero length marks the end of written data.
+FRAME = struct.Struct(">II")
+END_MARKER = bytes(FRAME.size)
+CHECKPOINT = struct.Struct(">QQ")
+SEGMENT_SUFFIX = ".seg"
+CHECKPOINT_FILE = "checkpoint"
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+class SpoolFullError(Exception):
+    """The spool reached its size limit; the record was not written."""
+
+
+@dataclass
+class SpooledRecord:
+    topic: str
+    value: bytes
+    key: Optional[bytes]
+    headers: List[Tuple[str, bytes]]
+    # Read position just past this record, acknowledged once it was delivered
+    segment: int
+    end: int
+
+
+def encode_record(
+    topic: str,
+    value: bytes,
+    key: Optional[bytes] = None,
+    headers: Optional[List[Tuple[str, bytes]]] = None
+) -> bytes:
+    topic_bytes = topic.encode()
+    parts = [struct.pack(">H", len(topic_bytes)), topic_bytes]
+    if key is None:
+        parts.append(struct.pack(">i", -1))
+    else:
+        parts += [struct.pack(">i", len(key)), key]
+    headers = headers or []
+    parts.append(struct.pack(">H", len(headers)))
+    for name, header_value in headers:
+        name_bytes = name.encode()
+        parts += [struct.pack(">HI", len(name_bytes), len(header_value)), name_bytes, header_value]
+    parts.append(value)
+    body = b"".join(parts)
+    return FRAME.pack(len(body), zlib.crc32(body)) + body
+
+
+def decode_record(buffer, pos: int, limit: int) -> Optional[Tuple[str, bytes, Optional[bytes], List[Tuple[str, bytes]], int]]:
+    """Record at `pos` and the position after it, or None at the end of valid data."""
+    if pos + FRAME.size > limit:
+        return None
+    length, crc = FRAME.unpack_from(buffer, pos)
+    start = pos + FRAME.size
+    if length == 0 or start + length > limit:
+        return None
+    body = bytes(buffer[start:start + length])
+    if zlib.crc32(body) != crc:
+        # Torn write from a crash: everything from here on is garbage
+        return None
+    (topic_length,) = struct.unpack_from(">H", body, 0)
+    cursor = 2 + topic_length
+    topic = body[2:cursor].decode()
+    (key_length,) = struct.unpack_from(">i", body, cursor)
+    cursor += 4
+    key = None
+    if key_length >= 0:
+        key = body[cursor:cursor + key_length]
+        cursor += key_length
+    (header_count,) = struct.unpack_from(">H", body, cursor)
+    cursor += 2
+    headers = []
+    for _ in range(header_count):
+        name_length, value_length = struct.unpack_from(">HI", body, cursor)
+        cursor += 6
+        name = body[cursor:cursor + name_length].decode()
+        cursor += name_length
+        headers.append((name, body[cursor:cursor + value_length]))
+        cursor += value_length
+    return topic, body[cursor:], key, headers, start + length
+
+
+class _Segment:
+    """A preallocated segment file mapped into memory."""
+
+    def __init__(self, path: str, seq: int, size: int):
+        self.path = path
+        self.seq = seq
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.size = os.fstat(fd).st_size
+            self.mm = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+
+    def close(self) -> None:
+        self.mm.close()
+
+
+class DiskSpool:
+    """
+    Append-only local spool for records that could not be sent to Kafka.
+
+    Records are framed (length, crc32) and copied into memory-mapped segment
+    files, so an append costs a memcpy rather than a syscall. The fsync policy
+    decides when the mapped pages are forced to disk: after every append
+    ("always"), when flush() is called by a background task ("interval"), or
+    whenever the OS writes them back ("never"). A checkpoint file records the
+    read position; fully read segments are deleted. Delivery is at-least-once:
+    records read but not acknowledged before a crash are read again.
+
+    flush() may run in a worker thread while appends continue on the event
+    loop; unmapping a segment waits for a flush in progress.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 16 * 1024 * 1024,
+        max_bytes: int = 1024 * 1024 * 1024,
+        fsync: str = "interval"
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}, expected one of {FSYNC_POLICIES}")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self.pending = 0
+        self.pending_bytes = 0
+        self.spooled = 0
+        self.acked = 0
+        self._segments: Dict[int, _Segment] = {}
+        self._writer: Optional[_Segment] = None
+        self._write_pos = 0
+        self._read_seq = 0
+        self._read_pos = 0
+        self._dirty = False
+        self._opened = False
+        # Held while msync runs, so a segment is not unmapped under it
+        self._sync_lock = threading.Lock()
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq:020d}{SEGMENT_SUFFIX}")
+
+    def open(self) -> "DiskSpool":
+        """Recover segments and the read position left by a previous process."""
+        if self._opened:
+            return self
+        os.makedirs(self.directory, exist_ok=True)
+        seqs = sorted(
+            int(name[:-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+        checkpoint_path = os.path.join(self.directory, CHECKPOINT_FILE)
+        read_seq, read_pos = (seqs[0] if seqs else 0), 0
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "rb") as f:
+                data = f.read()
+            if len(data) == CHECKPOINT.size:
+                read_seq, read_pos = CHECKPOINT.unpack(data)
+        for seq in seqs:
+            if seq < read_seq:
+                os.remove(self._path(seq))
+        seqs = [seq for seq in seqs if seq >= read_seq]
+        if not seqs or seqs[0] != read_seq:
+            # The checkpointed segment is gone: start from the oldest one left
+            read_seq, read_pos = (seqs[0] if seqs else read_seq), 0
+        self._read_seq, self._read_pos = read_seq, read_pos
+
+        for seq in seqs:
+            segment = self._segments[seq] = _Segment(self._path(seq), seq, self.segment_bytes)
+            pos = read_pos if seq == read_seq else 0
+            while (decoded := decode_record(segment.mm, pos, segment.size)) is not None:
+                self.pending += 1
+                self.pending_bytes += decoded[4] - pos
+                pos = decoded[4]
+            self._writer, self._write_pos = segment, pos
+        if self._writer is None:
+            self._writer = self._segments[read_seq] = _Segment(self._path(read_seq), read_seq, self.segment_bytes)
+            self._write_pos = 0
+        self._opened = True
+        return self
+
+    @property
+    def disk_bytes(self) -> int:
+        return sum(segment.size for segment in self._segments.values())
+
+    def _roll(self, frame_size: int) -> None:
+        size = max(self.segment_bytes, frame_size)
+        if self.disk_bytes + size > self.max_bytes:
+            raise SpoolFullError(f"Kafka spool at {self.directory} is full ({self.disk_bytes} bytes)")
+        if self._dirty:
+            self._writer.mm.flush()
+        seq = self._writer.seq + 1
+        self._writer = self._segments[seq] = _Segment(self._path(seq), seq, size)
+        self._write_pos = 0
+        self._dirty = False
+
+    def append(
+        self,
+        topic: str,
+        value: bytes,
+        key: Optional[bytes] = None,
+        headers: Optional[List[Tuple[str, bytes]]] = None
+    ) -> None:
+        # A zero header after each record marks where the data ends, also over
+        # older records when the segment was reused
+        frame = encode_record(topic, value, key, headers) + END_MARKER
+        if self._write_pos + len(frame) > self._writer.size:
+            self._roll(len(frame))
+        self._writer.mm[self._write_pos:self._write_pos + len(frame)] = frame
+        frame = frame[:-FRAME.size]
+        self._write_pos += len(frame)
+        self.pending += 1
+        self.pending_bytes += len(frame)
+        self.spooled += 1
+        self._dirty = True
+        if self.fsync == "always":
+            self.flush()
+
+    def read(self, max_records: int) -> List[SpooledRecord]:
+        """Oldest unacknowledged records, without consuming them."""
+        records = []
+        seq, pos = self._read_seq, self._read_pos
+        while len(records) < max_records and seq in self._segments:
+            segment = self._segments[seq]
+            limit = self._write_pos if segment is self._writer else segment.size
+            decoded = decode_record(segment.mm, pos, limit)
+            if decoded is None:
+                if segment is self._writer:
+                    break
+                seq, pos = seq + 1, 0
+                continue
+            topic, value, key, headers, pos = decoded
+            records.append(SpooledRecord(topic, value, key, headers, seq, pos))
+        return records
+
+    def ack(self, record: SpooledRecord) -> None:
+        """Mark everything up to and including `record` as delivered."""
+        while self._read_seq < record.segment:
+            segment = self._segments.pop(self._read_seq)
+            self._release(segment, segment.size)
+            self._read_seq, self._read_pos = self._read_seq + 1, 0
+        segment = self._segments[record.segment]
+        while self._read_pos < record.end:
+            decoded = decode_record(segment.mm, self._read_pos, record.end)
+            self.pending -= 1
+            self.acked += 1
+            self.pending_bytes -= decoded[4] - self._read_pos
+            self._read_pos = decoded[4]
+        if segment is self._writer and self._read_pos == self._write_pos and self._write_pos:
+            # Drained: start the active segment over instead of leaving it to grow
+            self._write_pos = self._read_pos = 0
+            segment.mm[:FRAME.size] = END_MARKER
+        self._write_checkpoint()
+
+    def _release(self, segment: _Segment, limit: int) -> None:
+        pos = self._read_pos
+        while (decoded := decode_record(segment.mm, pos, limit)) is not None:
+            self.pending -= 1
+            self.acked += 1
+            self.pending_bytes -= decoded[4] - pos
+            pos = decoded[4]
+        with self._sync_lock:
+            segment.close()
+        os.remove(segment.path)
+
+    def _write_checkpoint(self) -> None:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(CHECKPOINT.pack(self._read_seq, self._read_pos))
+            if self.fsync == "always":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def flush(self) -> None:
+        """Force appended records to disk."""
+        with self._sync_lock:
+            writer = self._writer
+            if not self._dirty or writer is None:
+                return
+            # Cleared before the msync: a record appended while it runs marks
+            # the spool dirty again and is synced by the next flush
+            self._dirty = False
+            writer.mm.flush()
+
+    def close(self) -> None:
+        if not self._opened:
+            return
+        self.flush()
+        with self._sync_lock:
+            for segment in self._segments.values():
+                segment.close()
+        self._segments.clear()
+        self._writer = None
+        self._opened = False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending,
+            "pending_bytes": self.pending_bytes,
+            "spooled": self.spooled,
+            "acked": self.acked,
+            "disk_bytes": self.disk_bytes,
+        }
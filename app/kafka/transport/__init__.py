@@ -0,0 +1,33 @@
+from typing import Any, Optional
+from app.core.config import settings
+from app.kafka.transport.memory import InMemoryBroker, InMemoryConsumer, InMemoryProducer
+
+_memory_broker: Optional[InMemoryBroker] = None
+
+
+def get_memory_broker() -> InMemoryBroker:
+    """Process-wide in-memory broker shared by every producer and consumer."""
+    global _memory_broker
+    if _memory_broker is None:
+        _memory_broker = InMemoryBroker(default_partitions=settings.KAFKA_MEMORY_PARTITIONS)
+    return _memory_broker
+
+
+def use_memory_transport() -> bool:
+    return settings.KAFKA_TRANSPORT == "memory"
+
+
+def create_producer(**config: Any):
+    """Build a producer for the configured transport ("aiokafka" or "memory")."""
+    if use_memory_transport():
+        return InMemoryProducer(broker=get_memory_broker(), **config)
+    from aiokafka import AIOKafkaProducer
+    return AIOKafkaProducer(bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS, **config)
+
+
+def create_consumer(*topics: str, **config: Any):
+    """Build a consumer for the configured transport ("aiokafka" or "memory")."""
+    if use_memory_transport():
+        return InMemoryConsumer(*topics, broker=get_memory_broker(), **config)
+    from aiokafka import AIOKafkaConsumer
+    return AIOKafkaConsumer(*topics, bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS, **config)
@@ -0,0 +1,414 @@
+import asyncio
+import inspect
+import itertools
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from aiokafka.errors import MessageSizeTooLargeError
+from aiokafka.partitioner import DefaultPartitioner
+from aiokafka.structs import ConsumerRecord, OffsetAndMetadata, RecordMetadata, TopicPartition
+
+
+@dataclass
+class _StoredRecord:
+    offset: int
+    timestamp: int
+    key: Optional[bytes]
+    value: Optional[bytes]
+    headers: Tuple[Tuple[str, bytes], ...]
+
+
+@dataclass
+class _Group:
+    members: Dict[str, Set[str]] = field(default_factory=dict)  # member id -> subscribed topics
+    assignment: Dict[str, Set[TopicPartition]] = field(default_factory=dict)
+    generation: int = 0
+    owners: Dict[TopicPartition, str] = field(default_factory=dict)  # member currently consuming a partition
+
+
+class InMemoryBroker:
+    """
+    In-process stand-in for a Kafka cluster.
+
+    Models what the order pipeline relies on: topics split into partitions,
+    key-based partitioning (same murmur2 partitioner as aiokafka), append-only
+    partition logs with offsets, consumer groups with range assignment and
+    rebalancing on join/leave, and committed offsets per group. As with a real
+    group coordinator, a reassigned partition is only handed to its new member
+    once the previous one has released it after its revocation callback. Records are kept
+    serialized, so producers and consumers pay their real (de)serialization cost.
+    """
+
+    def __init__(self, default_partitions: int = 6):
+        self.default_partitions = default_partitions
+        self._logs: Dict[str, List[List[_StoredRecord]]] = {}
+        self._committed: Dict[str, Dict[TopicPartition, OffsetAndMetadata]] = defaultdict(dict)
+        self._groups: Dict[str, _Group] = defaultdict(_Group)
+        self._partitioner = DefaultPartitioner()
+        self._data_event: Optional[asyncio.Event] = None
+
+    # Topics
+
+    def create_topic(self, topic: str, partitions: Optional[int] = None) -> None:
+        if topic not in self._logs:
+            self._logs[topic] = [[] for _ in range(partitions or self.default_partitions)]
+            self._rebalance_subscribers(topic)
+
+    def partitions_for(self, topic: str) -> Set[int]:
+        self.create_topic(topic)
+        return set(range(len(self._logs[topic])))
+
+    def topics(self) -> Set[str]:
+        return set(self._logs)
+
+    # Produce / fetch
+
+    def append(
+        self,
+        topic: str,
+        value: Optional[bytes],
+        key: Optional[bytes] = None,
+        partition: Optional[int] = None,
+        timestamp_ms: Optional[int] = None,
+        headers: Optional[Iterable[Tuple[str, bytes]]] = None,
+    ) -> RecordMetadata:
+        partitions = sorted(self.partitions_for(topic))
+        if partition is None:
+            partition = (
+                self._partitioner(key, partitions, partitions)
+                if key is not None else random.choice(partitions)
+            )
+        log = self._logs[topic][partition]
+        timestamp = timestamp_ms if timestamp_ms is not None else int(time.time() * 1000)
+        log.append(_StoredRecord(len(log), timestamp, key, value, tuple(headers or ())))
+        self._notify()
+        tp = TopicPartition(topic, partition)
+        return RecordMetadata(topic, partition, tp, len(log) - 1, timestamp, 0, 0)
+
+    def fetch(self, tp: TopicPartition, offset: int, max_records: int) -> List[_StoredRecord]:
+        return self._logs[tp.topic][tp.partition][offset:offset + max_records]
+
+    def end_offset(self, tp: TopicPartition) -> int:
+        return len(self._logs[tp.topic][tp.partition])
+
+    def _notify(self) -> None:
+        if self._data_event is not None:
+            self._data_event.set()
+            self._data_event = None
+
+    async def wait_for_data(self, timeout: float) -> None:
+        if self._data_event is None:
+            self._data_event = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._data_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    # Consumer groups
+
+    def join(self, group_id: str, member_id: str, topics: Iterable[str]) -> None:
+        topics = set(topics)
+        for topic in topics:
+            self.create_topic(topic)
+        self._groups[group_id].members[member_id] = topics
+        self._rebalance(group_id)
+
+    def leave(self, group_id: str, member_id: str) -> None:
+        group = self._groups[group_id]
+        self.release(group_id, member_id, [tp for tp, owner in group.owners.items() if owner == member_id])
+        if group.members.pop(member_id, None) is not None:
+            self._rebalance(group_id)
+
+    def acquire(self, group_id: str, member_id: str, partitions: Iterable[TopicPartition]) -> Set[TopicPartition]:
+        """Take ownership of the partitions no other member still holds; returns the ones owned."""
+        owners = self._groups[group_id].owners
+        return {tp for tp in partitions if owners.setdefault(tp, member_id) == member_id}
+
+    def release(self, group_id: str, member_id: str, partitions: Iterable[TopicPartition]) -> None:
+        owners = self._groups[group_id].owners
+        for tp in partitions:
+            if owners.get(tp) == member_id:
+                del owners[tp]
+
+    def group_state(self, group_id: str, member_id: str) -> Tuple[int, Set[TopicPartition]]:
+        group = self._groups[group_id]
+        return group.generation, set(group.assignment.get(member_id, ()))
+
+    def _rebalance_subscribers(self, topic: str) -> None:
+        for group_id, group in self._groups.items():
+            if any(topic in topics for topics in group.members.values()):
+                self._rebalance(group_id)
+
+    def _rebalance(self, group_id: str) -> None:
+        """Range assignment per topic."""
+        group = self._groups[group_id]
+        assignment: Dict[str, Set[TopicPartition]] = {member: set() for member in group.members}
+        topics = set().union(*group.members.values()) if group.members else set()
+        for topic in sorted(topics):
+            members = sorted(m for m, subscribed in group.members.items() if topic in subscribed)
+            partitions = sorted(self.partitions_for(topic))
+            per_member, extra = divmod(len(partitions), len(members))
+            start = 0
+            for i, member in enumerate(members):
+                count = per_member + (1 if i < extra else 0)
+                assignment[member].update(TopicPartition(topic, p) for p in partitions[start:start + count])
+                start += count
+        group.assignment = assignment
+        group.generation += 1
+
+    def commit(self, group_id: str, offsets: Dict[TopicPartition, OffsetAndMetadata]) -> None:
+        self._committed[group_id].update(offsets)
+
+    def committed(self, group_id: str, tp: TopicPartition) -> Optional[int]:
+        meta = self._committed[group_id].get(tp)
+        return meta.offset if meta is not None else None
+
+    def lag(self, group_id: str, topic: str) -> int:
+        """Records in the topic not yet committed by the group."""
+        total = 0
+        for partition in self.partitions_for(topic):
+            tp = TopicPartition(topic, partition)
+            total += self.end_offset(tp) - (self.committed(group_id, tp) or 0)
+        return total
+
+
+_member_ids = itertools.count()
+
+
+class InMemoryProducer:
+    """Subset of the AIOKafkaProducer API backed by an InMemoryBroker."""
+
+    def __init__(
+        self,
+        broker: InMemoryBroker,
+        value_serializer: Optional[Callable[[Any], bytes]] = None,
+        key_serializer: Optional[Callable[[Any], bytes]] = None,
+        compression_type: Optional[str] = None,
+        max_request_size: int = 1048576,
+        **_config: Any,
+    ):
+        self.broker = broker
+        self.value_serializer = value_serializer
+        self.key_serializer = key_serializer
+        self.compression_type = compression_type
+        self.max_request_size = max_request_size
+        self._started = False
+
+    async def start(self) -> None:
+        self._started = True
+
+    async def stop(self) -> None:
+        self._started = False
+
+    async def flush(self) -> None:
+        return None
+
+    async def partitions_for(self, topic: str) -> Set[int]:
+        return self.broker.partitions_for(topic)
+
+    async def send(
+        self,
+        topic: str,
+        value: Any = None,
+        key: Any = None,
+        partition: Optional[int] = None,
+        timestamp_ms: Optional[int] = None,
+        headers: Optional[Iterable[Tuple[str, bytes]]] = None,
+    ) -> "asyncio.Future[RecordMetadata]":
+        if not self._started:
+            raise RuntimeError("Producer is not started")
+        if self.value_serializer is not None:
+            value = self.value_serializer(value)
+        if self.key_serializer is not None:
+            key = self.key_serializer(key)
+        # Checked before the record is queued, like aiokafka (which also counts the record overhead)
+        size = len(key or b"") + len(value or b"")
+        if size > self.max_request_size:
+            raise MessageSizeTooLargeError(f"The message is {size} bytes when serialized")
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(self.broker.append(topic, value, key, partition, timestamp_ms, headers))
+        return future
+
+    async def send_and_wait(self, *args: Any, **kwargs: Any) -> RecordMetadata:
+        return await (await self.send(*args, **kwargs))
+
+
+class InMemoryConsumer:
+    """Subset of the AIOKafkaConsumer API backed by an InMemoryBroker."""
+
+    def __init__(
+        self,
+        *topics: str,
+        broker: InMemoryBroker,
+        group_id: Optional[str] = None,
+        value_deserializer: Optional[Callable[[bytes], Any]] = None,
+        key_deserializer: Optional[Callable[[bytes], Any]] = None,
+        auto_offset_reset: str = "latest",
+        enable_auto_commit: bool = True,
+        **_config: Any,
+    ):
+        self.broker = broker
+        self.group_id = group_id
+        self.value_deserializer = value_deserializer
+        self.key_deserializer = key_deserializer
+        self.auto_offset_reset = auto_offset_reset
+        self.enable_auto_commit = enable_auto_commit
+        self.member_id = f"memory-consumer-{next(_member_ids)}"
+        self._topics: Set[str] = set(topics)
+        self._listener = None
+        self._generation = -1
+        self._assignment: Set[TopicPartition] = set()
+        self._positions: Dict[TopicPartition, int] = {}
+        self._paused: Set[TopicPartition] = set()
+        self._next_partition = 0
+        self._started = False
+
+    def subscribe(self, topics: Iterable[str] = (), listener: Any = None) -> None:
+        self._topics = set(topics)
+        self._listener = listener
+        if self._started:
+            self.broker.join(self._group, self.member_id, self._topics)
+
+    @property
+    def _group(self) -> str:
+        # Consumers without a group get every partition, like manual assignment
+        return self.group_id or self.member_id
+
+    async def start(self) -> None:
+        self._started = True
+        self.broker.join(self._group, self.member_id, self._topics)
+        await self._sync_assignment()
+
+    async def stop(self) -> None:
+        if self._started:
+            if self.enable_auto_commit:
+                await self.commit()
+            self.broker.leave(self._group, self.member_id)
+            self._started = False
+
+    async def _call_listener(self, method: str, partitions: Set[TopicPartition]) -> None:
+        if self._listener is None:
+            return
+        result = getattr(self._listener, method)(partitions)
+        if inspect.isawaitable(result):
+            await result
+
+    async def _sync_assignment(self) -> None:
+        generation, target = self.broker.group_state(self._group, self.member_id)
+        if generation == self._generation and target == self._assignment:
+            return
+        revoked = self._assignment - target
+        if revoked:
+            await self._call_listener("on_partitions_revoked", revoked)
+        for tp in revoked:
+            self._positions.pop(tp, None)
+            self._paused.discard(tp)
+        self.broker.release(self._group, self.member_id, revoked)
+        # Partitions another member has not released yet are picked up on a later poll
+        assignment = self.broker.acquire(self._group, self.member_id, target)
+        if generation == self._generation and assignment == self._assignment:
+            return
+        self._generation = generation
+        self._assignment = assignment
+        for tp in assignment:
+            if tp not in self._positions:
+                committed = self.broker.committed(self._group, tp)
+                if committed is not None:
+                    self._positions[tp] = committed
+                else:
+                    self._positions[tp] = 0 if self.auto_offset_reset == "earliest" else self.broker.end_offset(tp)
+        await self._call_listener("on_partitions_assigned", set(assignment))
+
+    def assignment(self) -> Set[TopicPartition]:
+        return set(self._assignment)
+
+    def pause(self, *partitions: TopicPartition) -> None:
+        self._paused.update(partitions)
+
+    def resume(self, *partitions: TopicPartition) -> None:
+        self._paused.difference_update(partitions)
+
+    def paused(self) -> Set[TopicPartition]:
+        return set(self._paused)
+
+    def seek(self, tp: TopicPartition, offset: int) -> None:
+        self._positions[tp] = offset
+
+    async def position(self, tp: TopicPartition) -> int:
+        return self._positions[tp]
+
+    def highwater(self, tp: TopicPartition) -> int:
+        return self.broker.end_offset(tp)
+
+    async def end_offsets(self, partitions: Iterable[TopicPartition]) -> Dict[TopicPartition, int]:
+        return {tp: self.broker.end_offset(tp) for tp in partitions}
+
+    async def partitions_for_topic(self, topic: str) -> Set[int]:
+        return self.broker.partitions_for(topic)
+
+    async def committed(self, tp: TopicPartition) -> Optional[int]:
+        return self.broker.committed(self._group, tp)
+
+    async def commit(self, offsets: Optional[Dict[TopicPartition, Any]] = None) -> None:
+        if offsets is None:
+            offsets = {tp: self._positions[tp] for tp in self._assignment}
+        self.broker.commit(self._group, {
+            tp: offset if isinstance(offset, OffsetAndMetadata) else OffsetAndMetadata(offset, "")
+            for tp, offset in offsets.items()
+        })
+
+    def _to_record(self, tp: TopicPartition, stored: _StoredRecord) -> ConsumerRecord:
+        key = stored.key
+        value = stored.value
+        if self.key_deserializer is not None and key is not None:
+            key = self.key_deserializer(key)
+        if self.value_deserializer is not None and value is not None:
+            value = self.value_deserializer(value)
+        return ConsumerRecord(
+            tp.topic, tp.partition, stored.offset, stored.timestamp, 0, key, value, None,
+            len(stored.key) if stored.key is not None else -1,
+            len(stored.value) if stored.value is not None else -1,
+            stored.headers,
+        )
+
+    def _collect(self, partitions: Iterable[TopicPartition], max_records: Optional[int]) -> Dict[TopicPartition, List[ConsumerRecord]]:
+        result: Dict[TopicPartition, List[ConsumerRecord]] = {}
+        budget = max_records if max_records is not None else float("inf")
+        ordered = sorted(partitions)
+        if ordered:
+            # Rotate the starting partition so a busy partition cannot starve the others
+            self._next_partition = (self._next_partition + 1) % len(ordered)
+            ordered = ordered[self._next_partition:] + ordered[:self._next_partition]
+        for tp in ordered:
+            if budget <= 0:
+                break
+            if tp in self._paused or tp not in self._positions:
+                continue
+            stored = self.broker.fetch(tp, self._positions[tp], int(min(budget, 1 << 30)))
+            if stored:
+                result[tp] = [self._to_record(tp, record) for record in stored]
+                self._positions[tp] += len(stored)
+                budget -= len(stored)
+        return result
+
+    async def getmany(
+        self,
+        *partitions: TopicPartition,
+        timeout_ms: int = 0,
+        max_records: Optional[int] = None,
+    ) -> Dict[TopicPartition, List[ConsumerRecord]]:
+        if not self._started:
+            raise RuntimeError("Consumer is not started")
+        await self._sync_assignment()
+        targets = partitions or self._assignment
+        result = self._collect(targets, max_records)
+        if not result and timeout_ms:
+            await self.broker.wait_for_data(timeout_ms / 1000)
+            await self._sync_assignment()
+            result = self._collect(partitions or self._assignment, max_records)
+        if not result:
+            # Let other tasks run, as a network round trip would
+            await asyncio.sleep(0)
+        return result
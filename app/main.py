@@ -1,23 +1,63 @@
 # app/main.py
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from app.core.config import settings
 from app.api.v1.routes.api import api_router
 from app.database.connection import engine, Base
+from app.kafka.consumer.order_consumer import kafka_consumer
+from app.kafka.producer import kafka_producer
+from app.middleware import (
+    AuthContextMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    QueryStatsMiddleware,
+    RateLimitMiddleware,
+    RequestIdMiddleware,
+    ServerTimingMiddleware,
+)
 from app.models import *
+from app.utils.hashing import password_hasher
+from app.utils.logger import logger, setup_logging, shutdown_logging
+from app.utils.loop_monitor import loop_monitor
+from app.utils.metrics import register_runtime_metrics, registry
+from app.utils.revocation import token_revocations
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    setup_logging()
+    if settings.METRICS_ENABLED:
+        register_runtime_metrics()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    await token_revocations.start()
+    await kafka_producer.start(settings.kafka_warmup_topics)
+    app.state.consumer_task = None
+    if settings.KAFKA_CONSUMER_IN_APP:
+        app.state.consumer_task = asyncio.create_task(kafka_consumer.consume_orders())
     yield
-    # Shutdown
+    # Shutdown: the consumer first, it may still publish to the DLQ
+    if app.state.consumer_task is not None:
+        kafka_consumer.stop()
+        try:
+            await asyncio.wait_for(app.state.consumer_task, settings.KAFKA_SHUTDOWN_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            logger.warning("Order consumer did not stop in time, uncommitted records will be redelivered")
+        except Exception as e:
+            logger.error("Order consumer failed: %r", e)
+    await kafka_producer.close(timeout=settings.KAFKA_SHUTDOWN_TIMEOUT_S)
+    password_hasher.shutdown()
+    await token_revocations.stop()
     await engine.dispose()
+    await loop_monitor.stop()
+    shutdown_logging()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -28,7 +68,17 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Middleware
+# Middleware, innermost first
+# Profiling needs the auth context to check for admins
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+if settings.DB_QUERY_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+# Rate limiting runs inside CORS so 429 responses still get CORS headers, and
+# inside the auth context so it reuses the decoded token
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+app.add_middleware(AuthContextMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
@@ -36,6 +86,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outside the auth context, whose token decode it times
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+# Routing fills in the route template on the shared scope, so metrics can sit
+# outside rate limiting and count the 429s too (as "unmatched")
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+# Outermost, so every log line of the request, CORS included, carries its id
+app.add_middleware(RequestIdMiddleware)
 
 # Exception handlers
 @app.exception_handler(RequestValidationError)
@@ -64,6 +123,27 @@ app.include_router(
 async def health_check():
     return {"status": "healthy"}
 
+# Readiness: only route traffic here once Kafka is warmed up
+@app.get("/ready")
+async def readiness_check(request: Request):
+    checks = {"kafka_producer": kafka_producer.ready}
+    if not kafka_producer.ready:
+        # The broker may have been down at boot; without traffic nothing else reconnects
+        kafka_producer.retry_start(settings.kafka_warmup_topics)
+    consumer_task = getattr(request.app.state, "consumer_task", None)
+    if consumer_task is not None:
+        checks["kafka_consumer"] = not consumer_task.done()
+    ready = all(checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", "checks": checks}
+    )
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -71,4 +151,4 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG
-    )
\ No newline at end of file
+    )
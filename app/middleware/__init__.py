@@ -0,0 +1,17 @@
+from app.middleware.auth_context import AuthContextMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.request_id import RequestIdMiddleware
+from app.middleware.server_timing import ServerTimingMiddleware
+
+__all__ = [
+    "AuthContextMiddleware",
+    "MetricsMiddleware",
+    "ProfilingMiddleware",
+    "QueryStatsMiddleware",
+    "RateLimitMiddleware",
+    "RequestIdMiddleware",
+    "ServerTimingMiddleware",
+]
@@ -0,0 +1,52 @@
+import time
+from typing import Any, Dict, Optional
+from fastapi import HTTPException
+from app.utils.auth_context import AuthContext, reset_auth_context, set_auth_context
+from app.utils.server_timing import request_timings
+
+
+def bearer_token(scope: Dict[str, Any]) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            return token.strip() or None
+    return None
+
+
+class AuthContextMiddleware:
+    """
+    ASGI middleware decoding the bearer token once per request.
+
+    The result goes into the request's AuthContext, where get_current_user,
+    require_roles, the rate limiter and services pick it up. An invalid token
+    is not rejected here: the error is kept and raised by the dependencies of
+    routes that require authentication, so public routes are unaffected.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = AuthContext(token=bearer_token(scope))
+        if context.token:
+            from app.utils.auth import auth_utils
+            timings = request_timings.get()
+            started = time.perf_counter() if timings is not None else 0.0
+            try:
+                context.payload = auth_utils.decode_token(context.token, verify_type="access")
+            except HTTPException as e:
+                context.error = e
+            if timings is not None:
+                timings.add("auth", (time.perf_counter() - started) * 1000)
+
+        reset = set_auth_context(context)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_auth_context(reset)
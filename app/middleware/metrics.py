@@ -0,0 +1,39 @@
+import time
+from app.utils.metrics import http_request_duration, http_requests, http_requests_in_progress
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, status codes and latency.
+
+    Requests are labelled with the route template ("/api/v1/products/{product_id}")
+    that FastAPI leaves in the scope, so the number of series stays bounded;
+    requests matching no route are grouped under "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.dec()
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            http_request_duration.observe(labels, time.perf_counter() - started)
+            http_requests.inc(labels + (str(status),))
@@ -0,0 +1,116 @@
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from app.core.config import settings
+from app.utils.auth_context import get_auth_context
+from app.utils.logger import logger
+from app.utils.profiling import new_profile, profile_budget, profile_store, stack_sampler
+
+
+def parse_sample_paths(spec: str) -> List[Tuple[Optional[str], str]]:
+    """Parse "[METHOD ]prefix" items separated by commas."""
+    paths = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        method, _, prefix = item.rpartition(" ")
+        paths.append((method.upper() or None, prefix))
+    return paths
+
+
+def profile_requested(scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile":
+            return value.strip() not in (b"", b"0", b"false")
+    query = scope.get("query_string", b"")
+    if b"profile" in query:
+        return parse_qs(query.decode("latin-1")).get("profile", ["0"])[-1] not in ("", "0", "false")
+    return False
+
+
+async def is_admin() -> bool:
+    """Whether the request's token belongs to an admin, checked with the same dependencies as admin routes."""
+    from app.database.connection import AsyncSessionLocal
+    from app.utils.auth import auth_utils
+
+    context = get_auth_context()
+    if context is None or context.token is None:
+        return False
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=context.token)
+    try:
+        # The session only connects if the principal is not cached yet
+        async with AsyncSessionLocal() as db:
+            principal = await auth_utils.get_current_user(credentials, db)
+        await auth_utils.require_roles(["admin"])(current_user=principal)
+    except HTTPException:
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware running selected requests under the stack sampler.
+
+    A request is profiled when an admin asks for it with an X-Profile: 1
+    header or a profile=1 query parameter (its response then carries
+    X-Profile-Id), or as one in `sample_every` requests to `sample_paths`.
+    Either way at most PROFILING_MAX_PER_MINUTE requests per minute are
+    profiled. Profiles go to profile_store, served by the admin endpoints.
+    Must run inside AuthContextMiddleware.
+    """
+
+    def __init__(self, app, sample_every: Optional[int] = None, sample_paths: Optional[str] = None):
+        self.app = app
+        self.sample_every = settings.PROFILING_SAMPLE_EVERY if sample_every is None else sample_every
+        self.sample_paths = parse_sample_paths(
+            settings.PROFILING_SAMPLE_PATHS if sample_paths is None else sample_paths
+        )
+        self._seen: Dict[Tuple[Optional[str], str], int] = {}
+
+    def _sampled(self, method: str, path: str) -> bool:
+        if self.sample_every <= 0:
+            return False
+        for target in self.sample_paths:
+            if (target[0] is None or target[0] == method) and path.startswith(target[1]):
+                self._seen[target] = self._seen.get(target, 0) + 1
+                return self._seen[target] % self.sample_every == 0
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        reason = None
+        if profile_requested(scope) and await is_admin():
+            reason = "requested"
+        elif self._sampled(method, path):
+            reason = "sampled"
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+        if not profile_budget.acquire():
+            logger.info("Profiling budget exhausted, not profiling %s %s", method, path)
+            await self.app(scope, receive, send)
+            return
+
+        profile = new_profile(method, path, reason)
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                if reason == "requested":
+                    message = {**message, "headers": list(message.get("headers", ())) + [(b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        started = time.perf_counter()
+        stack_sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            stack_sampler.stop(profile)
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            profile.route = route.path if route is not None else None
+            profile_store.add(profile)
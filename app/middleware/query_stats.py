@@ -0,0 +1,59 @@
+from app.core.config import settings
+from app.database.instrumentation import QueryStats, query_stats
+from app.utils.logger import logger
+from app.utils.metrics import registry
+
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "SQL statements run per request, by route template", ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+db_n_plus_one = registry.counter(
+    "db_n_plus_one_total", "Requests repeating one statement shape more than DB_N_PLUS_ONE_THRESHOLD times", ("route",)
+)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware collecting the SQL statements of each request.
+
+    Gives the request a fresh QueryStats that the engine events fill in, then
+    records the query count per route and flags requests that repeated one
+    statement shape more than `threshold` times, the usual sign of a query
+    per item of a list (N+1) that a join or IN query would replace.
+    """
+
+    def __init__(self, app, threshold: int = None):
+        self.app = app
+        self.threshold = settings.DB_N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            query_stats.reset(token)
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            db_queries_per_request.observe((route,), stats.count)
+            repeated = stats.repeated(self.threshold)
+            if repeated:
+                db_n_plus_one.inc((route,))
+                shape, count = repeated[0]
+                logger.warning(
+                    "Likely N+1 queries on %s %s: statement run %d times: %s",
+                    scope["method"],
+                    route,
+                    count,
+                    shape,
+                    extra={"db_queries": stats.count, "db_ms": round(stats.total_ms, 2)},
+                )
+            elif stats.count:
+                logger.debug(
+                    "%s %s ran %d queries in %.1fms, slowest %.1fms",
+                    scope["method"], route, stats.count, stats.total_ms, stats.slowest_ms
+                )
@@ -0,0 +1,282 @@
+import json
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from app.core.config import settings
+from app.middleware.auth_context import bearer_token
+from app.utils.auth_context import get_auth_context
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - in requirements.txt, only needed with RATE_LIMIT_BACKEND=redis
+    redis = None
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """`limit` requests per `window` seconds, per client IP or per authenticated user."""
+    path_prefix: str
+    limit: int
+    window: float
+    per: str = "ip"  # "ip" or "user"
+    method: Optional[str] = None
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.method is None or self.method == method) and path.startswith(self.path_prefix)
+
+    @property
+    def name(self) -> str:
+        return f"{self.method or '*'} {self.path_prefix} {self.limit}/{self.window:g}s per {self.per}"
+
+
+def parse_policies(spec: str) -> List[RateLimitPolicy]:
+    """Parse "[METHOD ]prefix=limit/seconds[:ip|user]" items separated by commas."""
+    policies = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        target, _, rule = item.partition("=")
+        method, _, prefix = target.strip().rpartition(" ")
+        rate, _, per = rule.partition(":")
+        limit, _, window = rate.partition("/")
+        per = per.strip() or "ip"
+        if per not in ("ip", "user"):
+            raise ValueError(f"Invalid rate limit scope {per!r} in {item!r}, expected ip or user")
+        policies.append(RateLimitPolicy(
+            path_prefix=prefix,
+            limit=int(limit),
+            window=float(window or 60),
+            per=per,
+            method=method.upper() or None,
+        ))
+    return policies
+
+
+# A request's limits: (key, limit, window seconds) of every policy it falls under
+Limits = List[Tuple[str, int, float]]
+
+
+class MemoryRateLimitStore:
+    """
+    Sliding window counters in process memory.
+
+    Each key keeps the count of the current fixed window and of the previous
+    one; the previous count is weighted by how much of it still overlaps the
+    sliding window. That is O(1) time and space per key, at the cost of assuming
+    requests were spread evenly over the previous window. Keys live in an LRU
+    bounded to `max_keys`, so idle clients are evicted first.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> (window index, current count, previous count)
+        self._counters: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+
+    async def hit(self, limits: Limits, now: float) -> List[Tuple[bool, int, float]]:
+        """
+        Count a request against every limit, or against none if any is exhausted.
+
+        Returns (allowed, remaining, seconds until a slot frees up) per limit,
+        where allowed tells whether that limit had room. No await happens in
+        between, so the check and the count are atomic within the process.
+        """
+        windows = []
+        for key, limit, window in limits:
+            index = int(now // window)
+            current_index, current, previous = self._counters.get(key, (index, 0, 0))
+            if current_index != index:
+                previous = current if current_index == index - 1 else 0
+                current = 0
+            elapsed = (now % window) / window
+            windows.append((index, current, previous, previous * (1 - elapsed) + current))
+        admitted = all(estimate < limit for (_, limit, _), (*_, estimate) in zip(limits, windows))
+
+        results = []
+        for (key, limit, window), (index, current, previous, estimate) in zip(limits, windows):
+            allowed = estimate < limit
+            if admitted:
+                current += 1
+                estimate += 1
+            self._counters[key] = (index, current, previous)
+            self._counters.move_to_end(key)
+            results.append((allowed, max(0, int(limit - estimate)), window - now % window))
+        while len(self._counters) > self.max_keys:
+            self._counters.popitem(last=False)
+        return results
+
+
+# Same algorithm as MemoryRateLimitStore, atomically on Redis. KEYS holds the current and
+# previous window key of each limit, ARGV its limit, elapsed window fraction and TTL in ms.
+# Returns {0, index of the exhausted limit} or {1, remaining of each limit...}.
+_REDIS_SLIDING_WINDOW = """
+local estimates = {}
+for i = 1, #KEYS / 2 do
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    estimates[i] = previous * (1 - tonumber(ARGV[3 * i - 1])) + current
+    if estimates[i] >= tonumber(ARGV[3 * i - 2]) then
+        return {0, i}
+    end
+end
+local result = {1}
+for i = 1, #KEYS / 2 do
+    redis.call('INCR', KEYS[2 * i - 1])
+    redis.call('PEXPIRE', KEYS[2 * i - 1], ARGV[3 * i])
+    result[i + 1] = math.floor(tonumber(ARGV[3 * i - 2]) - estimates[i] - 1)
+end
+return result
+"""
+
+
+class RedisRateLimitStore:
+    """Sliding window counters shared by every worker through Redis."""
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis requires the redis package, install requirements.txt"
+            )
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(_REDIS_SLIDING_WINDOW)
+
+    async def hit(self, limits: Limits, now: float) -> List[Tuple[bool, int, float]]:
+        keys, args = [], []
+        for key, limit, window in limits:
+            index = int(now // window)
+            keys += [f"ratelimit:{key}:{index}", f"ratelimit:{key}:{index - 1}"]
+            args += [limit, (now % window) / window, int(window * 2000)]
+        admitted, *values = await self.script(keys=keys, args=args)
+        resets = [window - now % window for _, _, window in limits]
+        if not admitted:
+            # Only the exhausted limit is known, the script stops checking there
+            exhausted = int(values[0]) - 1
+            return [(i != exhausted, 0, reset) for i, reset in enumerate(resets)]
+        return [(True, max(0, int(remaining)), reset) for remaining, reset in zip(values, resets)]
+
+
+def create_store():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitStore(settings.RATE_LIMIT_REDIS_URL)
+    if settings.RATE_LIMIT_BACKEND != "memory":
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND {settings.RATE_LIMIT_BACKEND!r}, expected memory or redis")
+    return MemoryRateLimitStore(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying every policy that matches a request.
+
+    "ip" policies count per client address, "user" policies per token subject
+    and only apply to authenticated requests; the subject comes from the auth
+    context when AuthContextMiddleware runs before this one. A request rejected by any policy
+    gets 429 with Retry-After and counts against none of them; allowed ones carry
+    X-RateLimit-* headers of the most constrained policy.
+    """
+
+    def __init__(
+        self,
+        app,
+        policies: Optional[List[RateLimitPolicy]] = None,
+        store=None,
+        exempt_paths: Optional[List[str]] = None,
+        trust_forwarded: Optional[bool] = None
+    ):
+        self.app = app
+        self.policies = parse_policies(settings.RATE_LIMIT_POLICIES) if policies is None else policies
+        self.store = store or create_store()
+        self.exempt_paths = tuple(
+            exempt_paths if exempt_paths is not None
+            else [path.strip() for path in settings.RATE_LIMIT_EXEMPT_PATHS.split(",") if path.strip()]
+        )
+        self.trust_forwarded = settings.RATE_LIMIT_TRUST_FORWARDED if trust_forwarded is None else trust_forwarded
+
+    def client_ip(self, scope: Dict[str, Any]) -> str:
+        if self.trust_forwarded:
+            for name, value in scope.get("headers", ()):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    def user_id(scope: Dict[str, Any]) -> Optional[str]:
+        context = get_auth_context()
+        if context is not None:
+            # Already decoded by AuthContextMiddleware
+            return context.payload.get("sub") if context.payload else None
+        token = bearer_token(scope)
+        if token is None:
+            return None
+        from app.utils.auth import auth_utils
+        try:
+            # Verified tokens are cached, so this is a hash lookup in the steady state
+            return auth_utils.decode_token(token, verify_type="access").get("sub")
+        except HTTPException:
+            return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        matched: List[RateLimitPolicy] = []
+        limits: Limits = []
+        user = ...
+        for index, policy in enumerate(self.policies):
+            if not policy.matches(method, path):
+                continue
+            if policy.per == "user":
+                if user is ...:
+                    user = self.user_id(scope)
+                if user is None:
+                    continue
+                key = f"{index}:user:{user}"
+            else:
+                key = f"{index}:ip:{self.client_ip(scope)}"
+            matched.append(policy)
+            limits.append((key, policy.limit, policy.window))
+
+        if not limits:
+            await self.app(scope, receive, send)
+            return
+
+        # Counted in every window or in none, so a rejected request costs no quota elsewhere
+        results = await self.store.hit(limits, time.time())
+        for policy, (allowed, _, reset) in zip(matched, results):
+            if not allowed:
+                await self._reject(send, policy, reset)
+                return
+        remaining, reset, policy = min(
+            ((remaining, reset, policy) for policy, (_, remaining, reset) in zip(matched, results)),
+            key=lambda item: item[0]
+        )
+        extra_headers = [
+            (b"x-ratelimit-limit", str(policy.limit).encode()),
+            (b"x-ratelimit-remaining", str(remaining).encode()),
+            (b"x-ratelimit-reset", str(math.ceil(reset)).encode()),
+        ]
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", ())) + extra_headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    async def _reject(send, policy: RateLimitPolicy, reset: float) -> None:
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(reset))).encode()),
+                (b"x-ratelimit-limit", str(policy.limit).encode()),
+                (b"x-ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,60 @@
+import logging
+import re
+import time
+import uuid
+from app.utils.logger import request_id
+
+access_logger = logging.getLogger("app.access")
+
+# Ids accepted from the client, anything else is replaced by a generated one
+_VALID_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware giving every request an id for log correlation.
+
+    The id comes from the X-Request-ID header when it is sane, so a proxy's id
+    is kept, and is generated otherwise. It is available to every log record
+    of the request through the request_id contextvar, echoed in the response
+    headers, and closes the request with one access log line.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                rid = value.decode("latin-1")
+                break
+        if rid is None or not _VALID_ID.match(rid):
+            rid = uuid.uuid4().hex
+        token = request_id.set(rid)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": list(message.get("headers", ())) + [(b"x-request-id", rid.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if access_logger.isEnabledFor(logging.INFO):
+                access_logger.info(
+                    "%s %s %d",
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    extra={"duration_ms": round((time.perf_counter() - started) * 1000, 2)},
+                )
+            request_id.reset(token)
@@ -0,0 +1,56 @@
+import time
+from app.database.instrumentation import query_stats
+from app.utils.server_timing import RequestTimings, request_timings
+
+# Phases in header order, with their devtools descriptions
+PHASES = (
+    ("auth", "Token decode and user lookup"),
+    ("handler", "Endpoint"),
+    ("render", "Serialization"),
+)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware adding a Server-Timing header, shown by browser devtools.
+
+    Phases are filled in by hooks that only run while a request is timed: the
+    token decode and get_current_user ("auth"), the SQL statements of the
+    request ("db", from its QueryStats), the endpoint itself ("handler"), its
+    serialization ("render", see TimedRoute) and "total", everything up to the
+    response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                metrics = [
+                    f'{name};dur={timings.phases[name]:.2f};desc="{desc}"'
+                    for name, desc in PHASES if name in timings.phases
+                ]
+                # Still set here: the response starts inside the inner middlewares
+                stats = query_stats.get()
+                if stats is not None and stats.count:
+                    metrics.append(f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"')
+                metrics.append(f'total;dur={(time.perf_counter() - started) * 1000:.2f}')
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", ())) + [(b"server-timing", ", ".join(metrics).encode())],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timings.reset(token)
@@ -12,6 +12,13 @@ class UserRole(enum.Enum):
     CUSTOMER = "customer"
     STAFF = "staff"
 
+class OrderStatus(enum.Enum):
+    CREATED = "created"
+    PAID = "paid"
+    SHIPPED = "shipped"
+    DELIVERED = "delivered"
+    CANCELLED = "cancelled"
+
 from sqlalchemy.dialects.postgresql import ENUM
 role_type = ENUM('admin', 'customer', 'staff', name='userrole', create_type=False)
 
@@ -89,6 +96,7 @@ class Order(Base):
     total = Column(Float, nullable=False)
     is_paid = Column(Boolean, default=False)
     is_shipped = Column(Boolean, default=False)
+    status = Column(String(20), nullable=False, default=OrderStatus.CREATED.value, index=True)
     created_at = Column(DateTime, default=datetime.now)
     
     user = relationship("User", back_populates="orders")
@@ -125,3 +133,14 @@ class Review(Base):
     
     def __repr__(self):
         return f"<Review {self.id}>"
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(Integer, nullable=True, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken {self.jti}>"
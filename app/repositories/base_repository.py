@@ -119,10 +119,10 @@ class BaseRepository(Generic[T]):
         
     async def commit(self) -> bool:
         try:
-            self.db.commit()
+            await self.db.commit()
             return True
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             raise e
         
     async def search(
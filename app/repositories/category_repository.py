@@ -1,4 +1,5 @@
 from typing import List, Optional, Dict, Any
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.models.model import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate
@@ -10,31 +11,44 @@ class CategoryRepository(BaseRepository[Category]):
 
     async def get_by_slug(self, slug: str) -> Optional[Category]:
         """Get category by slug."""
-        return self.db.query(self.model).filter(self.model.slug == slug).first()
+        return await self.get_by_field("slug", slug)
 
     async def get_with_children(self, category_id: int) -> Optional[Category]:
         """Get category with all children."""
-        return (
-            self.db.query(self.model)
-            .filter(self.model.id == category_id)
-            .first()
-        )
+        return await self.get(category_id)
 
     async def get_root_categories(self) -> List[Category]:
         """Get all root categories (no parent)."""
-        return (
-            self.db.query(self.model)
-            .filter(self.model.parent_id.is_(None))
-            .all()
-        )
+        result = await self.db.execute(select(self.model).where(self.model.parent_id.is_(None)))
+        return result.scalars().all()
 
     async def get_children(self, category_id: int) -> List[Category]:
         """Get all children of a category."""
-        return (
-            self.db.query(self.model)
-            .filter(self.model.parent_id == category_id)
-            .all()
+        result = await self.db.execute(select(self.model).where(self.model.parent_id == category_id))
+        return result.scalars().all()
+
+    async def get_tree(self, category_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Categories nested under their parents, from the roots or from one category.
+
+        One query for the whole table and the nesting done in memory, instead
+        of a query per level (or per node) through the lazy children relationship.
+        """
+        result = await self.db.execute(
+            select(self.model.id, self.model.name, self.model.slug, self.model.parent_id, self.model.is_active)
+            .order_by(self.model.id)
         )
+        nodes = {row.id: {**row._asdict(), "children": []} for row in result}
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node["parent_id"])
+            if parent is not None:
+                parent["children"].append(node)
+            else:
+                roots.append(node)
+        if category_id is not None:
+            return [nodes[category_id]] if category_id in nodes else []
+        return roots
 
     async def move_to_category(self, category_id: int, new_parent_id: Optional[int]) -> bool:
         """Move category to a new parent."""
@@ -47,4 +61,4 @@ class CategoryRepository(BaseRepository[Category]):
             return False
         except Exception:
             await self.rollback()
-            return False
\ No newline at end of file
+            return False
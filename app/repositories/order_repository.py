@@ -1,5 +1,5 @@
-from typing import List, Optional, Dict, Any
-from sqlalchemy import select
+from typing import List, Optional, Dict, Any, Iterable
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from app.models.model import Order
 from app.repositories.base_repository import BaseRepository
@@ -7,3 +7,33 @@ from app.repositories.base_repository import BaseRepository
 class OrderRepository(BaseRepository[Order]):
     def __init__(self, db: Session):
         super().__init__(db)
+
+    async def bulk_update_status(
+        self,
+        order_ids: Iterable[int],
+        status: str,
+        values: Optional[Dict[str, Any]] = None
+    ) -> Dict[int, str]:
+        """
+        Set the status (and other values) of many orders in one UPDATE statement.
+
+        The rows are locked and their previous status read in the same
+        statement, so callers can act on the transition actually made.
+        Does not commit, so several updates can share one transaction.
+        Returns order id -> status before the update, for the orders that exist.
+        """
+        previous = (
+            select(self.model.id, self.model.status)
+            .where(self.model.id.in_(list(order_ids)))
+            .with_for_update()
+            .subquery()
+        )
+        stmt = (
+            update(self.model)
+            .where(self.model.id == previous.c.id)
+            .values(status=status, **(values or {}))
+            .returning(self.model.id, previous.c.status)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return {order_id: before for order_id, before in result.all()}
@@ -1,6 +1,7 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable
+from sqlalchemy import select, update, func
 from sqlalchemy.orm import Session
-from app.models.model import Product
+from app.models.model import Product, OrderItem
 from app.repositories.base_repository import BaseRepository
 
 class ProductRepository(BaseRepository[Product]):
@@ -32,4 +33,32 @@ class ProductRepository(BaseRepository[Product]):
             filters=filters,
             skip=skip,
             limit=limit
-        )
\ No newline at end of file
+        )
+
+    async def adjust_stock_for_orders(self, order_ids: Iterable[int], direction: int) -> None:
+        """
+        Move stock by the quantities ordered in the given orders, in one UPDATE.
+
+        direction=-1 reserves stock (order paid), direction=1 restores it (order cancelled).
+        Does not commit.
+        """
+        order_ids = list(order_ids)
+        ordered = (
+            select(func.sum(OrderItem.quantity))
+            .where(
+                OrderItem.product_id == self.model.id,
+                OrderItem.order_id.in_(order_ids)
+            )
+            .scalar_subquery()
+        )
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.id.in_(
+                    select(OrderItem.product_id).where(OrderItem.order_id.in_(order_ids))
+                )
+            )
+            .values(stock=self.model.stock + direction * ordered)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.execute(stmt)
@@ -12,6 +12,10 @@ class TokenPayload(BaseModel):
 
 
 
+class RefreshTokenBody(BaseModel):
+    refresh_token: str = Field(..., description="Refresh token")
+
+
 class LoginBody(BaseModel):
     email: str = Field(..., description="User email")
     password: str = Field(..., description="User password")
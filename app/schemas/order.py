@@ -23,6 +23,7 @@ class OrderResponse(OrderBase):
     items: List[OrderItemResponse]
     is_shipped: bool
     is_paid: bool
+    status: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,41 @@
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, field_validator
+from app.models.model import OrderStatus
+
+
+class OrderEvent(BaseModel):
+    order_id: int = Field(..., description="Order ID")
+    status: OrderStatus = Field(..., description="New order status")
+    customer_id: int = Field(..., description="Customer (user) ID")
+    tracking_number: Optional[str] = Field(None, description="Shipment tracking number")
+    refund_required: bool = Field(default=False, description="Refund a cancelled order")
+    model_config = ConfigDict(extra="ignore")
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def normalize_status(cls, value: Any) -> Any:
+        return value.lower() if isinstance(value, str) else value
+
+
+_order_events = TypeAdapter(List[OrderEvent])
+
+
+def validate_order_events(
+    events: List[Dict[str, Any]]
+) -> Tuple[List[OrderEvent], List[Tuple[Dict[str, Any], str]]]:
+    """
+    Validate a batch of raw order events in one pass.
+
+    Returns the valid events in their original order and the rejected raw
+    events with the validation message.
+    """
+    try:
+        return _order_events.validate_python(events), []
+    except ValidationError as e:
+        errors: Dict[int, str] = {}
+        for error in e.errors():
+            index = error["loc"][0]
+            errors.setdefault(index, f"{'.'.join(map(str, error['loc'][1:]))}: {error['msg']}")
+        valid = [events[i] for i in range(len(events)) if i not in errors]
+        rejected = [(events[i], message) for i, message in errors.items()]
+        return _order_events.validate_python(valid), rejected
@@ -1,10 +1,12 @@
 # app/services/auth_service.py
 from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from app.repositories.user_repository import UserRepository
 from app.schemas.auth import LoginBody, TokenResponse
 from app.utils.auth import auth_utils
+from app.utils.hashing import password_hasher
 
 class AuthService:
     def __init__(self, db: Session):
@@ -21,16 +23,21 @@ class AuthService:
                 detail="User not found"
             )
         
-        if not self.auth_utils.verify_password(login_data.password, user.password_hash):
+        valid, new_hash = await password_hasher.verify_and_update(login_data.password, user.password_hash)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect password"
             )
+        if new_hash:
+            # Stored hash uses an outdated cost, upgrade it while we have the password
+            user.password_hash = new_hash
+            await self.repository.commit()
 
         # Generate tokens
         access_token = self.auth_utils.create_access_token(
             subject=user.id,
-            extra_claims={"email": user.email, "role": user.role, "id": user.id}
+            extra_claims={"email": user.email, "role": user.role, "id": user.id, "active": user.is_active}
         )
         
         refresh_token = self.auth_utils.create_refresh_token(
@@ -61,7 +68,7 @@ class AuthService:
             # Generate new access token
             access_token = self.auth_utils.create_access_token(
                 subject=user.id,
-                extra_claims={"email": user.email, "role": user.role, "id": user.id}
+                extra_claims={"email": user.email, "role": user.role, "id": user.id, "active": user.is_active}
             )
 
             return TokenResponse(
@@ -77,11 +84,13 @@ class AuthService:
                 detail=f"Error refreshing token: {str(e)}"
             )
 
-    async def logout(self, token: str) -> dict:
+    async def logout(self, token: str, access_token: Optional[str] = None) -> dict:
         """Handle user logout"""
         try:
-            # Verify and blacklist both tokens
-            self.auth_utils.blacklist_token(token)
+            # Revoke both tokens
+            await self.auth_utils.revoke_token(token)
+            if access_token:
+                await self.auth_utils.revoke_token(access_token)
             return {"message": "Successfully logged out"}
             
         except Exception as e:
@@ -4,6 +4,7 @@ from app.repositories.category_repository import CategoryRepository
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
 from app.models.model import Category
 from sqlalchemy.orm import Session
+from app.utils.logger import logger
 from app.utils.text import slugify
 
 class CategoryService:
@@ -18,7 +19,7 @@ class CategoryService:
                 raise HTTPException(status_code=404, detail="Parent category not found")
 
         category_dump = category_data.model_dump()
-        print("category_name", category_data.name)
+        logger.debug("Creating category %s", category_data.name)
         category_dump["slug"] = slugify(category_data.name)
         return await self.repository.create(category_dump)
 
@@ -95,8 +96,9 @@ class CategoryService:
             
         return await self.repository.delete(category_id)
 
-    async def get_category_tree(self, category_id: Optional[int] = None) -> List[Category]:
+    async def get_category_tree(self, category_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get category tree starting from given category or root."""
-        if category_id:
-            return await self.repository.get_with_children(category_id)
-        return await self.repository.get_root_categories()
\ No newline at end of file
+        tree = await self.repository.get_tree(category_id)
+        if category_id and not tree:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return tree
\ No newline at end of file
@@ -1,18 +1,12 @@
-from typing import Dict, Any
-from app.models import Order
+from typing import Dict, Any, List
+from pydantic import ValidationError
 from app.services.order.order_service import OrderService
-from app.database.connection import get_db
+from app.database.connection import AsyncSessionLocal
+from app.models.model import OrderStatus
+from app.schemas.order_event import OrderEvent, validate_order_events
 from app.utils.logger import logger
-from enum import Enum
 import asyncio
 
-class OrderStatus(Enum):
-    CREATED = "created"
-    PAID = "paid"
-    SHIPPED = "shipped"
-    DELIVERED = "delivered"
-    CANCELLED = "cancelled"
-
 async def process_order(order_data: Dict[str, Any]):
     """
     Process order messages from Kafka
@@ -20,67 +14,96 @@ async def process_order(order_data: Dict[str, Any]):
         order_data: Dictionary containing order information
     """
     try:
-        # Validate required fields
-        required_fields = ["order_id", "status", "customer_id"]
-        if not all(field in order_data for field in required_fields):
-            logger.error(f"Missing required fields in order data: {order_data}")
+        try:
+            event = OrderEvent.model_validate(order_data)
+        except ValidationError as e:
+            logger.error(f"Invalid order event {order_data}: {e}")
             return
 
-        order_id = order_data["order_id"]
-        status = order_data["status"]
-        
+        order_id = event.order_id
+        new_status = event.status
+
         # Get database session
-        async with get_db() as db:
+        async with AsyncSessionLocal() as db:
             order_service = OrderService(db)
-            
-            # Get existing order
-            order = await order_service.get_order(order_id)
-            if not order:
+
+            # Status and stock change in one transaction, a crash cannot leave one without the other
+            previous = await order_service.apply_status_batch({order_id: new_status})
+            if order_id not in previous:
                 logger.error(f"Order not found: {order_id}")
                 return
+            logger.info("Updated order %s status to %s", order_id, new_status.value)
 
-            # Update order status
-            try:
-                new_status = OrderStatus(status.lower())
-                await order_service.update_order_status(order_id, new_status)
-                logger.info(f"Updated order {order_id} status to {new_status.value}")
-
-                # Handle status-specific actions
-                if new_status == OrderStatus.PAID:
-                    await _handle_paid_order(order_data, order_service)
-                elif new_status == OrderStatus.SHIPPED:
-                    await _handle_shipped_order(order_data, order_service)
-                elif new_status == OrderStatus.CANCELLED:
-                    await _handle_cancelled_order(order_data, order_service)
-
-            except ValueError as e:
-                logger.error(f"Invalid order status: {status}")
-                return
+            # A redelivered event finds the status already applied and notifies no one again
+            if previous[order_id] != new_status.value:
+                await _handle_transition(event, order_service)
 
     except Exception as e:
+        # The consumer engine retries transient errors and dead-letters the rest
         logger.error(f"Error processing order: {str(e)}")
-        # Could implement retry logic here
         raise
 
-async def _handle_paid_order(order_data: Dict[str, Any], order_service: OrderService):
-    """Handle paid order specific logic"""
-    # Update inventory
-    await order_service.update_inventory(order_data["order_id"])
+async def process_order_batch(events: List[Dict[str, Any]]):
+    """
+    Process a batch of order messages from Kafka in one transaction
+    Args:
+        events: Order messages in consumption order
+
+    Events for the same order are collapsed to the final status, which is then
+    applied with one UPDATE per status. Stock follows each order's transition
+    from its stored status to the final one, so a batch replayed record by
+    record after a failure does not move stock twice. Likewise each order is
+    notified once, for its final status, and only if that status is new.
+    """
+    valid_events, rejected = validate_order_events(events)
+    for order_data, error in rejected:
+        logger.error(f"Invalid order event {order_data}: {error}")
+
+    latest: Dict[int, OrderEvent] = {}
+    for event in valid_events:
+        latest[event.order_id] = event
+
+    if not latest:
+        return
+
+    async with AsyncSessionLocal() as db:
+        order_service = OrderService(db)
+        previous = await order_service.apply_status_batch(
+            {order_id: event.status for order_id, event in latest.items()}
+        )
+        for order_id in latest.keys() - previous.keys():
+            logger.error(f"Order not found: {order_id}")
+        logger.info("Applied %d order events to %d orders", len(events), len(previous))
+
+        # Notifications run after commit
+        for order_id, event in latest.items():
+            if order_id in previous and previous[order_id] != event.status.value:
+                await _handle_transition(event, order_service)
+
+async def _handle_transition(event: OrderEvent, order_service: OrderService):
+    """Run the status-specific actions of an order that just moved to `event.status`"""
+    if event.status == OrderStatus.PAID:
+        await _handle_paid_order(event, order_service)
+    elif event.status == OrderStatus.SHIPPED:
+        await _handle_shipped_order(event, order_service)
+    elif event.status == OrderStatus.CANCELLED:
+        await _handle_cancelled_order(event, order_service)
+
+async def _handle_paid_order(event: OrderEvent, order_service: OrderService):
+    """Handle paid order specific logic, once stock is reserved"""
     # Send confirmation email
-    await order_service.send_payment_confirmation(order_data["customer_id"])
+    await order_service.send_payment_confirmation(event.customer_id)
 
-async def _handle_shipped_order(order_data: Dict[str, Any], order_service: OrderService):
+async def _handle_shipped_order(event: OrderEvent, order_service: OrderService):
     """Handle shipped order specific logic"""
     # Send tracking information
     await order_service.send_shipping_notification(
-        order_data["order_id"],
-        order_data.get("tracking_number")
+        event.order_id,
+        event.tracking_number
     )
 
-async def _handle_cancelled_order(order_data: Dict[str, Any], order_service: OrderService):
-    """Handle cancelled order specific logic"""
-    # Restore inventory
-    await order_service.restore_inventory(order_data["order_id"])
+async def _handle_cancelled_order(event: OrderEvent, order_service: OrderService):
+    """Handle cancelled order specific logic, once stock is restored"""
     # Process refund if needed
-    if order_data.get("refund_required"):
-        await order_service.process_refund(order_data["order_id"])
\ No newline at end of file
+    if event.refund_required:
+        await order_service.process_refund(event.order_id)
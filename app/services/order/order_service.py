@@ -1,16 +1,29 @@
-from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
 from fastapi import HTTPException
 from app.repositories.order_repository import OrderRepository
 from app.repositories.order_item_repository import OrderItemRepository
+from app.repositories.product_repository import ProductRepository
 from app.schemas.order import OrderCreate, OrderResponse, OrderAdminUpdate
-from app.models.model import Product
+from app.models.model import Product, OrderStatus
 from sqlalchemy.orm import Session
+from app.utils.logger import logger
+
+# Boolean flags kept in sync with the order status
+ORDER_STATUS_FLAGS: Dict[OrderStatus, Dict[str, Any]] = {
+    OrderStatus.PAID: {"is_paid": True},
+    OrderStatus.SHIPPED: {"is_shipped": True},
+    OrderStatus.DELIVERED: {"is_shipped": True},
+}
+# Statuses for which the ordered quantities are taken out of stock
+STOCK_HELD_STATUSES = {OrderStatus.PAID.value, OrderStatus.SHIPPED.value, OrderStatus.DELIVERED.value}
 
 
 class OrderService:
     def __init__(self, db: Session):
         self.repository = OrderRepository(db)
         self.order_item_repository = OrderItemRepository(db)
+        self.product_repository = ProductRepository(db)
 
     async def create_order(self, order_data: OrderCreate, user_id: int) -> OrderResponse:
         """Create a new order."""
@@ -46,6 +59,7 @@ class OrderService:
                     "total": order.total,
                     "is_paid": order.is_paid,
                     "is_shipped": order.is_shipped,
+                    "status": order.status,
                     "created_at": order.created_at,
                     "updated_at": order.updated_at,
                     "items": [{
@@ -100,3 +114,56 @@ class OrderService:
     async def search_orders(self, search_term: str) -> List[OrderResponse]:
         """Search orders."""
         return await self.repository.search_orders(search_term)
+
+    async def apply_status_batch(self, statuses: Dict[int, OrderStatus]) -> Dict[int, str]:
+        """
+        Apply final order statuses with one UPDATE per status in a single transaction.
+
+        Stock follows the transition each order actually made: it is reserved
+        when an order enters a paid status and restored when it leaves one, in
+        the same transaction. Applying a status an order already has changes
+        no stock, so redelivered or replayed events are safe.
+        Returns order id -> status before the update, for the orders that exist.
+        """
+        by_status: Dict[OrderStatus, List[int]] = defaultdict(list)
+        for order_id, status in statuses.items():
+            by_status[status].append(order_id)
+
+        updated: Dict[int, str] = {}
+        reserve: Set[int] = set()
+        restore: Set[int] = set()
+        for status, order_ids in by_status.items():
+            previous = await self.repository.bulk_update_status(
+                order_ids, status.value, ORDER_STATUS_FLAGS.get(status, {})
+            )
+            held = status.value in STOCK_HELD_STATUSES
+            for order_id, before in previous.items():
+                if held and before not in STOCK_HELD_STATUSES:
+                    reserve.add(order_id)
+                elif not held and before in STOCK_HELD_STATUSES:
+                    restore.add(order_id)
+            updated.update(previous)
+        if reserve:
+            await self.product_repository.adjust_stock_for_orders(reserve, -1)
+        if restore:
+            await self.product_repository.adjust_stock_for_orders(restore, 1)
+        await self.repository.commit()
+        return updated
+
+    async def send_payment_confirmation(self, customer_id: int) -> None:
+        """Send payment confirmation to the customer."""
+        # No notification channel is configured, keep a trace instead of dropping it silently
+        logger.warning("Payment confirmation for customer %s not sent: no notification channel", customer_id)
+
+    async def send_shipping_notification(self, order_id: int, tracking_number: Optional[str] = None) -> None:
+        """Send shipping notification with tracking information."""
+        logger.warning(
+            "Shipping notification for order %s not sent: no notification channel", order_id,
+            extra={"order_id": order_id, "tracking_number": tracking_number}
+        )
+
+    async def process_refund(self, order_id: int) -> None:
+        """Refund a cancelled order."""
+        # No payment provider is integrated, refunds have to be issued by hand
+        logger.warning("Refund required for order %s: no payment provider, refund manually", order_id,
+                       extra={"order_id": order_id, "refund_required": True})
@@ -5,6 +5,10 @@ from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserPasswordU
 from app.models.model import User
 from sqlalchemy.orm import Session
 from app.utils.auth import auth_utils
+from app.utils.auth_context import get_current_principal
+from app.utils.hashing import password_hasher
+from app.utils.logger import logger
+from app.utils.principal import principal_cache
 
 
 class UserService:
@@ -16,12 +20,12 @@ class UserService:
         """Create a new user."""
             
         object_dump = user_data.model_dump()
-        object_dump["password_hash"] = self.auth_utils.get_password_hash(user_data.password)
+        object_dump["password_hash"] = await password_hasher.hash(user_data.password)
         object_dump["role"] = user_data.role.value
         #remove password from object_dump
         del object_dump["password"]
 
-        print("object_dump", object_dump)
+        logger.debug("Creating user %s", object_dump.get("email"))
         return await self.repository.create(object_dump)
 
     async def get_users(
@@ -53,19 +57,25 @@ class UserService:
         user = await self.repository.get(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        return await self.repository.update(user, user_data.model_dump())
+        user = await self.repository.update(user, user_data.model_dump())
+        principal_cache.invalidate(user_id)
+        return user
 
     async def delete_user(self, user_id: int) -> bool:
         """Deactivate user."""
         user = await self.repository.get(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        return await self.repository.delete(user)
+        result = await self.repository.delete(user)
+        principal_cache.invalidate(user_id)
+        return result
 
     async def get_current_user(self) -> Optional[User]:
-        """Get current user profile."""
-        # This method will be implemented in the next section
-        pass
+        """Get current user profile, for the principal authenticated on this request."""
+        principal = get_current_principal()
+        if principal is None:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        return await self.get_user(principal.id)
 
     async def update_password(self, password_data: UserPasswordUpdate) -> bool:
         """Update user password."""
@@ -76,10 +86,10 @@ class UserService:
         if not password_data.new_password == password_data.confirm_password:
             raise HTTPException(status_code=400, detail="Passwords do not match")
 
-        if not user.check_password(password_data.old_password):
+        if not await password_hasher.verify(password_data.old_password, user.password_hash):
             raise HTTPException(status_code=400, detail="Invalid password")
 
-        new_password_hash = self.auth_utils.get_password_hash(password_data.new_password)
+        new_password_hash = await password_hasher.hash(password_data.new_password)
         user.password_hash = new_password_hash
         return await self.repository.commit()
         
@@ -90,7 +100,9 @@ class UserService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         user.is_active = False
-        return await self.repository.commit()
+        result = await self.repository.commit()
+        principal_cache.invalidate(user_id)
+        return result
     
     async def activate_user(self, user_id: int) -> bool:
         """Activate user."""
@@ -98,4 +110,6 @@ class UserService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         user.is_active = True
-        return await self.repository.commit()
+        result = await self.repository.commit()
+        principal_cache.invalidate(user_id)
+        return result
@@ -2,51 +2,44 @@ from datetime import datetime, timedelta, timezone
 from typing import Annotated, List, Optional, Union, Dict, Any, Set
 from fastapi.security import HTTPBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
 from pydantic import ValidationError
 from app.core.config import settings
 from app.repositories.user_repository import UserRepository
 from app.schemas.auth import TokenPayload
-from collections import defaultdict
+import hashlib
 import time
+import uuid
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
 from app.models.model import User
+from app.utils.auth_context import get_auth_context
+from app.utils.cache import TTLCache
+from app.utils.hashing import password_hasher
+from app.utils.principal import Principal, principal_cache
+from app.utils.revocation import token_revocations
+from app.utils.server_timing import request_timings
 
 bearerSchema = HTTPBearer()
 class AuthUtils:
     """Authentication utility class for token management and password hashing."""
     
     def __init__(self, db: Session = Depends(get_db)):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.pwd_context = password_hasher.context
         self.algorithm = settings.ALGORITHM
         self.secret_key = settings.SECRET_KEY
         self.access_token_expire = settings.ACCESS_TOKEN_EXPIRE_MINUTES
         self.refresh_token_expire = 60 * 24 * 7  # 7 days
-        self.token_blacklist: Dict[str, float] = {}  # token -> expiry timestamp
-        self.rate_limit_data: Dict[str, List[float]] = defaultdict(list)
-        self.rate_limit = 100  # requests per minute
-        self._clean_blacklist_interval = 3600  # 1 hour
-        self._last_cleanup = time.time()
+        # sha256 of verified tokens -> payload, kept until the token expires
+        self.verified_tokens: TTLCache[Dict[str, Any]] = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE)
         self.user_repository = UserRepository(db)
 
-    def _clean_blacklist(self) -> None:
-        """Remove expired tokens from blacklist."""
-        now = time.time()
-        if now - self._last_cleanup > self._clean_blacklist_interval:
-            self.token_blacklist = {
-                token: exp for token, exp in self.token_blacklist.items()
-                if exp > now
-            }
-            self._last_cleanup = now
-
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify a password against its hash."""
+        """Verify a password against its hash. Blocks; async code uses password_hasher."""
         return self.pwd_context.verify(plain_password, hashed_password)
 
     def get_password_hash(self, password: str) -> str:
-        """Generate password hash."""
+        """Generate password hash. Blocks; async code uses password_hasher."""
         return self.pwd_context.hash(password)
 
     def create_token(
@@ -72,7 +65,7 @@ class AuthUtils:
             "sub": str(subject),
             "type": token_type,
             "iat": datetime.utcnow(),
-            "jti": f"{token_type}-{time.time()}"
+            "jti": uuid.uuid4().hex
         }
         
         if extra_claims:
@@ -100,6 +93,10 @@ class AuthUtils:
     def decode_token(self, token: str, verify_type: Optional[str] = None) -> Dict[str, Any]:
         """
         Decode and validate JWT token.
+
+        Verified tokens are remembered until they expire, so a token seen
+        before costs a hash lookup instead of signature verification and
+        validation. Revocation and type are still checked on every call.
         
         Args:
             token: JWT token to decode
@@ -109,36 +106,39 @@ class AuthUtils:
             HTTPException: If token is invalid or expired
         """
         try:
-            self._clean_blacklist()
-
             token_str = token.credentials if hasattr(token, 'credentials') else token
-            print("token_str", token_str)
-            if token_str in self.token_blacklist:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Token has been blacklisted"
+            cache_key = hashlib.sha256(token_str.encode()).digest()
+            payload = self.verified_tokens.get(cache_key) if self.verified_tokens.maxsize else None
+
+            if payload is None:
+                payload = jwt.decode(
+                    token_str,
+                    self.secret_key,
+                    algorithms=[self.algorithm]
                 )
-            
-            payload = jwt.decode(
-                token_str,
-                self.secret_key,
-                algorithms=[self.algorithm]
-            )
-            
-            token_data = TokenPayload(**payload)
+                
+                token_data = TokenPayload(**payload)
 
-            print("token_data", token_data)
-            
-            if verify_type and payload.get("type") != verify_type:
+                if token_data.exp < datetime.utcnow().timestamp():
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="Token has expired"
+                    )
+
+                if self.verified_tokens.maxsize:
+                    self.verified_tokens.set(cache_key, payload, ttl=token_data.exp - time.time())
+
+            # Local lookup, the revocation list is synced in the background
+            if token_revocations.is_revoked(payload.get("jti")):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail=f"Invalid token type. Expected {verify_type}"
+                    detail="Token has been revoked"
                 )
             
-            if token_data.exp < datetime.utcnow().timestamp():
+            if verify_type and payload.get("type") != verify_type:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Token has expired"
+                    detail=f"Invalid token type. Expected {verify_type}"
                 )
                 
             return payload
@@ -149,32 +149,18 @@ class AuthUtils:
                 detail=f"Could not validate credentials: {str(e)}"
             )
 
-    def blacklist_token(self, token: str) -> None:
-        """Add token to blacklist with expiry."""
+    async def revoke_token(self, token: str) -> None:
+        """Revoke a token by its jti, for every worker, until it expires."""
         try:
             payload = self.decode_token(token)
-            self.token_blacklist[token] = payload["exp"]
         except HTTPException:
-            pass
-
-    async def check_rate_limit(self, request: Request) -> None:
-        """Check rate limiting for the request."""
-        now = time.time()
-        ip = request.client.host
-        
-        # Remove old requests
-        self.rate_limit_data[ip] = [
-            t for t in self.rate_limit_data[ip]
-            if now - t < 60
-        ]
-        
-        if len(self.rate_limit_data[ip]) >= self.rate_limit:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Too many requests"
+            return
+        if payload.get("jti"):
+            await token_revocations.revoke(
+                payload["jti"],
+                datetime.utcfromtimestamp(payload["exp"]),
+                int(payload["sub"]) if payload.get("sub") else None
             )
-            
-        self.rate_limit_data[ip].append(now)
 
     def get_security_headers(self) -> Dict[str, str]:
         """Get security headers for API responses."""
@@ -191,11 +177,37 @@ class AuthUtils:
         self,
         token: Annotated[str, Depends(bearerSchema)],
         db: Session = Depends(get_db),
-    ) -> User:
+    ) -> Principal:
+        """
+        Principal of the request's bearer token.
+
+        Reads the token decoded by AuthContextMiddleware and stores the
+        resolved principal back in the request's auth context, so every other
+        dependency and service of the request reuses it. Without the
+        middleware the token is decoded here.
+        """
+        timings = request_timings.get()
+        if timings is None:
+            return await self._get_current_user(token, db)
+        started = time.perf_counter()
+        try:
+            return await self._get_current_user(token, db)
+        finally:
+            timings.add("auth", (time.perf_counter() - started) * 1000)
+
+    async def _get_current_user(self, token, db: Session) -> Principal:
+        context = get_auth_context()
+        if context is not None and context.principal is not None:
+            return context.principal
 
         try:
-            # Decode and validate the token
-            payload = self.decode_token(token, verify_type="access")
+            if context is not None and context.token == token.credentials:
+                if context.error is not None:
+                    raise context.error
+                payload = context.payload
+            else:
+                # Decode and validate the token
+                payload = self.decode_token(token, verify_type="access")
             token_data = TokenPayload(**payload)
             
             if not token_data.sub:
@@ -204,18 +216,23 @@ class AuthUtils:
                     detail="Could not validate credentials"
                 )
 
-            # Get user from database
-            user_repository = UserRepository(db)
-            #Convert token_data.sub to int
-            id = int(token_data.sub)
-
-            user = await user_repository.get(id)
-            print("user", user)
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="User not found"
-                )
+            # Recent tokens carry role and active claims that can be trusted as is
+            user = principal_cache.from_trusted_claims(payload)
+            if user is None:
+                #Convert token_data.sub to int
+                id = int(token_data.sub)
+                user = principal_cache.get(id)
+            if user is None:
+                # Get user from database
+                user_repository = UserRepository(db)
+                db_user = await user_repository.get(id)
+                if not db_user:
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="User not found"
+                    )
+                user = Principal.from_user(db_user)
+                principal_cache.set(user)
                 
             # Check if user is active
             if not user.is_active:
@@ -223,7 +240,9 @@ class AuthUtils:
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Inactive user"
                 )
-                    
+
+            if context is not None:
+                context.principal = user
             return user
             
         except (JWTError, ValidationError) as e:
@@ -235,8 +254,8 @@ class AuthUtils:
     # Helper decorator for role-based access control
     def require_roles(self, allowed_roles: Set[str]):
         async def role_checker(
-            current_user: User = Depends(self.get_current_user)
-        ) -> User:
+            current_user: Principal = Depends(self.get_current_user)
+        ) -> Principal:
             if current_user.role not in allowed_roles:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,44 @@
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from fastapi import HTTPException
+from app.utils.principal import Principal
+
+
+@dataclass
+class AuthContext:
+    """
+    Authentication state of the current request.
+
+    Filled once by AuthContextMiddleware: the bearer token, its decoded payload
+    or the error decoding it raised, and the principal once a dependency has
+    resolved it. Everything later in the request reads it from here instead of
+    decoding the token again.
+    """
+    token: Optional[str] = None
+    payload: Optional[Dict[str, Any]] = None
+    error: Optional[HTTPException] = None
+    principal: Optional[Principal] = None
+
+
+# Each request runs in its own task with a copy of the context, so concurrent
+# requests never see each other's value
+_auth_context: ContextVar[Optional[AuthContext]] = ContextVar("auth_context", default=None)
+
+
+def get_auth_context() -> Optional[AuthContext]:
+    return _auth_context.get()
+
+
+def set_auth_context(context: Optional[AuthContext]) -> Token:
+    return _auth_context.set(context)
+
+
+def reset_auth_context(token: Token) -> None:
+    _auth_context.reset(token)
+
+
+def get_current_principal() -> Optional[Principal]:
+    """Principal of the current request, once get_current_user has resolved it."""
+    context = _auth_context.get()
+    return context.principal if context is not None else None
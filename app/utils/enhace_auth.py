@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Dict, List, Optional, Type, TypeVar, Union
@@ -157,11 +158,16 @@ class TokenService:
                 detail="Could not validate credentials"
             )
 
+_current_context: ContextVar[Optional[UserContextModel]] = ContextVar("user_context", default=None)
+
+
 class UserContextManager:
     """
     Advanced user context management with dependency injection
+
+    The context lives in a ContextVar, so each request (task) sees its own
+    user instead of whichever request set it last.
     """
-    _current_context: Optional[UserContextModel] = None
     
     @classmethod
     def set_context(cls, context: Optional[UserContextModel]) -> None:
@@ -170,7 +176,7 @@ class UserContextManager:
         
         :param context: User context to set
         """
-        cls._current_context = context
+        _current_context.set(context)
 
     @classmethod
     def get_context(cls) -> Optional[UserContextModel]:
@@ -179,7 +185,7 @@ class UserContextManager:
         
         :return: Current user context or None
         """
-        return cls._current_context
+        return _current_context.get()
 
     @classmethod
     def require_context(cls) -> UserContextModel:
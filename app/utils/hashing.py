@@ -0,0 +1,104 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.core.config import settings
+
+
+@lru_cache(maxsize=None)
+def get_context(rounds: int) -> CryptContext:
+    # Hashes with another cost are still verified and reported by needs_update
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds, deprecated="auto")
+
+
+# Module level so they can run in a process pool
+def _hash(password: str, rounds: int) -> str:
+    return get_context(rounds).hash(password)
+
+
+def _verify(password: str, password_hash: str, rounds: int) -> bool:
+    return get_context(rounds).verify(password, password_hash)
+
+
+def _verify_and_update(password: str, password_hash: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return get_context(rounds).verify_and_update(password, password_hash)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a dedicated, bounded executor.
+
+    A bcrypt call takes 100-300ms of CPU; done inline it stalls every other
+    request of the worker. Calls run on their own pool instead, threads by
+    default (bcrypt releases the GIL) or processes. When more than `max_pending`
+    calls are queued or running, new ones are rejected with 429 rather than
+    queued, so a login storm cannot build an unbounded backlog.
+    """
+
+    def __init__(
+        self,
+        rounds: int = 12,
+        executor: str = "thread",
+        workers: int = 0,
+        max_pending: int = 64
+    ):
+        self.rounds = rounds
+        self.executor_type = executor
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def context(self) -> CryptContext:
+        return get_context(self.rounds)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many authentication requests, retry shortly",
+                headers={"Retry-After": "1"}
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args, self.rounds)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(_verify, password, password_hash)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """Verify, and return a new hash when the stored one uses an outdated cost."""
+        return await self._run(_verify_and_update, password, password_hash)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
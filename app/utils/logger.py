@@ -0,0 +1,156 @@
+import copy
+import json
+import logging
+import queue
+import sys
+import traceback
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger("app")
+
+# Id of the request being handled, set by RequestIdMiddleware
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not user supplied `extra` fields
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with `extra` fields and the request id."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not getattr(record, "request_id", None):
+            record.request_id = "-"
+        return super().format(record)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without ever waiting.
+
+    The record is made self contained in the calling thread: the message is
+    rendered, the request id captured from the context and the traceback
+    turned into text, since none of them are available later on the listener
+    thread. When the queue is full the record is dropped and counted rather
+    than blocking the event loop on a slow stream.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Other handlers may still see the original record
+        record = copy.copy(record)
+        record.request_id = request_id.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """Parse "logger=LEVEL" items separated by commas, e.g. "app.kafka=WARNING,sqlalchemy.engine=INFO"."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            raise ValueError(f"Invalid log level {level!r} in {item!r}")
+        levels[name.strip()] = value
+    return levels
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Blocks until the writer makes room, only ever called on shutdown
+        self.queue.put(self._sentinel)
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    levels: Optional[str] = None,
+    fmt: Optional[str] = None,
+    queue_size: Optional[int] = None,
+    stream=None
+) -> NonBlockingQueueHandler:
+    """
+    Route every log record through a queue to a background writer thread.
+
+    Request handlers only pay for the level check and for putting the record
+    on the queue; formatting and the write happen on the listener thread.
+    Calling it again replaces the previous configuration.
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if (fmt or settings.LOG_FORMAT) == "json" else TextFormatter())
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE if queue_size is None else queue_size)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _listener = _Listener(log_queue, output, respect_handler_level=False)
+
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler)]:
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level or settings.LOG_LEVEL)
+    for name, value in parse_levels(settings.LOG_LEVELS if levels is None else levels).items():
+        logging.getLogger(name).setLevel(value)
+
+    _listener.start()
+    return _queue_handler
+
+
+def shutdown_logging() -> None:
+    """Write out what is still queued and stop the writer thread."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        if _queue_handler.dropped:
+            sys.stderr.write(f"{_queue_handler.dropped} log records dropped, queue full\n")
+        _queue_handler = None
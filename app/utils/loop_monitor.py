@@ -0,0 +1,127 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from app.core.config import settings
+from app.utils.benchmark import percentile
+from app.utils.logger import logger
+from app.utils.metrics import registry
+
+LAG_QUANTILES = (50, 90, 99, 100)
+
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag and catches what blocks the loop.
+
+    A task wakes up every `interval` seconds and records how late it woke: the
+    lag every other coroutine on the loop is seeing at that moment. A watchdog
+    thread checks the task's heartbeat; when a wake-up is overdue by more than
+    `threshold`, the loop is stuck in synchronous code and the watchdog
+    captures the loop thread's stack while it is still blocked, which is the
+    call to move off the loop (bcrypt, regexes on big inputs, sync DB calls).
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1, window: int = 1000, keep: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: Deque[float] = deque(maxlen=window)
+        self.blocked: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.blocked_count = 0
+        self._expected_at = 0.0
+        self._reported_for = 0.0
+        self._thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def quantiles(self) -> Dict[tuple, float]:
+        values = sorted(self.lags)
+        if not values:
+            return {}
+        return {(f"{q / 100:g}",): percentile(values, q) for q in LAG_QUANTILES}
+
+    async def _run(self) -> None:
+        while True:
+            self._expected_at = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._expected_at)
+            self.lags.append(lag)
+            event_loop_lag.observe((), lag)
+            if lag > self.threshold:
+                logger.warning("Event loop was blocked for %.0fms", lag * 1000, extra={"lag_ms": round(lag * 1000, 1)})
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.threshold / 2):
+            expected_at = self._expected_at
+            overdue = time.monotonic() - expected_at
+            if overdue <= self.threshold or expected_at == self._reported_for:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            # One report per stall, with the stack of the code still holding the loop
+            self._reported_for = expected_at
+            self.blocked_count += 1
+            stack = "".join(traceback.format_stack(frame))
+            self.blocked.append({"at": time.time(), "blocked_ms": round(overdue * 1000, 1), "stack": stack})
+            logger.warning(
+                "Event loop blocked for %.0fms so far, in:\n%s", overdue * 1000, stack,
+                extra={"blocked_ms": round(overdue * 1000, 1)}
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        values = sorted(self.lags)
+        return {
+            "samples": len(values),
+            "lag_ms": {f"p{q}": round(percentile(values, q) * 1000, 2) for q in LAG_QUANTILES} if values else {},
+            "blocked": self.blocked_count,
+        }
+
+    def recent_blocks(self) -> List[Dict[str, Any]]:
+        return list(reversed(self.blocked))
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._thread_id = threading.get_ident()
+        self._expected_at = time.monotonic() + self.interval
+        self._task = asyncio.create_task(self._run())
+        self._stopping.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog.join()
+        self._watchdog = None
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+    threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000,
+)
+registry.gauge(
+    "event_loop_lag_quantile_seconds", "Event loop lag percentiles over the recent window", ("quantile",),
+    collect=loop_monitor.quantiles
+)
+registry.counter(
+    "event_loop_blocked_total", "Times the event loop was blocked longer than LOOP_BLOCK_THRESHOLD_MS",
+    collect=lambda: {(): loop_monitor.blocked_count}
+)
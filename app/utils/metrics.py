@@ -0,0 +1,202 @@
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Labels = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Base for metrics keyed by a tuple of label values.
+
+    Updates are plain dict operations with no locking: they happen on the
+    event loop thread, and rendering only reads. A `collect` callback makes
+    the metric computed at scrape time instead, for values that already live
+    elsewhere (pool sizes, cache stats), at no cost on the request path.
+    """
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[Labels, float]]] = None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self.values: Dict[Labels, float] = {}
+
+    def samples(self) -> Iterable[Tuple[str, Labels, str, float]]:
+        values = self.collect() if self.collect is not None else self.values
+        for labels, value in values.items():
+            yield self.name, labels, "", value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, extra, value in self.samples():
+            lines.append(f"{name}{_format_labels(self.labelnames, labels, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, labels: Labels = (), value: float = 0) -> None:
+        self.values[labels] = value
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    """Bucketed observations; buckets are stored non-cumulative and summed when rendered."""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self.series: Dict[Labels, List[float]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterable[Tuple[str, Labels, str, float]]:
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                yield f"{self.name}_bucket", labels, f'le="{_format_value(bound)}"', cumulative
+            yield f"{self.name}_count", labels, "", cumulative
+            yield f"{self.name}_sum", labels, "", series[-1]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), collect=None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, collect))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), collect=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # A failing collector must not take the whole scrape down
+                continue
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+http_requests_in_progress = registry.gauge("http_requests_in_progress", "HTTP requests being handled")
+
+
+def register_runtime_metrics() -> None:
+    """Scrape-time gauges for the DB pool, in-process caches, password hashing and the Kafka producer."""
+    from app.database.connection import engine
+    from app.kafka.producer import kafka_producer
+    from app.utils.auth import auth_utils
+    from app.utils.hashing import password_hasher
+    from app.utils.principal import principal_cache
+
+    if "db_pool_connections" in registry.metrics:
+        return
+
+    def pool_connections() -> Dict[Labels, float]:
+        pool = engine.sync_engine.pool
+        if not hasattr(pool, "checkedout"):
+            return {}
+        return {
+            ("checked_out",): pool.checkedout(),
+            ("checked_in",): pool.checkedin(),
+            ("overflow",): max(0, pool.overflow()),
+        }
+
+    registry.gauge("db_pool_connections", "DB pool connections by state", ("state",), collect=pool_connections)
+    registry.gauge(
+        "db_pool_size", "Configured DB pool size",
+        collect=lambda: {(): engine.sync_engine.pool.size()} if hasattr(engine.sync_engine.pool, "size") else {}
+    )
+
+    caches = {"verified_tokens": auth_utils.verified_tokens, "principals": principal_cache.cache}
+    registry.gauge("cache_entries", "Entries in in-process caches", ("cache",),
+                   collect=lambda: {(name,): len(cache) for name, cache in caches.items()})
+    registry.counter("cache_hits_total", "In-process cache hits", ("cache",),
+                     collect=lambda: {(name,): cache.hits for name, cache in caches.items()})
+    registry.counter("cache_misses_total", "In-process cache misses", ("cache",),
+                     collect=lambda: {(name,): cache.misses for name, cache in caches.items()})
+
+    registry.gauge("password_hash_pending", "Password hashes queued or running",
+                   collect=lambda: {(): password_hasher.pending})
+    registry.counter("password_hash_rejected_total", "Password hashes shed with 429",
+                     collect=lambda: {(): password_hasher.rejected})
+
+    registry.gauge("kafka_producer_ready", "1 once the Kafka producer is connected and warmed up",
+                   collect=lambda: {(): int(kafka_producer.ready)})
+    registry.gauge("kafka_producer_clients", "Connected Kafka producer clients, one per compression codec",
+                   collect=lambda: {(): len(kafka_producer.producers)})
+
+    def spool_stats() -> Dict[Labels, float]:
+        if kafka_producer.spool is None:
+            return {}
+        return {(key,): value for key, value in kafka_producer.spool.stats().items()}
+
+    registry.gauge("kafka_producer_spool", "Kafka disk spool records and bytes", ("stat",), collect=spool_stats)
@@ -0,0 +1,79 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by authorization checks, without a DB session attached."""
+    id: int
+    email: Optional[str]
+    role: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(id=user.id, email=user.email, role=user.role, is_active=bool(user.is_active))
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> "Principal":
+        return cls(
+            id=int(payload["sub"]),
+            email=payload.get("email"),
+            role=payload["role"],
+            is_active=bool(payload["active"]),
+        )
+
+
+class PrincipalCache:
+    """
+    Short-lived cache of principals by user id.
+
+    Entries are dropped when the user changes (see UserService) and expire after
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS otherwise, which bounds staleness in the
+    other worker processes. The same invalidation marks tokens issued before it
+    as untrusted, so their signed claims are not used for that user any more.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, trust_claims_seconds: float):
+        self.cache: TTLCache[Principal] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.trust_claims_seconds = trust_claims_seconds
+        # user id -> time of the last change; tokens issued before it must be checked
+        self._changed_at: Dict[int, float] = {}
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        return self.cache.get(user_id)
+
+    def set(self, principal: Principal) -> None:
+        self.cache.set(principal.id, principal)
+
+    def invalidate(self, user_id: int) -> None:
+        self.cache.delete(user_id)
+        now = time.time()
+        self._changed_at[user_id] = now
+        if len(self._changed_at) > self.cache.maxsize:
+            # Changes older than the trust window no longer affect any trusted token
+            self._changed_at = {
+                uid: at for uid, at in self._changed_at.items()
+                if now - at <= self.trust_claims_seconds
+            }
+
+    def from_trusted_claims(self, payload: Dict[str, Any]) -> Optional[Principal]:
+        """Principal built from the token alone, if its claims are recent enough to trust."""
+        if self.trust_claims_seconds <= 0 or "role" not in payload or "active" not in payload:
+            return None
+        issued_at = payload.get("iat") or 0
+        if time.time() - issued_at > self.trust_claims_seconds:
+            return None
+        if issued_at <= self._changed_at.get(int(payload["sub"]), 0):
+            return None
+        return Principal.from_claims(payload)
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+    trust_claims_seconds=settings.AUTH_TRUST_CLAIMS_SECONDS,
+)
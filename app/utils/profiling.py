@@ -0,0 +1,182 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+from app.core.config import settings
+
+# Running task per event loop; without it every sample of the loop thread is kept
+_current_tasks = getattr(asyncio.tasks, "_current_tasks", None)
+
+
+def collapse(frame) -> str:
+    """A frame's stack, root first, as one "func (file:line);..." line of the collapsed stack format."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+@dataclass
+class Profile:
+    """Stack samples taken while one request was running on the event loop."""
+    id: str
+    method: str
+    path: str
+    reason: str  # "requested" or "sampled"
+    started_at: float = field(default_factory=time.time)
+    route: Optional[str] = None
+    status: Optional[int] = None
+    duration_ms: float = 0.0
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope input: one "stack count" line per distinct stack."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "samples": self.samples,
+        }
+
+
+@dataclass
+class _Session:
+    profile: Profile
+    loop: asyncio.AbstractEventLoop
+    task: asyncio.Task
+    thread_id: int
+
+
+class StackSampler:
+    """
+    Samples the stacks of profiled requests from a background thread.
+
+    Every `interval` seconds it looks at the event loop thread and, when the
+    task running there is one being profiled, records its stack. Other
+    requests interleaved on the same loop are therefore not mixed in, and time
+    spent awaiting I/O shows up as wall time without samples. The thread only
+    runs while at least one request is being profiled.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._sessions: Dict[int, _Session] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: Profile) -> None:
+        loop = asyncio.get_running_loop()
+        session = _Session(profile, loop, asyncio.current_task(), threading.get_ident())
+        with self._lock:
+            self._sessions[id(session.task)] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile: Profile) -> None:
+        with self._lock:
+            for key, session in list(self._sessions.items()):
+                if session.profile is profile:
+                    del self._sessions[key]
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            # Held for the whole pass: once stop() returns, its profile is no longer written to
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for session in self._sessions.values():
+                    # Read without the loop's cooperation, good enough for sampling
+                    if _current_tasks is not None and _current_tasks.get(session.loop) is not session.task:
+                        continue
+                    frame = frames.get(session.thread_id)
+                    if frame is not None:
+                        session.profile.stacks[collapse(frame)] += 1
+                        session.profile.samples += 1
+
+
+class ProfileStore:
+    """The last `keep` profiles, plus the stacks of all profiles aggregated per route."""
+
+    def __init__(self, keep: int = 50, max_stacks: int = 5000):
+        self.recent: Deque[Profile] = deque(maxlen=keep)
+        self.max_stacks = max_stacks
+        self.by_route: Dict[str, Counter] = {}
+        self.requests_by_route: Counter = Counter()
+
+    def add(self, profile: Profile) -> None:
+        self.recent.append(profile)
+        route = profile.route or "unmatched"
+        stacks = self.by_route.setdefault(route, Counter())
+        self.requests_by_route[route] += 1
+        for stack, count in profile.stacks.items():
+            if stack in stacks or len(stacks) < self.max_stacks:
+                stacks[stack] += count
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return next((profile for profile in self.recent if profile.id == profile_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [profile.summary() for profile in reversed(self.recent)]
+
+    def routes(self) -> Dict[str, Dict[str, int]]:
+        return {
+            route: {"requests": self.requests_by_route[route], "samples": sum(stacks.values())}
+            for route, stacks in self.by_route.items()
+        }
+
+    def aggregate(self, route: str) -> Optional[str]:
+        stacks = self.by_route.get(route)
+        if stacks is None:
+            return None
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+    def clear(self) -> None:
+        self.recent.clear()
+        self.by_route.clear()
+        self.requests_by_route.clear()
+
+
+class ProfileBudget:
+    """At most `per_minute` profiles in any sliding minute, so profiling cannot be used to load the server."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._started: Deque[float] = deque()
+
+    def acquire(self) -> bool:
+        now = time.monotonic()
+        while self._started and now - self._started[0] >= 60:
+            self._started.popleft()
+        if len(self._started) >= self.per_minute:
+            return False
+        self._started.append(now)
+        return True
+
+
+def new_profile(method: str, path: str, reason: str) -> Profile:
+    return Profile(id=uuid.uuid4().hex, method=method, path=path, reason=reason)
+
+
+stack_sampler = StackSampler(interval=settings.PROFILING_INTERVAL_MS / 1000)
+profile_store = ProfileStore(keep=settings.PROFILING_KEEP, max_stacks=settings.PROFILING_MAX_STACKS)
+profile_budget = ProfileBudget(per_minute=settings.PROFILING_MAX_PER_MINUTE)
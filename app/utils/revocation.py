@@ -0,0 +1,163 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Protocol, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from app.core.config import settings
+from app.models.model import RevokedToken
+from app.utils.logger import logger
+
+# Re-read revocations this far behind the cursor, for rows committed out of order
+SYNC_OVERLAP = timedelta(seconds=10)
+
+
+class RevocationBackend(Protocol):
+    async def revoke(self, jti: str, expires_at: datetime, user_id: Optional[int] = None) -> None: ...
+
+    async def revoked_since(self, since: Optional[datetime]) -> List[Tuple[str, datetime, datetime]]:
+        """Unexpired revocations as (jti, expires_at, revoked_at), all of them when `since` is None."""
+        ...
+
+    async def sweep(self, now: datetime) -> int: ...
+
+
+class PostgresRevocationBackend:
+    """Revoked jtis in the revoked_tokens table, shared by every worker."""
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from app.database.connection import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+
+    async def revoke(self, jti: str, expires_at: datetime, user_id: Optional[int] = None) -> None:
+        async with self.session_factory() as db:
+            await db.execute(
+                insert(RevokedToken)
+                .values(jti=jti, user_id=user_id, expires_at=expires_at, revoked_at=datetime.utcnow())
+                .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+            )
+            await db.commit()
+
+    async def revoked_since(self, since: Optional[datetime]) -> List[Tuple[str, datetime, datetime]]:
+        stmt = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+            RevokedToken.expires_at > datetime.utcnow()
+        )
+        if since is not None:
+            stmt = stmt.where(RevokedToken.revoked_at > since - SYNC_OVERLAP)
+        async with self.session_factory() as db:
+            result = await db.execute(stmt)
+            return [tuple(row) for row in result.all()]
+
+    async def sweep(self, now: datetime) -> int:
+        async with self.session_factory() as db:
+            result = await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            await db.commit()
+            return result.rowcount
+
+
+class MemoryRevocationBackend:
+    """Process-local backend, for a single worker or tests."""
+
+    def __init__(self):
+        self.rows: Dict[str, Tuple[datetime, datetime]] = {}
+
+    async def revoke(self, jti: str, expires_at: datetime, user_id: Optional[int] = None) -> None:
+        self.rows.setdefault(jti, (expires_at, datetime.utcnow()))
+
+    async def revoked_since(self, since: Optional[datetime]) -> List[Tuple[str, datetime, datetime]]:
+        now = datetime.utcnow()
+        return [
+            (jti, expires_at, revoked_at)
+            for jti, (expires_at, revoked_at) in self.rows.items()
+            if expires_at > now and (since is None or revoked_at > since - SYNC_OVERLAP)
+        ]
+
+    async def sweep(self, now: datetime) -> int:
+        expired = [jti for jti, (expires_at, _) in self.rows.items() if expires_at <= now]
+        for jti in expired:
+            del self.rows[jti]
+        return len(expired)
+
+
+BACKENDS = {
+    "postgres": PostgresRevocationBackend,
+    "memory": MemoryRevocationBackend,
+}
+
+
+class TokenRevocationList:
+    """
+    Local copy of the shared revocation list, so checking a token needs no I/O.
+
+    Every worker loads the unexpired revoked jtis at startup and then polls the
+    backend for new ones every `sync_interval` seconds, so a logout on one
+    worker reaches the others within that interval; the revoking worker sees it
+    at once. Expired entries are dropped locally on each sync and deleted from
+    the backend every `sweep_interval` seconds, off the request path.
+    """
+
+    def __init__(self, backend: RevocationBackend, sync_interval: float = 2.0, sweep_interval: float = 600.0):
+        self.backend = backend
+        self.sync_interval = sync_interval
+        self.sweep_interval = sweep_interval
+        self._revoked: Dict[str, datetime] = {}  # jti -> expires_at
+        self._cursor: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._revoked
+
+    async def revoke(self, jti: str, expires_at: datetime, user_id: Optional[int] = None) -> None:
+        await self.backend.revoke(jti, expires_at, user_id)
+        self._revoked[jti] = expires_at
+
+    async def sync(self) -> None:
+        rows = await self.backend.revoked_since(self._cursor)
+        for jti, expires_at, revoked_at in rows:
+            self._revoked[jti] = expires_at
+            if self._cursor is None or revoked_at > self._cursor:
+                self._cursor = revoked_at
+        if self._cursor is None:
+            # Nothing revoked yet: later syncs only need what comes after now
+            self._cursor = datetime.utcnow()
+        now = datetime.utcnow()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+
+    async def _run(self) -> None:
+        last_sweep = asyncio.get_running_loop().time()
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+                if asyncio.get_running_loop().time() - last_sweep >= self.sweep_interval:
+                    last_sweep = asyncio.get_running_loop().time()
+                    swept = await self.backend.sweep(datetime.utcnow())
+                    if swept:
+                        logger.info("Swept %d expired token revocations", swept)
+            except Exception:
+                logger.exception("Token revocation sync failed")
+
+    async def start(self) -> None:
+        if self._task is None:
+            await self.sync()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+token_revocations = TokenRevocationList(
+    BACKENDS[settings.TOKEN_REVOCATION_BACKEND](),
+    sync_interval=settings.TOKEN_REVOCATION_SYNC_SECONDS,
+    sweep_interval=settings.TOKEN_REVOCATION_SWEEP_SECONDS
+)
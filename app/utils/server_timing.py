@@ -0,0 +1,87 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+from fastapi.routing import APIRoute
+from app.core.config import settings
+
+
+class RequestTimings:
+    """Milliseconds spent per phase of one request, for the Server-Timing header."""
+    __slots__ = ("phases", "endpoint_end")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.endpoint_end: Optional[float] = None
+
+    def add(self, phase: str, ms: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + ms
+
+
+# Set by ServerTimingMiddleware; while it is None every hook is one lookup
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def timed_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an endpoint to record its own run time as the "handler" phase."""
+    if getattr(endpoint, "_timed", False):
+        # include_router builds the route again from the wrapped endpoint
+        return endpoint
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            timings = request_timings.get()
+            if timings is None:
+                return await endpoint(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timings.endpoint_end = time.perf_counter()
+                timings.add("handler", (timings.endpoint_end - started) * 1000)
+    else:
+        # Runs in the threadpool, with a copy of the request's context
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            timings = request_timings.get()
+            if timings is None:
+                return endpoint(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                timings.endpoint_end = time.perf_counter()
+                timings.add("handler", (timings.endpoint_end - started) * 1000)
+    wrapper._timed = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    Route recording the endpoint time and the response serialization time.
+
+    Serialization ("render") is what FastAPI does between the endpoint
+    returning and the response being ready: response_model validation, the
+    JSON encoding and rendering. With SERVER_TIMING_ENABLED off this is a
+    plain APIRoute.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if settings.SERVER_TIMING_ENABLED:
+            endpoint = timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if not settings.SERVER_TIMING_ENABLED:
+            return handler
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = request_timings.get()
+            if timings is not None and timings.endpoint_end is not None:
+                timings.add("render", (time.perf_counter() - timings.endpoint_end) * 1000)
+            return response
+
+        return timed_handler
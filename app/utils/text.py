@@ -2,7 +2,6 @@ import re
 import unicodedata
 
 def slugify(text: str) -> str:
-    print(type(text))
     if not isinstance(text, str):
         raise TypeError("slugify function expects a string as input")
     
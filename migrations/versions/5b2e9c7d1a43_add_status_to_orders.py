@@ -0,0 +1,31 @@
+"""add status to orders
+
+Revision ID: 5b2e9c7d1a43
+Revises: c020e8dc6f03
+Create Date: 2026-10-19 09:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e9c7d1a43'
+down_revision: Union[str, None] = 'c020e8dc6f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "orders",
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="created")
+    )
+    op.create_index("ix_orders_status", "orders", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_status", table_name="orders")
+    op.drop_column("orders", "status")
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import random
+from collections import defaultdict
+from aiokafka import TopicPartition
+from app.kafka.consumer.engine import ConsumerEngine, PartitionOffsetTracker
+from app.kafka.consumer.retry import RetryPolicy
+from app.kafka.transport.memory import InMemoryBroker, InMemoryConsumer
+
+TOPIC = "orders"
+GROUP = "order-processors"
+
+
+class StrictConsumer(InMemoryConsumer):
+    """Rejects commits for partitions it does not own, like aiokafka's IllegalStateError."""
+
+    async def commit(self, offsets=None):
+        if offsets is not None and not set(offsets) <= self.assignment():
+            raise RuntimeError(f"Committing unassigned partitions {set(offsets) - self.assignment()}")
+        await super().commit(offsets)
+
+
+def produce(broker, partition, order_id, seq):
+    value = {"order_id": order_id, "partition": partition, "seq": seq}
+    broker.append(TOPIC, json.dumps(value).encode(), key=str(order_id).encode(), partition=partition)
+
+
+async def start_consumer(broker, member_id=None):
+    consumer = StrictConsumer(
+        TOPIC, broker=broker, group_id=GROUP, value_deserializer=json.loads,
+        auto_offset_reset="earliest", enable_auto_commit=False,
+    )
+    if member_id is not None:
+        consumer.member_id = member_id
+    return consumer
+
+
+async def wait_for(condition, timeout=5.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.001)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def run_until(engine, consumer, condition):
+    consumer.subscribe([TOPIC], listener=engine.rebalance_listener())
+    await consumer.start()
+    run = asyncio.create_task(engine.run())
+    await wait_for(lambda: condition() or run.done())
+    engine.stop()
+    await asyncio.wait_for(run, 5)
+    await consumer.stop()
+
+
+def test_offset_tracker_commits_up_to_lowest_unfinished_offset():
+    tracker = PartitionOffsetTracker()
+    for offset in range(5):
+        tracker.add(offset)
+    tracker.complete(1)
+    tracker.complete(2)
+    assert tracker.committable is None
+    tracker.complete(0)
+    assert tracker.committable == 3
+    tracker.complete(4)
+    assert tracker.committable == 3 and tracker.in_flight == 2
+    tracker.complete(3)
+    assert tracker.committable == 5 and tracker.in_flight == 0
+
+
+def test_engine_does_not_commit_past_an_unfinished_record():
+    async def scenario():
+        broker = InMemoryBroker(default_partitions=1)
+        for seq in range(5):
+            produce(broker, 0, order_id=seq, seq=seq)
+        consumer = await start_consumer(broker)
+        release = asyncio.Event()
+
+        async def handler(value):
+            if value["seq"] == 0:
+                await release.wait()
+
+        engine = ConsumerEngine(consumer, handler, workers=5, commit_interval_ms=0)
+        committed_while_blocked = []
+
+        async def release_after_the_others():
+            await wait_for(lambda: engine.stats.processed == 4)
+            await engine.commit()
+            committed_while_blocked.append(broker.committed(GROUP, TopicPartition(TOPIC, 0)))
+            release.set()
+
+        releaser = asyncio.create_task(release_after_the_others())
+        await run_until(engine, consumer, lambda: engine.stats.processed == 5)
+        await releaser
+        return broker, committed_while_blocked
+
+    broker, committed_while_blocked = asyncio.run(scenario())
+    # Offsets 1-4 finished first, but offset 0 held the commit back
+    assert committed_while_blocked == [None]
+    assert broker.committed(GROUP, TopicPartition(TOPIC, 0)) == 5
+
+
+def test_engine_keeps_events_of_one_key_in_order():
+    async def scenario():
+        broker = InMemoryBroker(default_partitions=3)
+        expected = defaultdict(list)
+        for seq in range(200):
+            order_id = seq % 7
+            produce(broker, order_id % 3, order_id, seq)
+            expected[order_id].append(seq)
+        consumer = await start_consumer(broker)
+        handled = defaultdict(list)
+        rng = random.Random(7)
+
+        async def handler(value):
+            await asyncio.sleep(rng.random() / 1000)
+            handled[value["order_id"]].append(value["seq"])
+
+        engine = ConsumerEngine(consumer, handler, workers=4, max_records=50, commit_interval_ms=0)
+        await run_until(engine, consumer, lambda: engine.stats.processed == 200)
+        return expected, handled
+
+    expected, handled = asyncio.run(scenario())
+    assert handled == expected
+
+
+def test_engine_retries_transient_errors_then_dead_letters_the_record():
+    async def scenario():
+        broker = InMemoryBroker(default_partitions=1)
+        produce(broker, 0, order_id=1, seq=0)
+        produce(broker, 0, order_id=1, seq=1)
+        produce(broker, 0, order_id=2, seq=2)
+        consumer = await start_consumer(broker)
+        handled = []
+        dead_letters = []
+
+        async def handler(value):
+            if value["seq"] == 0:
+                raise ConnectionError("database unreachable")
+            handled.append(value["seq"])
+
+        async def dead_letter(record, error):
+            dead_letters.append((record, error))
+            handled.append("dlq")
+
+        engine = ConsumerEngine(
+            consumer, handler, workers=2, commit_interval_ms=0, dead_letter=dead_letter,
+            retry_policy=RetryPolicy(max_retries=2, base_delay_ms=1, max_delay_ms=2),
+        )
+        await run_until(
+            engine, consumer, lambda: engine.stats.processed == 2 and engine.stats.dead_lettered == 1
+        )
+        return broker, engine, handled, dead_letters
+
+    broker, engine, handled, dead_letters = asyncio.run(scenario())
+    assert engine.stats.retried == 2
+    [(record, error)] = dead_letters
+    assert (record.offset, record.attempts) == (0, 3)
+    assert isinstance(error, ConnectionError)
+    # The next event of order 1 waited for the dead-lettered one, order 2 did not
+    assert handled.index("dlq") < handled.index(1)
+    assert broker.committed(GROUP, TopicPartition(TOPIC, 0)) == 3
+
+
+def test_partition_revoked_during_blocked_dispatch_is_dropped():
+    async def scenario():
+        broker = InMemoryBroker(default_partitions=2)
+        for partition in (0, 1):
+            for seq in range(5):
+                produce(broker, partition, order_id=10 * partition + seq, seq=seq)
+        consumer = await start_consumer(broker, member_id="m")
+        blocked_on = []
+        release = asyncio.Event()
+        handled = []
+
+        async def handler(value):
+            if not blocked_on:
+                blocked_on.append(value["partition"])
+            await release.wait()
+            handled.append((value["partition"], value["seq"]))
+
+        # One worker with a one-slot queue: the first record blocks the worker, the
+        # second fills the queue, and dispatch then waits with the rest of the fetch
+        engine = ConsumerEngine(
+            consumer, handler, key_func=lambda record: record.value["order_id"], workers=1, queue_size=1,
+            commit_interval_ms=0, rebalance_timeout_ms=50,
+        )
+        consumer.subscribe([TOPIC], listener=engine.rebalance_listener())
+        await consumer.start()
+        run = asyncio.create_task(engine.run())
+        await wait_for(lambda: blocked_on and engine.stats.fetched == 2)
+        await asyncio.sleep(0.01)
+        kept = TopicPartition(TOPIC, blocked_on[0])
+        revoked = TopicPartition(TOPIC, 1 - blocked_on[0])
+
+        # A second member takes the partition whose records the blocked fetch still holds. Range
+        # assignment hands the first partition to the first member id. Polling here stands in for
+        # aiokafka's coordinator, which runs the rebalance while the fetch loop is busy.
+        broker.join(GROUP, "z" if kept.partition == 0 else "a", {TOPIC})
+        await consumer.getmany(timeout_ms=0)
+        assert consumer.assignment() == {kept}
+
+        release.set()
+        await wait_for(lambda: engine.stats.processed == 5)
+        await asyncio.sleep(0.01)
+        engine.stop()
+        await asyncio.wait_for(run, 5)
+        await consumer.stop()
+        return broker, engine, handled, kept, revoked
+
+    broker, engine, handled, kept, revoked = asyncio.run(scenario())
+    assert handled == [(kept.partition, seq) for seq in range(5)]
+    assert engine.stats.fetched == 5 and engine.stats.processed == 5
+    assert broker.committed(GROUP, kept) == 5
+    # Left to the new owner
+    assert broker.committed(GROUP, revoked) is None
@@ -0,0 +1,38 @@
+import asyncio
+from aiokafka import TopicPartition
+from app.core.config import settings
+from app.kafka import transport
+from app.kafka.producer import KafkaProducer
+from app.kafka.spool import DiskSpool
+from app.kafka.transport.memory import InMemoryBroker
+
+TOPIC = "order-events"
+
+
+def test_spool_drain_drops_a_record_the_broker_rejects_and_keeps_going(monkeypatch, tmp_path):
+    broker = InMemoryBroker(default_partitions=1)
+    monkeypatch.setattr(settings, "KAFKA_TRANSPORT", "memory")
+    monkeypatch.setattr(transport, "_memory_broker", broker)
+
+    # Left by a previous run while the broker was down; the second record is
+    # larger than max_request_size, so send() rejects it outright
+    spool = DiskSpool(str(tmp_path), segment_bytes=4 * 1024 * 1024, fsync="never").open()
+    for value in (b"first", b"x" * (2 * 1024 * 1024), b"second", b"third"):
+        spool.append(TOPIC, value, key=b"order-1")
+
+    async def scenario():
+        producer = KafkaProducer(compression_type="none", topic_compression={}, spool=spool)
+        producer.open_spool()
+
+        async def drained():
+            while spool.pending:
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(drained(), 5)
+        # With the spool empty, sends go to the broker again
+        await producer.produce_message(TOPIC, b"fourth", key=b"order-1")
+        await producer.close()
+
+    asyncio.run(scenario())
+    delivered = [record.value for record in broker.fetch(TopicPartition(TOPIC, 0), 0, 10)]
+    assert delivered == [b"first", b"second", b"third", b"fourth"]
+    assert spool.spooled == 4
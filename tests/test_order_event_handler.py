@@ -0,0 +1,71 @@
+import asyncio
+from contextlib import asynccontextmanager
+from app.services.order import order_event_handler
+
+NOTIFICATIONS = []
+
+
+class FakeOrderService:
+    """Order statuses kept in a dict, notifications recorded instead of sent."""
+
+    statuses = {}
+
+    def __init__(self, db):
+        pass
+
+    async def apply_status_batch(self, statuses):
+        previous = {order_id: self.statuses[order_id] for order_id in statuses if order_id in self.statuses}
+        for order_id in previous:
+            self.statuses[order_id] = statuses[order_id].value
+        return previous
+
+    async def send_payment_confirmation(self, customer_id):
+        NOTIFICATIONS.append(("paid", customer_id))
+
+    async def send_shipping_notification(self, order_id, tracking_number=None):
+        NOTIFICATIONS.append(("shipped", order_id))
+
+    async def process_refund(self, order_id):
+        NOTIFICATIONS.append(("refund", order_id))
+
+
+@asynccontextmanager
+async def fake_session():
+    yield None
+
+
+def event(order_id, status, **extra):
+    return {"order_id": order_id, "status": status, "customer_id": 100 + order_id, **extra}
+
+
+def run_batches(monkeypatch, statuses, *batches):
+    NOTIFICATIONS.clear()
+    monkeypatch.setattr(FakeOrderService, "statuses", dict(statuses))
+    monkeypatch.setattr(order_event_handler, "OrderService", FakeOrderService)
+    monkeypatch.setattr(order_event_handler, "AsyncSessionLocal", fake_session)
+    for batch in batches:
+        asyncio.run(order_event_handler.process_order_batch(batch))
+    return FakeOrderService.statuses
+
+
+def test_batch_notifies_once_per_order_with_its_final_status(monkeypatch):
+    statuses = run_batches(
+        monkeypatch, {1: "created", 2: "paid"},
+        [event(1, "paid"), event(1, "shipped"), event(2, "cancelled", refund_required=True), event(1, "shipped")],
+    )
+    assert statuses == {1: "shipped", 2: "cancelled"}
+    assert NOTIFICATIONS == [("shipped", 1), ("refund", 2)]
+
+
+def test_replayed_batch_does_not_notify_again(monkeypatch):
+    batch = [event(1, "paid"), event(3, "paid")]
+    run_batches(monkeypatch, {1: "created"}, batch, batch)
+    # Order 3 does not exist, order 1 only moved on the first delivery
+    assert NOTIFICATIONS == [("paid", 101)]
+
+
+def test_single_event_is_not_notified_again_on_redelivery(monkeypatch):
+    run_batches(monkeypatch, {1: "paid"})
+    asyncio.run(order_event_handler.process_order(event(1, "shipped")))
+    asyncio.run(order_event_handler.process_order(event(1, "shipped")))
+    assert NOTIFICATIONS == [("shipped", 1)]
@@ -0,0 +1,51 @@
+import asyncio
+from app.middleware.rate_limit import MemoryRateLimitStore, RateLimitMiddleware, parse_policies
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def request(middleware, path, method="GET"):
+    scope = {"type": "http", "method": method, "path": path, "headers": [], "client": ("10.0.0.1", 1234)}
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, None, send)
+    return messages[0]["status"]
+
+
+def test_rejected_request_uses_no_quota_of_other_policies():
+    middleware = RateLimitMiddleware(
+        ok_app,
+        policies=parse_policies("/=3/60:ip,/api/v1/auth/login=1/60:ip"),
+        store=MemoryRateLimitStore(),
+        exempt_paths=[],
+        trust_forwarded=False,
+    )
+
+    async def scenario():
+        statuses = [await request(middleware, "/api/v1/auth/login") for _ in range(4)]
+        # Only the admitted login counts against the site-wide limit of 3
+        statuses += [await request(middleware, "/api/v1/products/") for _ in range(3)]
+        return statuses
+
+    assert asyncio.run(scenario()) == [200, 429, 429, 429, 200, 200, 429]
+
+
+def test_memory_store_counts_in_every_window_or_none():
+    store = MemoryRateLimitStore()
+    limits = [("a", 2, 60.0), ("b", 1, 60.0)]
+
+    async def scenario():
+        return [await store.hit(limits, now=1000.0) for _ in range(2)] + [await store.hit(limits[:1], now=1000.0)]
+
+    first, second, only_a = asyncio.run(scenario())
+    assert [allowed for allowed, _, _ in first] == [True, True]
+    assert [remaining for _, remaining, _ in first] == [1, 0]
+    assert [allowed for allowed, _, _ in second] == [True, False]
+    # The rejected request was not counted against "a"
+    assert only_a[0][:2] == (True, 0)
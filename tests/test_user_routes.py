@@ -0,0 +1,47 @@
+from datetime import datetime
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from app.api.v1.routes.endpoints.user import get_user_service
+from app.core.config import settings
+from app.database.connection import get_db
+from app.main import app
+from app.services.user_service import UserService
+from app.utils.auth import auth_utils
+from app.utils.principal import Principal, principal_cache
+
+USER = SimpleNamespace(
+    id=7, email="user7@example.com", first_name="Ada", last_name="Lovelace", role="customer",
+    is_active=True, is_verified=True, created_at=datetime(2024, 1, 1), updated_at=datetime(2024, 1, 1),
+)
+
+
+class FakeUserRepository:
+    async def get(self, user_id):
+        return USER if user_id == USER.id else None
+
+
+def user_service():
+    service = UserService(None)
+    service.repository = FakeUserRepository()
+    return service
+
+
+async def no_db():
+    yield None
+
+
+def test_me_returns_the_authenticated_user(monkeypatch):
+    principal = Principal(id=USER.id, email=USER.email, role=USER.role, is_active=True)
+    monkeypatch.setattr(principal_cache, "get", {USER.id: principal}.get)
+    monkeypatch.setitem(app.dependency_overrides, get_db, no_db)
+    monkeypatch.setitem(app.dependency_overrides, get_user_service, user_service)
+    token = auth_utils.create_access_token(USER.id)
+
+    response = TestClient(app).get(
+        f"{settings.API_V1_STR}/users/me", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    # Routed to /me for a customer, not to the admin-only /{user_id}
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == USER.id
+    assert response.json()["email"] == USER.email